@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+"""
+	This module contains a batched board engine that holds many
+	positions as NumPy arrays of bitboards and computes moves,
+	flips and SEF features for all of them at once.
+
+	File: OthelloBatch.py
+"""
+
+import numpy as np
+from OthelloUtils import GameState, BitBoard, squareToPosition
+
+_U64 = np.uint64
+_FULL = _U64(0xFFFFFFFFFFFFFFFF)
+_NOT_A_FILE = _U64(0xFEFEFEFEFEFEFEFE)
+_NOT_H_FILE = _U64(0x7F7F7F7F7F7F7F7F)
+_INNER = _U64(0x7E7E7E7E7E7E7E7E)
+_ZERO = _U64(0)
+
+# (shift, shift left?, wrap mask, squares a run can cross) for the eight directions, as in OthelloUtils.legalMask
+_DIRECTIONS = ((_U64(1), True, _NOT_A_FILE, _INNER), (_U64(1), False, _NOT_H_FILE, _INNER),
+	(_U64(8), True, _FULL, _FULL), (_U64(8), False, _FULL, _FULL),
+	(_U64(9), True, _NOT_A_FILE, _INNER), (_U64(7), True, _NOT_H_FILE, _INNER),
+	(_U64(7), False, _NOT_A_FILE, _INNER), (_U64(9), False, _NOT_H_FILE, _INNER))
+
+_SQUARE_BITS = np.left_shift(_U64(1), np.arange(64, dtype=np.uint64))
+_POPCOUNT8 = np.array([bin(n).count('1') for n in range(256)], dtype=np.uint8)
+
+
+def popcount(masks):
+	""" Number of set bits of every element of a uint64 array """
+	if hasattr(np, 'bitwise_count'):
+		return np.bitwise_count(masks).astype(np.int64)
+	masks = np.ascontiguousarray(masks, dtype=np.uint64)
+	return _POPCOUNT8[masks.view(np.uint8)].reshape(masks.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+def h_shift(x, amount, left):
+	if left:
+		return np.left_shift(x, amount)
+	return np.right_shift(x, amount)
+
+def legalMasks(own, opp):
+	""" Legal moves of the side owning own, for every board of a batch
+
+		Args:
+			own: uint64 array of the bitboards of the side to move
+			opp: uint64 array of the bitboards of the other side
+		Return:
+			moves: uint64 array of legal move bitboards
+	"""
+	empty = ~(own | opp)
+	moves = np.zeros_like(own)
+	for amount, left, wrap, inner in _DIRECTIONS:
+		through = opp & inner
+		t = h_shift(own, amount, left) & through
+		for n in range(5):
+			t |= h_shift(t, amount, left) & through
+		moves |= h_shift(t, amount, left) & empty
+	return moves
+
+def flipMasks(own, opp, squares):
+	""" Discs flipped by playing squares, for every board of a batch
+
+		Args:
+			own: uint64 array of the bitboards of the side to move
+			opp: uint64 array of the bitboards of the other side
+			squares: int array of the bit index played on each board
+		Return:
+			flips: uint64 array of the discs to flip
+	"""
+	move = _SQUARE_BITS[squares]
+	flips = np.zeros_like(own)
+	for amount, left, wrap, inner in _DIRECTIONS:
+		x = h_shift(move, amount, left) & wrap
+		run = np.zeros_like(own)
+		captured = np.zeros(own.shape, dtype=bool)
+		for n in range(7):
+			captured |= ((x & own) != _ZERO) & (run != _ZERO)
+			in_opp = x & opp
+			run |= in_opp
+			x = h_shift(in_opp, amount, left) & wrap
+		flips |= np.where(captured, run, _ZERO)
+	return flips
+
+def maskToSquares(mask):
+	""" Returns the bit indices set in one uint64 mask """
+	return [sq for sq in range(64) if int(mask) >> sq & 1]
+
+
+class BoardBatch:
+	""" N positions held as arrays of bitboards
+
+		black and white are uint64 arrays of the discs of player_one and player_two,
+		and black_to_move is a boolean array of the side to move in every position.
+	"""
+
+	def __init__(self, black, white, black_to_move, player_one='b', player_two='w'):
+		self.black = np.asarray(black, dtype=np.uint64)
+		self.white = np.asarray(white, dtype=np.uint64)
+		self.black_to_move = np.asarray(black_to_move, dtype=bool)
+		self.player_one = player_one
+		self.player_two = player_two
+		template = BitBoard(player_one, player_two)
+		self.corner_mask = _U64(template.corner_mask)
+		self.edge_mask = _U64(template.edge_mask)
+		self.corner_adj_mask = _U64(template.corner_adj_mask)
+
+	@classmethod
+	def fromStates(cls, states):
+		""" Builds a batch from a list of GameStates (or of (board, player to move) tuples) """
+		pairs = [(state.board, state.turn) if isinstance(state, GameState) else state for state in states]
+		boards = [BitBoard.fromBoard(board) for board, turn in pairs]
+		black_to_move = [turn == board.player_one for board, turn in pairs]
+		player_one = boards[0].player_one if boards else 'b'
+		player_two = boards[0].player_two if boards else 'w'
+		return cls([board.black for board in boards], [board.white for board in boards], black_to_move,
+			player_one, player_two)
+
+	@classmethod
+	def starting(cls, size):
+		""" A batch of size copies of the starting position, black to move """
+		board = BitBoard('b', 'w')
+		for player, position in [('w', (4, 4)), ('w', (5, 5)), ('b', (4, 5)), ('b', (5, 4))]:
+			board.h_setPosition(player, position)
+		return cls(np.full(size, board.black, dtype=np.uint64), np.full(size, board.white, dtype=np.uint64),
+			np.ones(size, dtype=bool))
+
+	def __len__(self):
+		return len(self.black)
+
+	def toBitBoard(self, index):
+		""" Returns position index as a BitBoard and the player to move """
+		board = BitBoard(self.player_one, self.player_two)
+		for sq in maskToSquares(self.black[index]):
+			board.h_setPosition(self.player_one, squareToPosition(sq))
+		for sq in maskToSquares(self.white[index]):
+			board.h_setPosition(self.player_two, squareToPosition(sq))
+		turn = self.player_one if self.black_to_move[index] else self.player_two
+		return board, turn
+
+	def sides(self):
+		""" Returns (own, opp): the bitboards of the side to move and of the other side """
+		own = np.where(self.black_to_move, self.black, self.white)
+		opp = np.where(self.black_to_move, self.white, self.black)
+		return own, opp
+
+	def legalMoves(self):
+		""" Legal move bitboards of the side to move in every position """
+		own, opp = self.sides()
+		return legalMasks(own, opp)
+
+	def legalMoveLists(self, index):
+		""" Legal moves of one position as (row, col) tuples, like Board.getLegalMoves """
+		return [squareToPosition(sq) for sq in maskToSquares(self.legalMoves()[index])]
+
+	def flips(self, squares):
+		""" Discs flipped by the side to move playing squares (one bit index per position) """
+		own, opp = self.sides()
+		return flipMasks(own, opp, np.asarray(squares))
+
+	def play(self, squares):
+		""" Plays one move in every position in place and passes the turn
+
+			A negative square is a pass for that position. The moves are not checked
+			for legality.
+
+			Args:
+				squares: int array with one bit index per position
+		"""
+		squares = np.asarray(squares)
+		passing = squares < 0
+		safe = np.where(passing, 0, squares)
+		own, opp = self.sides()
+		flips = np.where(passing, _ZERO, flipMasks(own, opp, safe))
+		placed = np.where(passing, _ZERO, _SQUARE_BITS[safe])
+		own = own | placed | flips
+		opp = opp ^ flips
+		self.black = np.where(self.black_to_move, own, opp)
+		self.white = np.where(self.black_to_move, opp, own)
+		self.black_to_move = ~self.black_to_move
+
+	def features(self, black_side):
+		""" SEF features of one side of every position
+
+			Args:
+				black_side: True for player_one, False for player_two, or a boolean array
+			Return:
+				features: int64 array of shape (N, 4) with the pieces, corner, edge and
+					corner adjacent counts, in the order of Board.getFeatureCounts
+		"""
+		discs = np.where(black_side, self.black, self.white)
+		return np.stack([popcount(discs), popcount(discs & self.corner_mask), popcount(discs & self.edge_mask),
+			popcount(discs & self.corner_adj_mask)], axis=-1)
+
+	def featureDifferences(self):
+		""" Features of the side to move minus those of the other side, shape (N, 4) """
+		return self.features(self.black_to_move) - self.features(~self.black_to_move)
+
+	def SEF(self, weights=None):
+		""" GameState.SEF of every position from the point of view of the side to move
+
+			Args:
+				weights: A dict of GameState weights. Defaults to the GameState class weights
+			Return:
+				scores: int64 or float64 array of scores
+		"""
+		weights = weights or {}
+		vector = np.array([weights.get(key, getattr(GameState, key)) for key in GameState.WEIGHT_KEYS])
+		return self.featureDifferences() @ vector
+
+	def randomMoves(self, rng):
+		""" Picks a random legal move in every position, or -1 where there is none
+
+			Args:
+				rng: A numpy Generator
+			Return:
+				squares: int64 array of bit indices
+		"""
+		moves = self.legalMoves()
+		legal = (moves[:, None] & _SQUARE_BITS[None, :]) != _ZERO
+		keys = np.where(legal, rng.random(legal.shape), -1.0)
+		return np.where(legal.any(axis=1), keys.argmax(axis=1), -1)
+
+	def randomPlayouts(self, rng=None):
+		""" Plays random games to the end from every position
+
+			The batch is left holding the final positions.
+
+			Args:
+				rng: A numpy Generator. Defaults to a fresh one
+			Return:
+				disc_diff: int64 array of final black minus white disc counts
+		"""
+		rng = rng if rng is not None else np.random.default_rng()
+		passes = np.zeros(len(self), dtype=np.int64)
+		while True:
+			squares = self.randomMoves(rng)
+			passes = np.where(squares < 0, passes + 1, 0)
+			if (passes >= 2).all():
+				break
+			self.play(np.where(passes >= 2, -1, squares))
+		return popcount(self.black) - popcount(self.white)
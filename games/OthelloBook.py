@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""
+	This module contains the opening book: best moves of early
+	positions, kept in a sorted binary file that is memory-mapped
+	and binary-searched, so opening it costs nothing whatever
+	its size. Positions are stored once for all their rotations
+	and reflections.
+
+	File: OthelloBook.py
+"""
+
+import sys
+import mmap
+import struct
+import argparse
+from OthelloUtils import GameState, positionToSquare, squareToPosition, SQUARE_TRANSFORMS, INVERSE_TRANSFORMS
+from OthelloSearch import Searcher
+from OthelloSim import PLAYER_BLACK, SELECTION, newBoard, randomOpening
+
+# File layout: a header, then entries sorted by key
+HEADER = struct.Struct('<4sHxxI')		# magic, version, number of entries
+ENTRY = struct.Struct('<QhBx')			# canonical position key, score, move square in the canonical frame
+MAGIC = b'OTHB'
+VERSION = 2
+
+
+def writeBook(path, entries):
+	""" Writes a book file
+
+		Args:
+			path: File to write
+			entries: A dict of canonical position key to (move square in the canonical frame, score)
+	"""
+	with open(path, 'wb') as book_file:
+		book_file.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+		for key in sorted(entries):
+			move, score = entries[key]
+			# Scores are kept for information only and are clamped to 16 bits
+			book_file.write(ENTRY.pack(key, max(-32768, min(32767, score)), move))
+
+
+class OpeningBook:
+	""" Read-only view of a book file
+
+		The file is memory-mapped and looked up by binary search on the sorted keys,
+		so only the pages touched by a lookup are ever read.
+	"""
+
+	def __init__(self, path):
+		self.book_file = open(path, 'rb')
+		self.data = mmap.mmap(self.book_file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, version, self.size = HEADER.unpack_from(self.data, 0)
+		if magic != MAGIC or version != VERSION:
+			self.close()
+			raise ValueError("{0} is not an opening book".format(path))
+
+	def __len__(self):
+		return self.size
+
+	def close(self):
+		self.data.close()
+		self.book_file.close()
+
+	def lookupKey(self, key):
+		""" Finds a position key
+
+			Return:
+				entry: A tuple (move square, score), or None if the position is not in the book
+		"""
+		data = self.data
+		low, high = 0, self.size
+		while low < high:
+			middle = (low + high) // 2
+			entry_key, score, move = ENTRY.unpack_from(data, HEADER.size + middle * ENTRY.size)
+			if entry_key < key:
+				low = middle + 1
+			elif entry_key > key:
+				high = middle
+			else:
+				return move, score
+		return None
+
+	def lookup(self, board, player):
+		""" Returns the book move of player in a position
+
+			Args:
+				board: A Board or BitBoard
+				player: The player to move
+			Return:
+				move: A tuple (row, col), or None if the position is not in the book
+		"""
+		key, transform = board.getCanonicalKey(player)
+		entry = self.lookupKey(key)
+		if entry is None:
+			return None
+		move = squareToPosition(SQUARE_TRANSFORMS[INVERSE_TRANSFORMS[transform]][entry[0]])
+		if move not in board.getLegalMoves(player):
+			return None		# hash collision
+		return move
+
+
+def buildBook(games=200, plies=16, depth=6, opening_plies=4, seed=0):
+	""" Builds book entries by letting a search player play the opening
+
+		Every game starts with a few random moves, then a depth-limited search
+		chooses the moves of both sides up to the given ply. Each searched
+		position is stored with the move and score of the search.
+
+		Args:
+			games: Number of openings to play
+			plies: Deepest ply stored in the book
+			depth: Search depth used to choose the book moves
+			opening_plies: Random moves at the start of each game, for variety
+			seed: Seed of the random moves
+		Return:
+			entries: A dict of canonical position key to (move square, score), for writeBook
+	"""
+	searcher = Searcher(time_limit=float('inf'), max_depth=depth)
+	entries = {}
+	for game in range(games):
+		board = newBoard()
+		turn = PLAYER_BLACK
+		for move in randomOpening(game % (opening_plies + 1), seed + game):
+			board.makeMove(turn, move)
+			turn = board.opponent(turn)
+		while len(board.undo_stack) < plies:
+			if not board.getLegalMoves(turn):
+				turn = board.opponent(turn)
+				if not board.getLegalMoves(turn):
+					break
+				continue
+			key, transform = board.getCanonicalKey(turn)
+			if key in entries:
+				move = squareToPosition(SQUARE_TRANSFORMS[INVERSE_TRANSFORMS[transform]][entries[key][0]])
+			else:
+				move = searcher.search(GameState(turn, board, SELECTION))
+				entries[key] = (SQUARE_TRANSFORMS[transform][positionToSquare(move)], searcher.score)
+			board.makeMove(turn, move)
+			turn = board.opponent(turn)
+	return entries
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Builds an Othello opening book")
+	parser.add_argument('path', help="book file to write")
+	parser.add_argument('-n', '--games', type=int, default=200, help="number of openings to play")
+	parser.add_argument('--plies', type=int, default=16, help="deepest ply in the book")
+	parser.add_argument('--depth', type=int, default=6, help="search depth of the book moves")
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args(argv)
+
+	entries = buildBook(args.games, args.plies, args.depth, seed=args.seed)
+	writeBook(args.path, entries)
+	print("{0} positions written to {1}".format(len(entries), args.path))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
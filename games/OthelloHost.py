@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+
+"""
+	This module contains an asyncio game host that serves many
+	human-vs-engine games at once over a local socket, with the
+	engine moves computed in a pool of worker processes.
+
+	Every line sent by a client is a JSON command and every line
+	sent back is a JSON reply:
+
+		{"cmd": "new", "colour": "b"}	starts a game, the human playing colour
+		{"cmd": "move", "move": [row, col]}	plays a move of the human
+		{"cmd": "state"}				returns the state of the game
+		{"cmd": "quit"}					ends the session
+
+	File: OthelloHost.py
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+import multiprocessing
+import concurrent.futures
+from OthelloUtils import GameState, BitBoard, zobristHash
+from OthelloSim import PLAYER_BLACK, PLAYER_WHITE, SELECTION, newBoard
+from OthelloTournament import makeEngine, parseEngine
+
+# Engines of a worker process, by configuration
+_engines = {}
+
+
+def h_engineMove(config, black, white, turn):
+	""" Finds the engine move of a position in a worker process
+
+		Args:
+			config: A makeEngine configuration
+			black: bitboard of the black pieces
+			white: bitboard of the white pieces
+			turn: The player to move
+		Return:
+			move: A tuple (row, col)
+	"""
+	key = json.dumps(config, sort_keys=True)
+	if key not in _engines:
+		_engines[key] = makeEngine(config)
+	board = BitBoard(PLAYER_BLACK, PLAYER_WHITE)
+	board.black = black
+	board.white = white
+	board.hash_key = zobristHash(black, white)
+	return _engines[key].getMove(GameState(turn, board, SELECTION))
+
+
+class GameSession:
+	""" One game between a client and the engine
+
+		The session owns its board, so any number of sessions can be played in
+		the same process.
+	"""
+
+	def __init__(self, engine_config, human=PLAYER_BLACK):
+		self.engine_config = engine_config
+		self.human = human
+		self.board = newBoard()
+		self.turn = PLAYER_BLACK
+		self.moves = []
+
+	def legalMoves(self):
+		return self.board.getLegalMoves(self.turn)
+
+	def isOver(self):
+		return not self.legalMoves() and not self.board.getLegalMoves(self.board.opponent(self.turn))
+
+	def play(self, move):
+		""" Plays a move of the player to move, then passes for the next player if needed
+
+			Raise:
+				ValueError if the move is not legal
+		"""
+		if move not in self.legalMoves():
+			raise ValueError("Illegal move {0}".format(move))
+		self.board.makeMove(self.turn, move)
+		self.moves.append(move)
+		self.turn = self.board.opponent(self.turn)
+		if not self.legalMoves() and not self.isOver():
+			self.moves.append(None)
+			self.turn = self.board.opponent(self.turn)
+
+	def describe(self):
+		""" Returns the state of the game as a dict for the client """
+		squares = ''.join(self.board.gameboard[row][col] for row in range(1, 9) for col in range(1, 9))
+		state = {'board': squares, 'turn': self.turn, 'human': self.human,
+			'moves': [list(move) for move in self.legalMoves()], 'over': self.isOver(),
+			PLAYER_BLACK: self.board.getNoOfFlippedPieces(PLAYER_BLACK),
+			PLAYER_WHITE: self.board.getNoOfFlippedPieces(PLAYER_WHITE)}
+		return state
+
+
+class GameHost:
+	""" Serves GameSessions to clients of a local socket
+
+		Args:
+			engine_config: The makeEngine configuration of the engine
+			processes: Worker processes computing the engine moves
+	"""
+
+	def __init__(self, engine_config, processes=None):
+		self.engine_config = engine_config
+		# Forked workers would inherit the client sockets and keep them open after the host closes them
+		self.executor = concurrent.futures.ProcessPoolExecutor(processes, multiprocessing.get_context('forkserver'))
+		self.sessions = 0
+		self.server = None
+
+	async def start(self, host='127.0.0.1', port=0, path=None):
+		""" Starts listening, on a Unix socket if path is given, and returns the server """
+		if path:
+			self.server = await asyncio.start_unix_server(self.h_serve, path)
+		else:
+			self.server = await asyncio.start_server(self.h_serve, host, port)
+		return self.server
+
+	async def close(self):
+		if self.server is not None:
+			self.server.close()
+			await self.server.wait_closed()
+		self.executor.shutdown()
+
+	async def engineMoves(self, session):
+		""" Lets the engine play until it is the human's turn or the game is over
+
+			Return:
+				moves: The engine moves played, as tuples (row, col)
+		"""
+		loop = asyncio.get_running_loop()
+		moves = []
+		while session.turn != session.human and not session.isOver():
+			board = session.board
+			move = await loop.run_in_executor(self.executor, h_engineMove, session.engine_config, board.black,
+				board.white, session.turn)
+			session.play(tuple(move))
+			moves.append(tuple(move))
+		return moves
+
+	async def handle(self, session, command):
+		""" Runs one client command
+
+			Return:
+				(session, reply): The session of the client after the command and the reply
+		"""
+		cmd = command.get('cmd')
+		if cmd == 'new':
+			human = command.get('colour', PLAYER_BLACK)
+			if human not in (PLAYER_BLACK, PLAYER_WHITE):
+				raise ValueError("Unknown colour {0}".format(human))
+			session = GameSession(self.engine_config, human)
+			self.sessions += 1
+			engine_moves = await self.engineMoves(session)
+		elif session is None:
+			raise ValueError("No game; send a new command first")
+		elif cmd == 'move':
+			if session.turn != session.human:
+				raise ValueError("Not your turn")
+			move = command.get('move')
+			if not isinstance(move, list) or len(move) != 2 or not all(isinstance(n, int) for n in move):
+				raise ValueError("A move is a list [row, col]")
+			session.play(tuple(move))
+			engine_moves = await self.engineMoves(session)
+		elif cmd == 'state':
+			engine_moves = []
+		else:
+			raise ValueError("Unknown command {0}".format(cmd))
+		reply = session.describe()
+		reply['engine_moves'] = [list(move) for move in engine_moves]
+		return session, reply
+
+	async def h_serve(self, reader, writer):
+		session = None
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				try:
+					command = json.loads(line)
+					if command.get('cmd') == 'quit':
+						break
+					session, reply = await self.handle(session, command)
+				except (ValueError, AttributeError) as e:
+					reply = {'error': str(e)}
+				writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+				await writer.drain()
+		finally:
+			writer.close()
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Serves human-vs-engine Othello games over a local socket")
+	parser.add_argument('--port', type=int, default=8765, help="TCP port on 127.0.0.1")
+	parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead")
+	parser.add_argument('-j', '--processes', type=int, default=None, help="engine worker processes (default: all cores)")
+	parser.add_argument('-e', '--engine', default='engine:depth=6,time=1',
+		help="engine as name:key=value,... as in OthelloTournament")
+	args = parser.parse_args(argv)
+
+	host = GameHost(parseEngine(args.engine)[1], args.processes)
+
+	async def serve():
+		server = await host.start(port=args.port, path=args.unix)
+		print("Serving on {0}".format(args.unix or "127.0.0.1:{0}".format(args.port)))
+		try:
+			await server.serve_forever()
+		finally:
+			await host.close()
+	try:
+		asyncio.run(serve())
+	except KeyboardInterrupt:
+		pass
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
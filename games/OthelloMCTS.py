@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+"""
+	This module contains a Monte Carlo tree search player that
+	selects moves with UCT and scores leaves with random playouts.
+
+	File: OthelloMCTS.py
+"""
+
+import math
+import time
+import random
+from OthelloUtils import BitBoard, legalMask, flipMask, squareToPosition
+
+PASS = -1		# move of a node reached by passing
+
+
+class Node:
+	""" A position of the search tree
+
+		own and opp are the discs of the player to move and of the other player.
+		wins adds up the playouts through the node for the player who moved into
+		it: one for a win and a half for a draw.
+	"""
+
+	def __init__(self, own, opp, move=PASS, parent=None):
+		self.own = own
+		self.opp = opp
+		self.move = move
+		self.parent = parent
+		self.children = []
+		self.visits = 0
+		self.wins = 0.0
+		moves = legalMask(own, opp)
+		if moves:
+			self.untried = [sq for sq in range(64) if moves >> sq & 1]
+		elif legalMask(opp, own):
+			self.untried = [PASS]
+		else:
+			self.untried = []		# the game is over
+
+	def child(self, move):
+		""" Plays move (a bit index or PASS) and adds the resulting node """
+		if move == PASS:
+			node = Node(self.opp, self.own, PASS, self)
+		else:
+			flips = flipMask(self.own, self.opp, move)
+			node = Node(self.opp ^ flips, self.own | flips | (1 << move), move, self)
+		self.children.append(node)
+		return node
+
+
+def playout(own, opp, rng):
+	""" Plays random moves to the end of the game
+
+		Works on plain bitboards only, with no board object, state or logging.
+
+		Args:
+			own: bitboard of the side to move
+			opp: bitboard of the other side
+			rng: A random.Random
+		Return:
+			disc_diff: Final disc differential for the side to move
+	"""
+	randrange = rng.randrange
+	sign = 1
+	passed = False
+	while True:
+		moves = legalMask(own, opp)
+		if moves:
+			passed = False
+			for n in range(randrange(moves.bit_count())):
+				moves &= moves - 1
+			bit = moves & -moves
+			flips = flipMask(own, opp, bit.bit_length() - 1)
+			own, opp = opp ^ flips, own | flips | bit
+		elif passed:
+			break
+		else:
+			passed = True
+			own, opp = opp, own
+		sign = -sign
+	return sign * (own.bit_count() - opp.bit_count())
+
+
+class MonteCarloSearcher:
+	""" Monte Carlo tree search with UCT selection
+
+		Every playout walks down the tree choosing the child with the best upper
+		confidence bound, adds one node, and plays random moves from it to the end
+		of the game. The move played is the most visited child of the root. The
+		subtree of the position reached is kept and reused for the next search.
+	"""
+
+	def __init__(self, time_limit=1.0, playouts=None, exploration=1.4, seed=None):
+		self.time_limit = time_limit
+		self.max_playouts = playouts		# stops at whichever of the two budgets runs out first
+		self.exploration = exploration
+		self.rng = random.Random(seed)
+		self.root = None
+		self.playouts = 0
+		self.playouts_per_second = 0.0
+		self.reused = 0				# playouts inherited from the previous search
+		self.total_playouts = 0			# over every search, for throughput reports
+		self.total_time = 0.0
+		self.nodes = 0
+		self.depth_reached = 0
+		self.score = 0.0
+
+	def search(self, state):
+		""" Finds the move with the most playouts
+
+			Args:
+				state: A GameState
+			Return:
+				move: A tuple (row, col), or None if the player has no legal moves
+		"""
+		board = state.board if isinstance(state.board, BitBoard) else BitBoard.fromBoard(state.board)
+		own, opp = board.getMasks(state.turn)
+		root = self.h_findRoot(own, opp)
+		self.root = root
+		self.reused = root.visits
+		self.playouts = 0
+		self.nodes = 0
+		if root.untried == [PASS] or (not root.untried and not root.children):
+			return None
+
+		start = time.time()
+		deadline = start + self.time_limit
+		max_playouts = self.max_playouts if self.max_playouts is not None else float('inf')
+		if len(root.untried) + len(root.children) > 1:
+			while self.playouts < max_playouts and time.time() < deadline:
+				self.h_playout(root)
+				self.playouts += 1
+		elapsed = time.time() - start
+		self.playouts_per_second = self.playouts / elapsed if elapsed > 0 else 0.0
+		self.total_playouts += self.playouts
+		self.total_time += elapsed
+
+		if not root.children:
+			root.child(root.untried.pop())
+		best = max(root.children, key=lambda node: node.visits)
+		self.score = best.wins / best.visits if best.visits else 0.5
+		self.depth_reached = 0
+		node = best
+		while node.children:
+			node = max(node.children, key=lambda child: child.visits)
+			self.depth_reached += 1
+
+		# Keep the subtree of the move played for the next search
+		best.parent = None
+		self.root = best
+		position = squareToPosition(best.move)
+		state.setMinimaxMove(position)
+		return position
+
+	def h_findRoot(self, own, opp):
+		""" Returns the node of the position from the previous tree, or a new node """
+		nodes = [self.root] if self.root is not None else []
+		for ply in range(3):
+			for node in nodes:
+				if node.own == own and node.opp == opp:
+					node.parent = None
+					return node
+			nodes = [child for node in nodes for child in node.children]
+		return Node(own, opp)
+
+	def h_playout(self, root):
+		node = root
+		log = math.log
+		sqrt = math.sqrt
+		exploration = self.exploration
+		# Selection
+		while not node.untried and node.children:
+			log_visits = log(node.visits)
+			node = max(node.children, key=lambda child: child.wins / child.visits +
+				exploration * sqrt(log_visits / child.visits))
+		# Expansion
+		if node.untried:
+			move = node.untried.pop(self.rng.randrange(len(node.untried)))
+			node = node.child(move)
+			self.nodes += 1
+		# Simulation, scored for the player who moved into the node
+		disc_diff = playout(node.own, node.opp, self.rng)
+		reward = 1.0 if disc_diff < 0 else 0.5 if disc_diff == 0 else 0.0
+		# Backpropagation
+		while node is not None:
+			node.visits += 1
+			node.wins += reward
+			reward = 1.0 - reward
+			node = node.parent
@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+
+"""
+	This module contains searches that use a pool of worker
+	processes, so the computer player can use every core while
+	it thinks: one splits the root moves across the workers, the
+	other lets every worker search the whole tree through a
+	transposition table in shared memory (lazy SMP).
+
+	File: OthelloParallel.py
+"""
+
+import time
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from OthelloUtils import GameState, BitBoard, zobristHash
+from OthelloSearch import Searcher, SearchTimeout, INFINITY
+
+# State of a worker process, set by h_initWorker or h_initHelper
+_worker_searcher = None
+_shared_alpha = None
+
+
+class AlphaRaised(Exception):
+	""" Raised inside a worker search when another worker has published a better root score """
+	pass
+
+
+class WorkerSearcher(Searcher):
+	""" Searcher of a root-splitting worker process
+
+		Every time the search checks the clock it also reads the shared root score,
+		and stops with AlphaRaised once that is above root_alpha, the bound of the
+		window the move is being searched with.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		Searcher.__init__(self, *args, **kwargs)
+		self.root_alpha = -INFINITY
+
+	def h_timeUp(self):
+		if _shared_alpha.value > self.root_alpha:
+			raise AlphaRaised()
+		return Searcher.h_timeUp(self)
+
+
+def h_initWorker(shared_alpha, tt_megabytes, evaluator=None):
+	global _worker_searcher, _shared_alpha
+	_worker_searcher = WorkerSearcher(tt_megabytes=tt_megabytes, evaluator=evaluator)
+	_shared_alpha = shared_alpha
+
+def h_searchMove(task):
+	""" Searches one root move in a worker process
+
+		The window is opened with the best root score known. When another worker
+		publishes a better one, the search stops and starts again with the tighter
+		window, keeping the work done in the transposition table. A score above
+		the window is exact and is published to the other workers.
+
+		Args:
+			task: A tuple (player_one, player_two, black, white, player, square, depth,
+				deadline, weights)
+		Return:
+			result: A tuple (square, score or None if the time ran out, whether the score is
+				exact rather than an upper bound, nodes searched)
+	"""
+	player_one, player_two, black, white, player, sq, depth, deadline, weights = task
+	searcher = _worker_searcher
+	board = BitBoard(player_one, player_two)
+	board.black = black
+	board.white = white
+	board.hash_key = zobristHash(black, white)
+	searcher.board = board
+	searcher.state = GameState(player, board, {player_one: 'computer', player_two: 'computer'}, weights=weights)
+	searcher.deadline = deadline
+	searcher.nodes = 0
+	searcher.table.newSearch()
+	opp_player = searcher.h_oppPlayer(player)
+
+	board.makeSquare(player, sq)
+	while True:
+		alpha = searcher.root_alpha = _shared_alpha.value
+		try:
+			score = -searcher.h_negamax(depth - 1, -INFINITY, -alpha, opp_player, player)
+			break
+		except SearchTimeout:
+			return sq, None, False, searcher.nodes
+		except AlphaRaised:
+			while len(board.undo_stack) > 1:
+				board.unmakeMove()
+	if score <= alpha:
+		return sq, score, False, searcher.nodes
+	with _shared_alpha.get_lock():
+		if score > _shared_alpha.value:
+			_shared_alpha.value = score
+	return sq, score, True, searcher.nodes
+
+
+class ParallelSearcher(Searcher):
+	""" Searcher whose iterations split the root moves across worker processes
+
+		At every depth the most promising root move is searched first, to get a
+		good bound, and the other moves are then searched in parallel. The best
+		root score so far is kept in shared memory, and a worker narrows the window
+		of its move whenever that score rises. The book and the endgame solver are
+		used as in Searcher, in the calling process.
+	"""
+
+	def __init__(self, processes=None, time_limit=1.0, max_depth=60, tt_megabytes=16, **searcher_args):
+		# Only the workers search the tree, each with a table of tt_megabytes, so the
+		# table of this process is left at the smallest size
+		Searcher.__init__(self, time_limit, max_depth, 0, **searcher_args)
+		self.processes = processes or multiprocessing.cpu_count()
+		self.tt_megabytes = tt_megabytes
+		self.shared_alpha = None
+		self.pool = None
+
+	def close(self):
+		""" Stops the worker processes """
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool.join()
+			self.pool = None
+
+	def h_deepen(self, moves, player, opp_player, start):
+		if self.pool is None:
+			self.shared_alpha = multiprocessing.Value('q', -INFINITY)
+			self.pool = multiprocessing.Pool(self.processes, h_initWorker, (self.shared_alpha, self.tt_megabytes,
+				self.evaluator))
+		board = self.board
+		weights = self.state.getWeights()
+		empties = board.get_no_of_spaces()
+		best_move = moves[0]
+		for depth in range(1, self.max_depth + 1):
+			self.shared_alpha.value = -INFINITY
+			tasks = [(board.player_one, board.player_two, board.black, board.white, player, sq, depth,
+				self.deadline, weights) for sq in moves]
+			# The previous best move goes first, alone, then the others in parallel
+			results = [self.pool.apply(h_searchMove, (tasks[0],))]
+			if results[0][1] is not None:
+				results.extend(self.pool.imap_unordered(h_searchMove, tasks[1:]))
+
+			iteration_best = None
+			score = -INFINITY
+			complete = True
+			for sq, move_score, exact, nodes in results:
+				self.nodes += nodes
+				if move_score is None:
+					complete = False
+				elif exact and move_score > score:
+					score = move_score
+					iteration_best = sq
+			if not complete or len(results) < len(moves):
+				# A move that finished beat the previous best, which was searched first
+				if iteration_best is not None and results[0][1] is not None:
+					best_move = iteration_best
+				break
+			best_move = iteration_best
+			self.depth_reached = depth
+			self.score = score
+			moves.remove(best_move)
+			moves.insert(0, best_move)
+			if depth >= empties or time.time() - start > (self.deadline - start) / 2:
+				break
+		return best_move
+
+
+class SharedTranspositionTable:
+	""" TranspositionTable held in shared memory, read and written by many processes
+
+		It has the interface and the replacement scheme of TranspositionTable. Every
+		slot is two 64-bit words, the packed entry and the key XORed with it, so
+		there are no locks: a slot torn by two processes writing it at once no
+		longer matches its key and reads as a miss. The table is created by one
+		process and attached by name in the others; pickling it (as Pool does with
+		its initializer arguments) attaches it.
+	"""
+
+	ENTRY_BYTES = 16	# key ^ data 8, data 8 (score 4, depth 1, bound 1, move 1, generation 1)
+
+	def __init__(self, megabytes=16, name=None):
+		if name is None:
+			entries = max(2, int(megabytes * 1024 * 1024) // self.ENTRY_BYTES)
+			buckets = 1 << ((entries // 2).bit_length() - 1)
+			self.memory = shared_memory.SharedMemory(create=True, size=buckets * 2 * self.ENTRY_BYTES)
+			self.owner = True
+		else:
+			self.memory = shared_memory.SharedMemory(name)
+			# The creating process unlinks the memory; an attached one must not
+			resource_tracker.unregister(self.memory._name, 'shared_memory')
+			self.owner = False
+		self.size = self.memory.size // self.ENTRY_BYTES
+		self.mask = self.size // 2 - 1
+		self.words = self.memory.buf.cast('Q')
+		self.generation = 1
+		self.hits = 0
+
+	def __getstate__(self):
+		return {'name': self.memory.name, 'generation': self.generation}
+
+	def __setstate__(self, state):
+		self.__init__(name=state['name'])
+		self.generation = state['generation']
+
+	def close(self):
+		""" Detaches the table, and frees the shared memory if this process created it """
+		self.words.release()
+		self.memory.close()
+		if self.owner:
+			self.memory.unlink()
+
+	def newSearch(self):
+		""" Marks the entries stored so far as old, so the depth-preferred slots can be reused """
+		self.generation = self.generation % 255 + 1
+
+	def clear(self):
+		self.memory.buf[:] = bytes(self.memory.size)
+
+	def lookup(self, key):
+		""" Finds a position in the table
+
+			Args:
+				key: Zobrist hash of the position and side to move
+			Return:
+				entry: A tuple (depth, bound, score, move) or None. move is -1 if unknown
+		"""
+		words = self.words
+		idx = (key & self.mask) << 2
+		data = words[idx + 1]
+		if words[idx] ^ data != key or not data >> 40 & 0xFF:
+			idx += 2
+			data = words[idx + 1]
+			if words[idx] ^ data != key or not data >> 40 & 0xFF:
+				return None
+		self.hits += 1
+		score = data & 0xFFFFFFFF
+		if score >= 0x80000000:
+			score -= 0x100000000
+		move = data >> 48 & 0xFF
+		return data >> 32 & 0xFF, (data >> 40 & 0xFF) - 1, score, move if move != 0xFF else -1
+
+	def store(self, key, depth, bound, score, move):
+		""" Stores a search result
+
+			Args:
+				key: Zobrist hash of the position and side to move
+				depth: Depth the position was searched to
+				bound: EXACT, LOWER or UPPER
+				score: Score of the position for the side to move
+				move: Bit index of the best move, or -1
+		"""
+		words = self.words
+		idx = (key & self.mask) << 2
+		data = words[idx + 1]
+		# The bound is stored plus one, so an empty slot reads as no entry
+		if (words[idx] ^ data != key and data >> 32 & 0xFF > depth and data >> 56 == self.generation
+				and data >> 40 & 0xFF):
+			idx += 2
+		data = ((score & 0xFFFFFFFF) | depth << 32 | (bound + 1) << 40 | (move & 0xFF) << 48
+			| self.generation << 56)
+		words[idx] = key ^ data
+		words[idx + 1] = data
+
+
+def h_initHelper(table, stop, evaluator=None):
+	global _worker_searcher
+	_worker_searcher = LazyHelper(table, stop, evaluator)
+
+def h_helpSearch(task):
+	""" Searches the root position in a helper process until told to stop
+
+		Helpers fill the shared table for the main search. They differ from it and
+		from each other in the order of their root moves and, for every other
+		helper, by searching one ply deeper at each iteration, so they reach
+		different parts of the tree first.
+
+		Args:
+			task: A tuple (player_one, player_two, black, white, player, root moves, helper
+				number, deadline, max depth, table generation, weights)
+		Return:
+			nodes: Number of nodes searched
+	"""
+	player_one, player_two, black, white, player, moves, helper, deadline, max_depth, generation, weights = task
+	searcher = _worker_searcher
+	board = BitBoard(player_one, player_two)
+	board.black = black
+	board.white = white
+	board.hash_key = zobristHash(black, white)
+	searcher.board = board
+	searcher.state = GameState(player, board, {player_one: 'computer', player_two: 'computer'}, weights=weights)
+	searcher.deadline = deadline
+	searcher.nodes = 0
+	searcher.table.generation = generation
+	searcher.ordering.newSearch()
+	opp_player = searcher.h_oppPlayer(player)
+	shift = helper % len(moves)
+	moves = moves[shift:] + moves[:shift]
+	try:
+		for depth in range(1 + helper % 2, max_depth + 1):
+			searcher.iteration_best = None
+			searcher.h_searchRoot(depth, moves, player, opp_player)
+			moves.remove(searcher.iteration_best)
+			moves.insert(0, searcher.iteration_best)
+	except SearchTimeout:
+		pass
+	return searcher.nodes
+
+
+class LazyHelper(Searcher):
+	""" Searcher of a helper process, which also stops when the main search is done """
+
+	def __init__(self, table, stop, evaluator=None):
+		Searcher.__init__(self, tt_megabytes=0.001, evaluator=evaluator)
+		self.table = table
+		self.stop = stop
+
+	def h_timeUp(self):
+		return self.stop.value or time.time() > self.deadline
+
+
+class LazySearcher(Searcher):
+	""" Searcher whose workers all search the root through one shared transposition table
+
+		This is lazy SMP: the calling process runs the usual iterative deepening
+		and the helper processes search the same position at the same time,
+		storing what they find in a SharedTranspositionTable. The main search
+		then finds many of its positions already searched, so extra cores give
+		more depth in the same time. The helpers are stopped when the main search
+		returns. The book and the endgame solver are used as in Searcher.
+
+		Args:
+			helpers: Number of helper processes. Defaults to the number of cores minus one
+			time_limit, max_depth, tt_megabytes, searcher_args: As for Searcher; the
+				table is shared, in tt_megabytes of shared memory
+	"""
+
+	def __init__(self, helpers=None, time_limit=1.0, max_depth=60, tt_megabytes=16, **searcher_args):
+		# The private table of Searcher is replaced by the shared one
+		Searcher.__init__(self, time_limit, max_depth, 0.001, **searcher_args)
+		self.table = SharedTranspositionTable(tt_megabytes)
+		self.helpers = helpers if helpers is not None else max(1, multiprocessing.cpu_count() - 1)
+		self.stop = multiprocessing.Value('b', 0, lock=False)
+		self.pool = None
+
+	def close(self):
+		""" Stops the helper processes and frees the shared table """
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool.join()
+			self.pool = None
+		if self.table is not None:
+			self.table.close()
+			self.table = None
+
+	def h_deepen(self, moves, player, opp_player, start):
+		if self.pool is None and self.helpers:
+			self.pool = multiprocessing.Pool(self.helpers, h_initHelper, (self.table, self.stop, self.evaluator))
+		board = self.board
+		weights = self.state.getWeights()
+		self.stop.value = 0
+		pending = [self.pool.apply_async(h_helpSearch, ((board.player_one, board.player_two, board.black, board.white,
+			player, list(moves), helper + 1, self.deadline, self.max_depth, self.table.generation, weights),))
+			for helper in range(self.helpers)]
+		try:
+			best_move = Searcher.h_deepen(self, moves, player, opp_player, start)
+		finally:
+			self.stop.value = 1
+			for result in pending:
+				self.nodes += result.get()
+		return best_move
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+
+"""
+	This module contains a pattern-table evaluator: the discs on
+	the edges, the second lines, the corner regions and the
+	diagonals index precomputed tables, and a position is scored
+	by summing one table entry per line. The tables are fitted to
+	recorded games and kept in a compact binary file.
+
+	File: OthelloPattern.py
+"""
+
+import sys
+import array
+import struct
+import argparse
+from OthelloUtils import GameState, BitBoard, mirrorColumns
+from OthelloRecord import readGames, gamePositions
+
+# File layout: a header, then the tables of every stage, pattern by pattern, as int16
+HEADER = struct.Struct('<4sHBB')		# magic, version, stages, patterns
+MAGIC = b'OTHP'
+VERSION = 1
+
+DISC_SCORE = 100			# table units per disc of final differential
+STAGES = 4
+
+# Squares of every pattern, (row, col) in the order of the ternary digits, and of every
+# instance of it on the board. The instances are images of the first under the symmetries
+# of the board, so they share one table
+PATTERNS = ('edge', 'line2', 'corner', 'diagonal')
+INSTANCES = [
+	(0, [(1, col) for col in range(1, 9)]),
+	(0, [(8, col) for col in range(1, 9)]),
+	(0, [(row, 1) for row in range(1, 9)]),
+	(0, [(row, 8) for row in range(1, 9)]),
+	(1, [(2, col) for col in range(1, 9)]),
+	(1, [(7, col) for col in range(1, 9)]),
+	(1, [(row, 2) for row in range(1, 9)]),
+	(1, [(row, 7) for row in range(1, 9)]),
+	(2, [(row, col) for row in range(1, 4) for col in range(1, 4)]),
+	(2, [(row, 9 - col) for row in range(1, 4) for col in range(1, 4)]),
+	(2, [(9 - row, col) for row in range(1, 4) for col in range(1, 4)]),
+	(2, [(9 - row, 9 - col) for row in range(1, 4) for col in range(1, 4)]),
+	(3, [(n, n) for n in range(1, 9)]),
+	(3, [(n, 9 - n) for n in range(1, 9)]),
+]
+PATTERN_SIZES = [len([squares for pattern, squares in INSTANCES if pattern == index][0])
+	for index in range(len(PATTERNS))]
+
+# TERNARY[bits] is the base-3 number with a digit 1 for every bit set, so an index is
+# TERNARY[own bits] + 2 * TERNARY[opp bits]
+TERNARY = [sum(3 ** n for n in range(9) if bits >> n & 1) for bits in range(512)]
+TERNARY_OPP = [2 * value for value in TERNARY]
+
+_DIAGONAL = 0x8040201008040201
+_FILE_A = 0x0101010101010101
+_GATHER_FILE = 0x0102040810204080		# moves the bit of row n of file A to bit 56 + n
+
+
+def h_lines(x, xm):
+	""" Returns the bits of every instance, in the order of INSTANCES
+
+		Args:
+			x: A bitboard
+			xm: mirrorColumns(x)
+	"""
+	return (x & 0xFF, x >> 56,
+		(x & _FILE_A) * _GATHER_FILE >> 56 & 0xFF, (x >> 7 & _FILE_A) * _GATHER_FILE >> 56 & 0xFF,
+		x >> 8 & 0xFF, x >> 48 & 0xFF,
+		(x >> 1 & _FILE_A) * _GATHER_FILE >> 56 & 0xFF, (x >> 6 & _FILE_A) * _GATHER_FILE >> 56 & 0xFF,
+		(x & 7) | (x >> 5 & 0x38) | (x >> 10 & 0x1C0), (xm & 7) | (xm >> 5 & 0x38) | (xm >> 10 & 0x1C0),
+		(x >> 56 & 7) | (x >> 45 & 0x38) | (x >> 34 & 0x1C0), (xm >> 56 & 7) | (xm >> 45 & 0x38) | (xm >> 34 & 0x1C0),
+		(x & _DIAGONAL) * _FILE_A >> 56 & 0xFF, (xm & _DIAGONAL) * _FILE_A >> 56 & 0xFF)
+
+def patternIndices(own, opp):
+	""" Returns the table index of every instance, in the order of INSTANCES
+
+		Args:
+			own: bitboard of the side to move
+			opp: bitboard of the other side
+		Return:
+			indices: A tuple of ints
+	"""
+	ternary = TERNARY
+	ternary_opp = TERNARY_OPP
+	return tuple(ternary[a] + ternary_opp[b] for a, b in zip(h_lines(own, mirrorColumns(own)),
+		h_lines(opp, mirrorColumns(opp))))
+
+def stageOf(own, opp, stages=STAGES):
+	""" Returns the game stage of a position, from the number of discs """
+	return min(stages - 1, ((own | opp).bit_count() - 4) * stages // 61)
+
+def h_digits(index, size):
+	digits = []
+	for n in range(size):
+		digits.append(index % 3)
+		index //= 3
+	return digits
+
+def seedTables(weights=None, stages=STAGES):
+	""" Builds tables that score a position like GameState.SEF
+
+		Every square is worth its SEF weight, split between the instances covering
+		it, so the summed tables count each covered square once.
+
+		Args:
+			weights: A dict of GameState weights, or None for the class defaults
+			stages: Number of game stages
+		Return:
+			tables: A list per stage of a list per pattern of table values
+	"""
+	weights = weights or {}
+	w = {key: weights.get(key, getattr(GameState, key)) for key in GameState.WEIGHT_KEYS}
+	board = BitBoard('b', 'w')
+	coverage = {}
+	for pattern, squares in INSTANCES:
+		for position in squares:
+			coverage[position] = coverage.get(position, 0) + 1
+
+	def squareValue(position):
+		value = w['w_flip_num']
+		value += w['w_corner_num'] * (position in board.corners) + w['w_edge_num'] * (position in board.edges)
+		value += w['w_corner_adj_num'] * (position in board.corner_adj_positions)
+		return value / coverage[position]
+
+	tables = []
+	for index, size in enumerate(PATTERN_SIZES):
+		instances = [squares for pattern, squares in INSTANCES if pattern == index]
+		# Average over the instances, since the square lists are not all symmetric
+		digit_values = [sum(squareValue(squares[n]) for squares in instances) / len(instances) for n in range(size)]
+		table = []
+		for entry in range(3 ** size):
+			value = sum(digit_values[n] * (1 if digit == 1 else -1) for n, digit in enumerate(h_digits(entry, size))
+				if digit)
+			table.append(int(round(value)))
+		tables.append(table)
+	return [[list(table) for table in tables] for stage in range(stages)]
+
+def fitTables(positions, stages=STAGES, epochs=3, rate=0.002):
+	""" Fits tables to labelled positions by least squares, with stochastic gradient descent
+
+		Args:
+			positions: A list of (own, opp, target) with target the final disc
+				differential of the side to move
+			stages: Number of game stages
+			epochs: Passes over the positions
+			rate: Step size
+		Return:
+			tables: A list per stage of a list per pattern of table values
+	"""
+	patterns = [pattern for pattern, squares in INSTANCES]
+	samples = [(stageOf(own, opp, stages), patternIndices(own, opp), target * DISC_SCORE)
+		for own, opp, target in positions]
+	tables = [[[0.0] * 3 ** size for size in PATTERN_SIZES] for stage in range(stages)]
+	for epoch in range(epochs):
+		for stage, indices, target in samples:
+			stage_tables = tables[stage]
+			error = target - sum(stage_tables[pattern][index] for pattern, index in zip(patterns, indices))
+			step = rate * error
+			for pattern, index in zip(patterns, indices):
+				stage_tables[pattern][index] += step
+	return [[[max(-32768, min(32767, int(round(value)))) for value in table] for table in stage_tables]
+		for stage_tables in tables]
+
+def recordPositions(paths):
+	""" Returns the labelled positions of every game in some record files, for fitTables """
+	positions = []
+	for path in paths:
+		for game in readGames(path):
+			for own, opp, player, move in gamePositions(game):
+				opp_player = 'w' if player == 'b' else 'b'
+				positions.append((own, opp, game[player] - game[opp_player]))
+	return positions
+
+def writeTables(path, tables):
+	""" Writes a table file
+
+		Args:
+			path: File to write
+			tables: A list per stage of a list per pattern of table values
+	"""
+	with open(path, 'wb') as table_file:
+		table_file.write(HEADER.pack(MAGIC, VERSION, len(tables), len(PATTERNS)))
+		for stage_tables in tables:
+			for table in stage_tables:
+				values = array.array('h', table)
+				if sys.byteorder == 'big':
+					values.byteswap()
+				table_file.write(values.tobytes())
+
+def readTables(path):
+	""" Reads a table file written by writeTables
+
+		Raise:
+			ValueError if the file is not a table file of these patterns
+	"""
+	with open(path, 'rb') as table_file:
+		header = table_file.read(HEADER.size)
+		if len(header) != HEADER.size:
+			raise ValueError("{0} is not a pattern table file".format(path))
+		magic, version, stages, patterns = HEADER.unpack(header)
+		if magic != MAGIC or version != VERSION or patterns != len(PATTERNS):
+			raise ValueError("{0} is not a pattern table file".format(path))
+		tables = []
+		for stage in range(stages):
+			stage_tables = []
+			for size in PATTERN_SIZES:
+				values = array.array('h')
+				data = table_file.read(2 * 3 ** size)
+				if len(data) != 2 * 3 ** size:
+					raise ValueError("Truncated pattern table file")
+				values.frombytes(data)
+				if sys.byteorder == 'big':
+					values.byteswap()
+				stage_tables.append(values.tolist())
+			tables.append(stage_tables)
+	return tables
+
+
+class PatternEvaluator:
+	""" Scores positions by summing pattern table entries
+
+		It has the SEF(board, player) signature of GameState.SEF, so a Searcher
+		can use it in place of the state's evaluation.
+
+		Args:
+			path: A table file, or None
+			tables: Tables as returned by seedTables or fitTables, used if path is None;
+				seedTables() if both are None
+	"""
+
+	def __init__(self, path=None, tables=None):
+		if path is not None:
+			tables = readTables(path)
+		elif tables is None:
+			tables = seedTables()
+		self.stages = len(tables)
+		# One flat list of (table of each instance) per stage
+		self.tables = [[stage_tables[pattern] for pattern, squares in INSTANCES] for stage_tables in tables]
+
+	def evaluate(self, own, opp):
+		""" Returns the value of a position for the side to move
+
+			Args:
+				own: bitboard of the side to move
+				opp: bitboard of the other side
+		"""
+		t = self.tables[min(self.stages - 1, ((own | opp).bit_count() - 4) * self.stages // 61)]
+		a = h_lines(own, mirrorColumns(own))
+		b = h_lines(opp, mirrorColumns(opp))
+		T = TERNARY
+		U = TERNARY_OPP
+		# Unrolled, since this runs at every leaf of the search
+		return (t[0][T[a[0]] + U[b[0]]] + t[1][T[a[1]] + U[b[1]]] + t[2][T[a[2]] + U[b[2]]]
+			+ t[3][T[a[3]] + U[b[3]]] + t[4][T[a[4]] + U[b[4]]] + t[5][T[a[5]] + U[b[5]]]
+			+ t[6][T[a[6]] + U[b[6]]] + t[7][T[a[7]] + U[b[7]]] + t[8][T[a[8]] + U[b[8]]]
+			+ t[9][T[a[9]] + U[b[9]]] + t[10][T[a[10]] + U[b[10]]] + t[11][T[a[11]] + U[b[11]]]
+			+ t[12][T[a[12]] + U[b[12]]] + t[13][T[a[13]] + U[b[13]]])
+
+	def SEF(self, board, player):
+		""" Returns the value of a Board or BitBoard for player """
+		return self.evaluate(*board.getMasks(player))
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Builds Othello pattern tables from game records")
+	parser.add_argument('path', help="table file to write")
+	parser.add_argument('records', nargs='*', help="game record files to fit the tables to (default: seed the "
+		"tables from the SEF weights)")
+	parser.add_argument('--stages', type=int, default=STAGES, help="game stages with their own tables")
+	parser.add_argument('--epochs', type=int, default=3, help="passes over the positions")
+	args = parser.parse_args(argv)
+
+	if args.records:
+		positions = recordPositions(args.records)
+		tables = fitTables(positions, args.stages, args.epochs)
+		print("Fitted to {0} positions".format(len(positions)))
+	else:
+		tables = seedTables(stages=args.stages)
+	writeTables(args.path, tables)
+	print("{0} stages of {1} patterns written to {2}".format(len(tables), len(PATTERNS), args.path))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+"""
+	This module counts the leaf nodes of the game tree to a
+	fixed depth (perft), to check move generation against known
+	counts and to measure its speed.
+
+	File: OthelloPerft.py
+"""
+
+import sys
+import time
+import argparse
+from OthelloUtils import Board, BitBoard, legalMask, flipMask
+
+# Leaf counts from the starting position, indexed by depth. A pass counts as a ply
+# and a finished game as a leaf
+START_COUNTS = [1, 4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288]
+
+START = '-' * 27 + 'wb' + '-' * 6 + 'bw' + '-' * 27
+
+# (name, squares row by row, player to move, leaf counts from depth 1)
+POSITIONS = [
+	('start', START, 'b', START_COUNTS[1:]),
+	('opening', '----------b--------bw-----bww-----wbw----w-b----w--bw-----------', 'b',
+		[8, 63, 523, 4666, 42214]),
+	('early', '-------b------b--bbbbb----wbbb--wwwwbw----wwwb-----bb------b----', 'b',
+		[10, 121, 1167, 16004, 164708]),
+	('midgame', '--w-w-----wwww--bbw-wwww-wbbww--wbbbww--b-b-wb-----bbwb-------wb', 'b',
+		[11, 144, 1602, 20799, 239422]),
+	('late', '--www-w-wwwwww-b-wbbwwwbbbbwbbbbwbbwbb---w-wb---w-wwwb-----wwbb-', 'b',
+		[10, 92, 913, 7546, 71916]),
+	('endgame', 'wbbb--w-bwbbbwwb--wbwwwbwwwwbbwbwwwbbbbbwwwwwwbb-wwwwwwb--w-b-bw', 'b',
+		[10, 53, 372, 1747, 8604]),
+	('pass', 'bbbbbbbbbbbbbbbwbbbwwbwwbbbwbw-wbwwbwwwwbwwwwbw-b-wwwwbb----wbbb', 'w',
+		[1, 5, 11, 44, 85]),
+]
+
+BOARD_TYPES = {'board': Board, 'bitboard': BitBoard}
+
+
+def parsePosition(squares, board_type=BitBoard):
+	""" Builds a board from 64 characters, row by row: 'b', 'w' or '-' """
+	board = board_type('b', 'w')
+	for index, value in enumerate(squares):
+		if value != '-':
+			board.h_setPosition(value, (index // 8 + 1, index % 8 + 1))
+	return board
+
+def perft(board, player, depth, passed=False):
+	""" Counts the leaves of the game tree through the board interface
+
+		Moves come from getLegalMoves and are played and taken back with makeMove
+		and unmakeMove.
+
+		Args:
+			board: A Board or BitBoard
+			player: The player to move
+			depth: Plies to play
+			passed: The previous player had to pass
+		Return:
+			leaves: Number of positions depth plies away
+	"""
+	if depth == 0:
+		return 1
+	opp_player = board.opponent(player)
+	moves = board.getLegalMoves(player)
+	if not moves:
+		if passed:
+			return 1
+		return perft(board, opp_player, depth - 1, True)
+	if depth == 1:
+		return len(moves)
+	leaves = 0
+	for move in moves:
+		board.makeMove(player, move)
+		leaves += perft(board, opp_player, depth - 1)
+		board.unmakeMove()
+	return leaves
+
+def perftMasks(own, opp, depth, passed=False):
+	""" Counts the leaves of the game tree on plain bitboards, with no board object
+
+		Args:
+			own: bitboard of the side to move
+			opp: bitboard of the other side
+			depth: Plies to play
+			passed: The previous player had to pass
+		Return:
+			leaves: Number of positions depth plies away
+	"""
+	if depth == 0:
+		return 1
+	moves = legalMask(own, opp)
+	if not moves:
+		if passed:
+			return 1
+		return perftMasks(opp, own, depth - 1, True)
+	if depth == 1:
+		return moves.bit_count()
+	leaves = 0
+	while moves:
+		bit = moves & -moves
+		moves ^= bit
+		flips = flipMask(own, opp, bit.bit_length() - 1)
+		leaves += perftMasks(opp ^ flips, own | flips | bit, depth - 1)
+	return leaves
+
+def runPerft(squares, player, depth, engine='bitboard'):
+	""" Times one perft run
+
+		Args:
+			squares: A position as in POSITIONS
+			player: The player to move
+			depth: Plies to play
+			engine: 'board', 'bitboard' or 'masks'
+		Return:
+			(leaves, seconds): The leaf count and the time it took
+	"""
+	if engine == 'masks':
+		own, opp = parsePosition(squares).getMasks(player)
+		start = time.time()
+		leaves = perftMasks(own, opp, depth)
+		return leaves, time.time() - start
+	board = parsePosition(squares, BOARD_TYPES[engine])
+	start = time.time()
+	leaves = perft(board, player, depth)
+	return leaves, time.time() - start
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Counts Othello game tree leaves and checks them against known counts")
+	parser.add_argument('-d', '--depth', type=int, default=6, help="depth from the starting position")
+	parser.add_argument('--engine', choices=['board', 'bitboard', 'masks'], action='append',
+		help="move generator to run (default: all)")
+	parser.add_argument('--positions', action='store_true', help="also run the stored positions, to depth 5 at most")
+	args = parser.parse_args(argv)
+
+	engines = args.engine or ['board', 'bitboard', 'masks']
+	runs = [('start', START, 'b', depth, START_COUNTS[depth] if depth < len(START_COUNTS) else None)
+		for depth in range(1, args.depth + 1)]
+	if args.positions:
+		for name, squares, player, counts in POSITIONS[1:]:
+			depth = min(args.depth, len(counts))
+			runs.append((name, squares, player, depth, counts[depth - 1]))
+
+	failures = 0
+	for engine in engines:
+		for name, squares, player, depth, expected in runs:
+			leaves, seconds = runPerft(squares, player, depth, engine)
+			if expected is None:
+				status = '?'
+			elif leaves == expected:
+				status = 'ok'
+			else:
+				status = 'MISMATCH (expected {0})'.format(expected)
+				failures += 1
+			print("{0:8} {1:8} depth {2}: {3:9} leaves {4:8.3f}s {5:10.0f} leaves/s {6}".format(engine, name, depth,
+				leaves, seconds, leaves / seconds if seconds else 0.0, status))
+	return 1 if failures else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
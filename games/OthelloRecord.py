@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+"""
+	This module contains the binary game record format: a file
+	header, then one record per game with the players, their
+	weights, the result and one byte per move. Games are appended
+	one at a time and read back as a stream.
+
+	File: OthelloRecord.py
+"""
+
+import sys
+import struct
+import argparse
+from OthelloUtils import GameState, positionToSquare, squareToPosition, positionsToMask, flipMask
+
+# File layout: a header, then the games one after the other
+HEADER = struct.Struct('<4sH')			# magic, version
+RECORD = struct.Struct('<BBBBBB')		# name lengths, weight flags, disc counts, number of moves
+WEIGHTS = struct.Struct('<4f')
+MAGIC = b'OTHR'
+VERSION = 1
+
+PASS = 64			# move byte of a pass
+WEIGHT_KEYS = GameState.WEIGHT_KEYS
+
+START_BLACK = positionsToMask([(4, 5), (5, 4)])
+START_WHITE = positionsToMask([(4, 4), (5, 5)])
+
+
+def h_encodeName(name):
+	return (name or '').encode('utf-8')[:255]
+
+def encodeGame(game):
+	""" Packs one game into bytes
+
+		Args:
+			game: A dict with 'black' and 'white' (player names), 'weights' (a dict of
+				player to a dict of GameState weights, or None), 'b' and 'w' (final disc
+				counts) and 'moves' ((row, col) tuples, None for a pass)
+		Return:
+			data: The record
+	"""
+	black = h_encodeName(game.get('black'))
+	white = h_encodeName(game.get('white'))
+	weights = game.get('weights') or {}
+	flags = 0
+	packed_weights = b''
+	for bit, player in ((1, 'b'), (2, 'w')):
+		if weights.get(player):
+			flags |= bit
+			packed_weights += WEIGHTS.pack(*[weights[player][key] for key in WEIGHT_KEYS])
+	moves = bytes(PASS if move is None else positionToSquare(move) for move in game['moves'])
+	return (RECORD.pack(len(black), len(white), flags, game['b'], game['w'], len(moves)) + black + white
+		+ packed_weights + moves)
+
+def h_read(record_file, size):
+	data = record_file.read(size)
+	if len(data) != size:
+		raise ValueError("Truncated game record")
+	return data
+
+
+class GameWriter:
+	""" Appends games to a record file
+
+		The file header is written when the file is empty. Every game is flushed
+		once written, so an interrupted session loses at most the game being played.
+	"""
+
+	def __init__(self, path):
+		self.record_file = open(path, 'ab')
+		if self.record_file.tell() == 0:
+			self.record_file.write(HEADER.pack(MAGIC, VERSION))
+		self.games = 0
+
+	def write(self, game):
+		""" Appends one game, as described in encodeGame """
+		self.record_file.write(encodeGame(game))
+		self.record_file.flush()
+		self.games += 1
+
+	def close(self):
+		self.record_file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+
+def readGames(path):
+	""" Reads the games of a record file one at a time
+
+		Only one game is held in memory at a time, so files of any size can be
+		iterated.
+
+		Args:
+			path: File to read
+		Return:
+			games: A generator of dicts as described in encodeGame, with 'winner'
+				('b', 'w' or None for a draw) and 'plies' added
+	"""
+	with open(path, 'rb') as record_file:
+		header = record_file.read(HEADER.size)
+		if len(header) != HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION):
+			raise ValueError("{0} is not a game record file".format(path))
+		while True:
+			data = record_file.read(RECORD.size)
+			if not data:
+				return
+			if len(data) != RECORD.size:
+				raise ValueError("Truncated game record")
+			black_length, white_length, flags, black_num, white_num, move_count = RECORD.unpack(data)
+			names = h_read(record_file, black_length + white_length)
+			weights = {}
+			for bit, player in ((1, 'b'), (2, 'w')):
+				if flags & bit:
+					values = WEIGHTS.unpack(h_read(record_file, WEIGHTS.size))
+					weights[player] = dict(zip(WEIGHT_KEYS, values))
+			moves = [None if sq == PASS else squareToPosition(sq) for sq in h_read(record_file, move_count)]
+			if black_num > white_num:
+				winner = 'b'
+			elif white_num > black_num:
+				winner = 'w'
+			else:
+				winner = None
+			yield {'black': names[:black_length].decode('utf-8'), 'white': names[black_length:].decode('utf-8'),
+				'weights': weights or None, 'b': black_num, 'w': white_num, 'winner': winner, 'moves': moves,
+				'plies': len(moves)}
+
+def gamePositions(game):
+	""" Replays a game on plain bitboards
+
+		Args:
+			game: A dict with 'moves', as read by readGames
+		Return:
+			positions: A generator of (own, opp, player, move) before every move that is
+				not a pass, own being the bitboard of player ('b' or 'w') and move a
+				tuple (row, col)
+		Raise:
+			ValueError if the game has an illegal move
+	"""
+	own, opp = START_BLACK, START_WHITE
+	player, opp_player = 'b', 'w'
+	for move in game['moves']:
+		if move is not None:
+			yield own, opp, player, move
+			sq = positionToSquare(move)
+			flips = flipMask(own, opp, sq)
+			if not flips or (own | opp) >> sq & 1:
+				raise ValueError("Illegal move {0} in game record".format(move))
+			own |= flips | (1 << sq)
+			opp ^= flips
+		own, opp = opp, own
+		player, opp_player = opp_player, player
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Summarizes an Othello game record file")
+	parser.add_argument('path', help="record file to read")
+	parser.add_argument('--list', action='store_true', help="print every game")
+	args = parser.parse_args(argv)
+
+	games = 0
+	wins = {'b': 0, 'w': 0, None: 0}
+	plies = 0
+	for game in readGames(args.path):
+		games += 1
+		wins[game['winner']] += 1
+		plies += game['plies']
+		if args.list:
+			print("{0} vs {1}: {2}-{3} in {4} plies".format(game['black'], game['white'], game['b'], game['w'],
+				game['plies']))
+	print("{0} games, black wins {1}, white wins {2}, draws {3}, mean plies {4:.1f}".format(games, wins['b'],
+		wins['w'], wins[None], plies / games if games else 0.0))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,560 @@
+#!/usr/bin/env python
+
+"""
+	This module contains the game-tree search used by the
+	computer player.
+
+	File: OthelloSearch.py
+"""
+
+import time
+from array import array
+from OthelloUtils import BitBoard, FULL_MASK, legalMask, flipMask, squareToPosition, ZOBRIST_SIDE, canonicalKey, \
+	SQUARE_TRANSFORMS, INVERSE_TRANSFORMS
+
+INFINITY = 10 ** 9
+WIN_SCORE = 100000		# score of a finished game per disc of difference, above any SEF value
+
+# Bound types of a transposition table score
+EXACT = 0
+LOWER = 1		# the score is at least this value (fail high)
+UPPER = 2		# the score is at most this value (fail low)
+
+# Quadrant of every square, for the parity move ordering of the endgame solver
+_QUADRANTS = (0x000000000F0F0F0F, 0x00000000F0F0F0F0, 0x0F0F0F0F00000000, 0xF0F0F0F000000000)
+QUADRANT_OF = [[mask for mask in _QUADRANTS if mask >> sq & 1][0] for sq in range(64)]
+
+# Static value of every square for move ordering, from the square lists of Board.setUp:
+# corners first, then edges, then the other squares, then the squares next to a corner
+_SQUARES = BitBoard('b', 'w')
+SQUARE_VALUES = [3 if _SQUARES.corner_mask >> sq & 1 else -3 if _SQUARES.corner_adj_mask >> sq & 1
+	else 1 if _SQUARES.edge_mask >> sq & 1 else 0 for sq in range(64)]
+del _SQUARES
+MAX_PLY = 64
+
+
+class SearchTimeout(Exception):
+	""" Raised inside the search when the time budget has been used up """
+	pass
+
+
+class TranspositionTable:
+	""" Fixed-size table of searched positions, indexed by Zobrist hash
+
+		Every bucket has two slots. The first keeps the deepest result (unless it is
+		left over from an earlier search) and the second is always overwritten, so
+		recent positions are kept alongside expensive ones. The fields are held in
+		flat typed arrays allocated up front, so memory stays at the configured size
+		however long the table is used.
+	"""
+
+	ENTRY_BYTES = 16	# key 8, score 4, depth 1, bound 1, move 1, generation 1
+
+	def __init__(self, megabytes=16):
+		entries = max(2, int(megabytes * 1024 * 1024) // self.ENTRY_BYTES)
+		buckets = 1 << ((entries // 2).bit_length() - 1)
+		self.mask = buckets - 1
+		self.size = buckets * 2
+		self.keys = array('Q', bytes(8 * self.size))
+		self.scores = array('i', bytes(4 * self.size))
+		self.depths = array('b', bytes(self.size))
+		self.bounds = array('b', bytes(self.size))
+		self.moves = array('b', bytes(self.size))
+		self.generations = array('B', bytes(self.size))
+		self.generation = 1
+		self.hits = 0
+
+	def newSearch(self):
+		""" Marks the entries stored so far as old, so the depth-preferred slots can be reused """
+		self.generation = self.generation % 255 + 1
+
+	def clear(self):
+		for idx in range(self.size):
+			self.keys[idx] = 0
+			self.generations[idx] = 0
+
+	def lookup(self, key):
+		""" Finds a position in the table
+
+			Args:
+				key: Zobrist hash of the position and side to move
+			Return:
+				entry: A tuple (depth, bound, score, move) or None. move is -1 if unknown
+		"""
+		idx = (key & self.mask) << 1
+		if self.keys[idx] != key:
+			idx += 1
+			if self.keys[idx] != key:
+				return None
+		self.hits += 1
+		return self.depths[idx], self.bounds[idx], self.scores[idx], self.moves[idx]
+
+	def store(self, key, depth, bound, score, move):
+		""" Stores a search result
+
+			Args:
+				key: Zobrist hash of the position and side to move
+				depth: Depth the position was searched to
+				bound: EXACT, LOWER or UPPER
+				score: Score of the position for the side to move
+				move: Bit index of the best move, or -1
+		"""
+		idx = (key & self.mask) << 1
+		if self.keys[idx] != key and self.depths[idx] > depth and self.generations[idx] == self.generation:
+			idx += 1
+		self.keys[idx] = key
+		self.depths[idx] = depth
+		self.bounds[idx] = bound
+		self.scores[idx] = score
+		self.moves[idx] = move
+		self.generations[idx] = self.generation
+
+
+class EndgameSolver:
+	""" Exact solver of the final disc differential
+
+		It searches to the end of the game on plain bitboards, with no evaluation.
+		Moves are tried fastest-first (fewest replies for the opponent) while many
+		squares are empty, and squares in regions with an odd number of empties are
+		preferred (parity), which gives the last move in each region to the mover.
+	"""
+
+	def __init__(self, fastest_first_empties=4):
+		self.fastest_first_empties = fastest_first_empties
+		self.deadline = float('inf')
+		self.nodes = 0
+		self.bounds = {}		# (own, opp) -> (lower, upper) bounds of the disc differential
+
+	def solveRoot(self, own, opp, deadline=float('inf')):
+		""" Solves a position exactly
+
+			Args:
+				own: bitboard of the side to move
+				opp: bitboard of the other side
+				deadline: time.time() after which SearchTimeout is raised
+			Return:
+				(move, disc_diff): The bit index of the best move (None if the side to move
+					must pass) and the final disc differential with best play
+		"""
+		self.deadline = deadline
+		self.nodes = 0
+		self.bounds = {}
+		if not legalMask(own, opp):
+			return None, self.solve(own, opp, -64, 64)
+		best_move = None
+		alpha = -65
+		for order, sq, new_own, new_opp in self.h_children(own, opp, legalMask(own, opp)):
+			score = -self.solve(new_opp, new_own, -64, -alpha)
+			if score > alpha:
+				alpha = score
+				best_move = sq
+		return best_move, alpha
+
+	def solve(self, own, opp, alpha, beta, passed=False):
+		""" Negamax with alpha-beta pruning on the final disc differential
+
+			Args:
+				own: bitboard of the side to move
+				opp: bitboard of the other side
+				alpha: Lower bound of the window
+				beta: Upper bound of the window
+				passed: The previous player had to pass
+			Return:
+				disc_diff: Final disc differential for the side to move
+		"""
+		self.nodes += 1
+		if not self.nodes & 4095 and time.time() > self.deadline:
+			raise SearchTimeout()
+		empty = ~(own | opp) & FULL_MASK
+		if not empty & (empty - 1):
+			return self.h_solveLast(own, opp, empty)
+		moves = legalMask(own, opp)
+		if not moves:
+			if passed:
+				return own.bit_count() - opp.bit_count()
+			return -self.solve(opp, own, -beta, -alpha, True)
+
+		# Bounds of positions with many empties are remembered for the rest of the solve
+		cached = empty.bit_count() > self.fastest_first_empties
+		if cached:
+			key = (own, opp)
+			lower, upper = self.bounds.get(key, (-64, 64))
+			if lower >= beta or lower == upper:
+				return lower
+			if upper <= alpha:
+				return upper
+			alpha = max(alpha, lower)
+			beta = min(beta, upper)
+		alpha_orig = alpha
+
+		best = -65
+		for order, sq, new_own, new_opp in self.h_children(own, opp, moves):
+			score = -self.solve(new_opp, new_own, -beta, -alpha)
+			if score > best:
+				best = score
+				if score > alpha:
+					alpha = score
+					if alpha >= beta:
+						break
+
+		if cached:
+			if best <= alpha_orig:
+				upper = best
+			elif best >= beta:
+				lower = best
+			else:
+				lower = upper = best
+			self.bounds[key] = (lower, upper)
+		return best
+
+	def h_solveLast(self, own, opp, empty):
+		""" Final disc differential when at most one square is empty """
+		diff = own.bit_count() - opp.bit_count()
+		if not empty:
+			return diff
+		sq = empty.bit_length() - 1
+		flips = flipMask(own, opp, sq).bit_count()
+		if flips:
+			return diff + 2 * flips + 1
+		flips = flipMask(opp, own, sq).bit_count()
+		if flips:
+			return diff - 2 * flips - 1
+		return diff
+
+	def h_children(self, own, opp, moves):
+		""" Plays every move and returns (order, square, own, opp) tuples, best first """
+		empty = ~(own | opp) & FULL_MASK
+		fastest_first = empty.bit_count() > self.fastest_first_empties
+		children = []
+		while moves:
+			bit = moves & -moves
+			moves ^= bit
+			sq = bit.bit_length() - 1
+			flips = flipMask(own, opp, sq)
+			new_own = own | bit | flips
+			new_opp = opp ^ flips
+			# Even regions sort after odd ones
+			order = 1 - ((QUADRANT_OF[sq] & empty).bit_count() & 1)
+			if fastest_first:
+				order += 2 * legalMask(new_opp, new_own).bit_count()
+			children.append((order, sq, new_own, new_opp))
+		children.sort()
+		return children
+
+
+class MoveOrdering:
+	""" Orders the moves of the search, most likely to cause a cutoff first
+
+		The hash move of the transposition table goes first. The other moves are
+		sorted by static square value, then by killer bonus (the last two moves
+		that caused a cutoff at the same ply), then by history score (how often and
+		how deep they caused cutoffs). Each heuristic can be turned off, to
+		measure it.
+
+		Args:
+			killers: Use killer moves
+			history: Use the history table
+			static: Use the static square values
+	"""
+
+	# A step of square value outweighs the history scores and the killer bonuses, so
+	# a killer is not tried before a better class of square
+	HASH_SCORE = 1 << 40
+	STATIC_SCALE = 1 << 20
+	KILLER_SCORE = 1 << 18
+
+	def __init__(self, killers=True, history=True, static=True):
+		self.use_killers = killers
+		self.use_history = history
+		self.square_scores = [value * self.STATIC_SCALE if static else 0 for value in SQUARE_VALUES]
+		self.killers = [[-1, -1] for ply in range(MAX_PLY)]
+		self.history = [0] * 64
+
+	def newSearch(self):
+		""" Forgets the killer moves and ages the history scores, before searching a new position """
+		for killers in self.killers:
+			killers[0] = killers[1] = -1
+		self.history = [score >> 1 for score in self.history]
+
+	def order(self, moves, ply, hash_move=-1):
+		""" Returns the bit indices set in moves, best first
+
+			Args:
+				moves: A bitboard of legal moves
+				ply: Number of moves played on the board, which indexes the killer moves
+				hash_move: Bit index of the transposition table move, or -1
+			Return:
+				squares: A list of bit indices
+		"""
+		squares = []
+		while moves:
+			bit = moves & -moves
+			squares.append(bit.bit_length() - 1)
+			moves ^= bit
+		if len(squares) < 2:
+			return squares
+		square_scores = self.square_scores
+		if self.use_history:
+			history = self.history
+			scores = {sq: history[sq] + square_scores[sq] for sq in squares}
+		else:
+			scores = {sq: square_scores[sq] for sq in squares}
+		if self.use_killers and ply < MAX_PLY:
+			killers = self.killers[ply]
+			if killers[0] in scores:
+				scores[killers[0]] += 2 * self.KILLER_SCORE
+			if killers[1] in scores:
+				scores[killers[1]] += self.KILLER_SCORE
+		if hash_move in scores:
+			scores[hash_move] += self.HASH_SCORE
+		squares.sort(key=scores.__getitem__, reverse=True)
+		return squares
+
+	def cutoff(self, sq, ply, depth):
+		""" Records a move that caused a beta cutoff """
+		if ply < MAX_PLY:
+			killers = self.killers[ply]
+			if killers[0] != sq:
+				killers[1] = killers[0]
+				killers[0] = sq
+		self.history[sq] += depth * depth
+
+
+class Searcher:
+	""" Negamax search with alpha-beta pruning and iterative deepening
+
+		Leaves are scored with GameState.SEF, or the SEF of the evaluator if one is
+		given, from the point of view of the player to move. Every iteration
+		searches one ply deeper than the previous one, starting with the previous
+		best move, and when the time budget runs out the best move found so far
+		is returned.
+	"""
+
+	def __init__(self, time_limit=1.0, max_depth=60, tt_megabytes=16, book=None, book_plies=20, endgame_empties=12,
+		symmetry_empties=50, ordering=None, evaluator=None):
+		self.time_limit = time_limit
+		self.max_depth = max_depth
+		self.table = TranspositionTable(tt_megabytes)
+		self.solver = EndgameSolver()
+		self.ordering = ordering if ordering is not None else MoveOrdering()		# a MoveOrdering, or any object with its methods
+		self.endgame_empties = endgame_empties		# solve exactly from this many empty squares
+		self.solved = False
+		# Positions with at least this many empty squares share table entries with their symmetries
+		self.symmetry_empties = symmetry_empties
+		self.evaluator = evaluator		# an object with a SEF(board, player) method used instead of the state's
+		self.book = book				# an OthelloBook.OpeningBook, consulted before searching
+		self.book_plies = book_plies
+		self.book_hit = False
+		self.nodes = 0
+		self.depth_reached = 0
+		self.score = 0
+
+	def search(self, state):
+		""" Finds the best move for the player to move
+
+			The moves are played and taken back on the board with makeSquare and
+			unmakeMove. A BitBoard is searched in place and left as it was found;
+			other boards are converted to a BitBoard first.
+
+			Args:
+				state: A GameState
+			Return:
+				move: A tuple (row, col), or None if the player has no legal moves
+		"""
+		self.state = state
+		if isinstance(state.board, BitBoard):
+			self.board = state.board
+		else:
+			self.board = BitBoard.fromBoard(state.board)
+		self.nodes = 0
+		self.depth_reached = 0
+		self.book_hit = False
+		self.solved = False
+		self.table.newSearch()
+		self.ordering.newSearch()
+		start = time.time()
+		self.deadline = start + self.time_limit
+
+		player = state.turn
+		opp_player = self.h_oppPlayer(player)
+		moves = self.ordering.order(self.board.getLegalMask(player), len(self.board.undo_stack))
+		if not moves:
+			return None
+		best_move = moves[0]
+		empties = self.board.get_no_of_spaces()
+
+		if self.book is not None and 60 - empties < self.book_plies:
+			position = self.book.lookup(self.board, player)
+			if position is not None:
+				self.book_hit = True
+				state.setMinimaxMove(position)
+				return position
+
+		if len(moves) > 1 and empties <= self.endgame_empties:
+			# The solver gets most of the budget; if it runs out the search below uses the rest
+			own, opp = self.board.getMasks(player)
+			try:
+				best_move, disc_diff = self.solver.solveRoot(own, opp, start + self.time_limit * 0.75)
+				self.solved = True
+				self.score = disc_diff * WIN_SCORE
+				self.depth_reached = empties
+			except SearchTimeout:
+				pass
+			self.nodes += self.solver.nodes
+
+		if len(moves) > 1 and not self.solved:
+			best_move = self.h_deepen(moves, player, opp_player, time.time())
+
+		position = squareToPosition(best_move)
+		state.setMinimaxMove(position)
+		return position
+
+	def h_deepen(self, moves, player, opp_player, start):
+		""" Iterative deepening over the root moves
+
+			Args:
+				moves: Bit indices of the root moves, the most promising first
+				player: The player to move
+				opp_player: The other player
+				start: time.time() at the start of the deepening; it gets the time from
+					there to the deadline
+			Return:
+				move: The bit index of the best move found
+		"""
+		root_ply = len(self.board.undo_stack)
+		empties = self.board.get_no_of_spaces()
+		best_move = moves[0]
+		for depth in range(1, self.max_depth + 1):
+			self.iteration_best = None
+			try:
+				score = self.h_searchRoot(depth, moves, player, opp_player)
+			except SearchTimeout:
+				while len(self.board.undo_stack) > root_ply:
+					self.board.unmakeMove()
+				# A root move that finished at this depth beat every move searched before it
+				if self.iteration_best is not None:
+					best_move = self.iteration_best
+				break
+			best_move = self.iteration_best
+			self.depth_reached = depth
+			self.score = score
+			moves.remove(best_move)
+			moves.insert(0, best_move)
+			# The next iteration takes several times longer than this one
+			if depth >= empties or time.time() - start > (self.deadline - start) / 2:
+				break
+		return best_move
+
+	def h_timeUp(self):
+		""" Tells whether the search must stop, checked every 1024 nodes """
+		return time.time() > self.deadline
+
+	def h_oppPlayer(self, player):
+		if player == self.board.player_one:
+			return self.board.player_two
+		return self.board.player_one
+
+	def h_searchRoot(self, depth, moves, player, opp_player):
+		""" Searches every root move to the given depth and returns the best score """
+		board = self.board
+		alpha = -INFINITY
+		for sq in moves:
+			board.makeSquare(player, sq)
+			score = -self.h_negamax(depth - 1, -INFINITY, -alpha, opp_player, player)
+			board.unmakeMove()
+			if score > alpha:
+				alpha = score
+				self.iteration_best = sq
+		own, opp = board.getMasks(player)
+		key, transform = self.h_key(own, opp, player)
+		self.table.store(key, depth, EXACT, alpha, SQUARE_TRANSFORMS[transform][self.iteration_best])
+		return alpha
+
+	def h_key(self, own, opp, player):
+		""" Returns the table key of a position and the transform of its moves in the table
+
+			Opening positions are keyed by their canonical form, so the symmetries of
+			a position share one entry, and their moves are stored in the canonical
+			frame. Canonicalizing costs about as much as searching a node, and
+			symmetric positions are rare after the opening, so later positions use
+			the Zobrist key and transform 0, which leaves moves as they are.
+		"""
+		board = self.board
+		if 64 - (own | opp).bit_count() >= self.symmetry_empties:
+			return canonicalKey(own, opp)
+		return (board.hash_key if player == board.player_one else board.hash_key ^ ZOBRIST_SIDE), 0
+
+	def h_negamax(self, depth, alpha, beta, player, opp_player):
+		""" Negamax with alpha-beta pruning
+
+			Args:
+				depth: Remaining depth in plies
+				alpha: Lower bound of the window
+				beta: Upper bound of the window
+				player: The player to move
+				opp_player: The other player
+			Return:
+				score: The value of the position for the player to move
+		"""
+		self.nodes += 1
+		if not self.nodes & 1023 and self.h_timeUp():
+			raise SearchTimeout()
+
+		board = self.board
+		if depth == 0:
+			if self.evaluator is not None:
+				return self.evaluator.SEF(board, player)
+			return self.state.SEF(board, player)
+
+		own, opp = board.getMasks(player)
+		key, transform = self.h_key(own, opp, player)
+		hash_move = -1
+		entry = self.table.lookup(key)
+		if entry is not None:
+			entry_depth, bound, score, hash_move = entry
+			if transform and hash_move >= 0:
+				hash_move = SQUARE_TRANSFORMS[INVERSE_TRANSFORMS[transform]][hash_move]
+			if entry_depth >= depth:
+				if bound == EXACT:
+					return score
+				if bound == LOWER and score >= beta:
+					return score
+				if bound == UPPER and score <= alpha:
+					return score
+
+		moves = legalMask(own, opp)
+		if not moves:
+			if not legalMask(opp, own):
+				return (own.bit_count() - opp.bit_count()) * WIN_SCORE
+			# The player passes, which does not use up depth
+			return -self.h_negamax(depth, -beta, -alpha, opp_player, player)
+
+		ply = len(board.undo_stack)
+		squares = self.ordering.order(moves, ply, hash_move)
+
+		alpha_orig = alpha
+		best = -INFINITY
+		best_move = -1
+		for sq in squares:
+			board.makeSquare(player, sq)
+			score = -self.h_negamax(depth - 1, -beta, -alpha, opp_player, player)
+			board.unmakeMove()
+			if score > best:
+				best = score
+				best_move = sq
+				if score > alpha:
+					alpha = score
+					if alpha >= beta:
+						self.ordering.cutoff(sq, ply, depth)
+						break
+
+		if best <= alpha_orig:
+			bound = UPPER
+		elif best >= beta:
+			bound = LOWER
+		else:
+			bound = EXACT
+		if transform:
+			best_move = SQUARE_TRANSFORMS[transform][best_move]
+		self.table.store(key, depth, bound, best, best_move)
+		return best
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+
+"""
+	This module plays complete games between computer players
+	without any console output, for regression testing and
+	tuning.
+
+	File: OthelloSim.py
+"""
+
+import sys
+import time
+import random
+import argparse
+from OthelloUtils import GameState, BitBoard
+from OthelloSearch import Searcher
+from OthelloMCTS import MonteCarloSearcher
+import OthelloStats
+from OthelloRecord import GameWriter, WEIGHT_KEYS
+
+# Representation of the players on the board, as in the game classes
+PLAYER_BLACK = 'b'
+PLAYER_WHITE = 'w'
+
+SELECTION = {PLAYER_BLACK: 'computer', PLAYER_WHITE: 'computer'}
+
+
+class RandomPlayer:
+	""" Plays a random legal move """
+
+	name = 'random'
+
+	def __init__(self, seed=None):
+		self.rng = random.Random(seed)
+
+	def getMove(self, state):
+		return self.rng.choice(state.next_moves)
+
+
+class GreedyPlayer:
+	""" Plays the move with the best SEF after one ply. Ties are broken at random """
+
+	name = 'greedy'
+
+	def __init__(self, seed=None, weights=None):
+		self.rng = random.Random(seed)
+		self.weights = weights
+
+	def getMove(self, state):
+		state = h_weightedState(state, self.weights)
+		board = state.board
+		best_moves = []
+		best = None
+		for move in state.next_moves:
+			board.makeMove(state.turn, move)
+			score = state.SEF(board, state.turn)
+			board.unmakeMove()
+			if best is None or score > best:
+				best = score
+				best_moves = [move]
+			elif score == best:
+				best_moves.append(move)
+		return self.rng.choice(best_moves)
+
+
+class SearchPlayer:
+	""" Plays the move found by an alpha-beta Searcher """
+
+	name = 'search'
+
+	def __init__(self, time_limit=1.0, max_depth=60, weights=None, **searcher_args):
+		self.searcher = Searcher(time_limit, max_depth, **searcher_args)
+		self.weights = weights
+
+	def getMove(self, state):
+		return self.searcher.search(h_weightedState(state, self.weights))
+
+
+class MCTSPlayer:
+	""" Plays the move found by a MonteCarloSearcher, reusing its tree between moves """
+
+	name = 'mcts'
+
+	def __init__(self, time_limit=1.0, playouts=None, seed=None, **searcher_args):
+		self.searcher = MonteCarloSearcher(time_limit, playouts, seed=seed, **searcher_args)
+
+	def getMove(self, state):
+		return self.searcher.search(state)
+
+
+PLAYERS = {'random': RandomPlayer, 'greedy': GreedyPlayer, 'search': SearchPlayer, 'mcts': MCTSPlayer}
+
+
+def h_weightedState(state, weights):
+	""" Returns state, or a copy of it whose SEF uses the given weights """
+	if not weights:
+		return state
+	return GameState(state.turn, state.board, state.player_selection, weights=weights)
+
+
+def newBoard(board_type=BitBoard):
+	""" Returns a board set up with the four starting pieces """
+	board = board_type(PLAYER_BLACK, PLAYER_WHITE)
+	board.h_setPosition(PLAYER_WHITE, (4, 4))
+	board.h_setPosition(PLAYER_WHITE, (5, 5))
+	board.h_setPosition(PLAYER_BLACK, (4, 5))
+	board.h_setPosition(PLAYER_BLACK, (5, 4))
+	return board
+
+def randomOpening(plies, seed=None):
+	""" Returns a list of random legal moves from the starting position, to vary games """
+	rng = random.Random(seed)
+	board = newBoard()
+	turn = PLAYER_BLACK
+	moves = []
+	for n in range(plies):
+		legal_moves = board.getLegalMoves(turn)
+		if not legal_moves:
+			break
+		move = rng.choice(legal_moves)
+		board.makeMove(turn, move)
+		moves.append(move)
+		turn = board.opponent(turn)
+	return moves
+
+def playGame(black_player, white_player, board_type=BitBoard, opening=None):
+	""" Plays one complete game
+
+		Args:
+			black_player: An object with a getMove(state) method, plays first
+			white_player: An object with a getMove(state) method
+			board_type: Board class to play on
+			opening: A list of moves from randomOpening to play before the players take over
+		Return:
+			result: A dict with the winner ('b', 'w' or None for a draw), the final
+				number of pieces of each player, the moves played (None for a pass),
+				and the plies, passes and time taken
+		Raise:
+			ValueError if a player returns an illegal move
+	"""
+	board = newBoard(board_type)
+	players = {PLAYER_BLACK: black_player, PLAYER_WHITE: white_player}
+	turn = PLAYER_BLACK
+	moves = []
+	for move in opening or []:
+		board.makeMove(turn, move)
+		moves.append(move)
+		turn = board.opponent(turn)
+	start = time.time()
+	while True:
+		state = GameState(turn, board, SELECTION)
+		opp_player = board.opponent(turn)
+		if not state.next_moves:
+			if not board.getLegalMoves(opp_player):
+				break
+			moves.append(None)
+			turn = opp_player
+			continue
+		move = players[turn].getMove(state)
+		if move not in state.next_moves:
+			raise ValueError("Player {0} played an illegal move {1}".format(turn, move))
+		board.makeMove(turn, move)
+		moves.append(move)
+		turn = opp_player
+
+	black_num = board.getNoOfFlippedPieces(PLAYER_BLACK)
+	white_num = board.getNoOfFlippedPieces(PLAYER_WHITE)
+	if black_num > white_num:
+		winner = PLAYER_BLACK
+	elif white_num > black_num:
+		winner = PLAYER_WHITE
+	else:
+		winner = None
+	return {'winner': winner, PLAYER_BLACK: black_num, PLAYER_WHITE: white_num, 'moves': moves,
+		'plies': len(moves), 'passes': moves.count(None), 'time': time.time() - start}
+
+def gameRecord(result, black_player, white_player):
+	""" Returns a playGame result as a game for OthelloRecord.GameWriter """
+	weights = {}
+	for colour, player in ((PLAYER_BLACK, black_player), (PLAYER_WHITE, white_player)):
+		if hasattr(player, 'weights'):
+			weights[colour] = {key: (player.weights or {}).get(key, getattr(GameState, key)) for key in WEIGHT_KEYS}
+	return {'black': black_player.name, 'white': white_player.name, 'weights': weights, 'b': result[PLAYER_BLACK],
+		'w': result[PLAYER_WHITE], 'moves': result['moves']}
+
+def simulate(games, first_player, second_player, alternate=True, board_type=BitBoard, writer=None):
+	""" Plays a number of games between two players
+
+		Args:
+			games: Number of games to play
+			first_player: Plays black in the first game
+			second_player: Plays white in the first game
+			alternate: Swap colours after every game
+			board_type: Board class to play on
+			writer: An OthelloRecord.GameWriter that every game is appended to
+		Return:
+			results: A list of playGame results, each with a 'first' key telling whether
+				first_player had black
+	"""
+	results = []
+	for n in range(games):
+		first_is_black = not alternate or n % 2 == 0
+		if first_is_black:
+			black_player, white_player = first_player, second_player
+		else:
+			black_player, white_player = second_player, first_player
+		result = playGame(black_player, white_player, board_type)
+		if writer is not None:
+			writer.write(gameRecord(result, black_player, white_player))
+		result['first'] = PLAYER_BLACK if first_is_black else PLAYER_WHITE
+		results.append(result)
+	return results
+
+def summarize(results):
+	""" Aggregates simulate results from the point of view of the first player
+
+		Return:
+			summary: A dict with wins, draws, losses, the mean disc differential,
+				the mean number of plies and the games played per second
+	"""
+	summary = {'games': len(results), 'wins': 0, 'draws': 0, 'losses': 0}
+	disc_diff = 0
+	plies = 0
+	elapsed = 0.0
+	for result in results:
+		first = result['first']
+		second = PLAYER_WHITE if first == PLAYER_BLACK else PLAYER_BLACK
+		if result['winner'] is None:
+			summary['draws'] += 1
+		elif result['winner'] == first:
+			summary['wins'] += 1
+		else:
+			summary['losses'] += 1
+		disc_diff += result[first] - result[second]
+		plies += result['plies']
+		elapsed += result['time']
+	games = max(len(results), 1)
+	summary['disc_diff'] = disc_diff / games
+	summary['plies'] = plies / games
+	summary['games_per_second'] = len(results) / elapsed if elapsed else 0.0
+	return summary
+
+def makePlayer(name, seed=None, time_limit=1.0, max_depth=60, playouts=None):
+	""" Creates a player from its name in PLAYERS """
+	if name == 'search':
+		return SearchPlayer(time_limit, max_depth)
+	if name == 'mcts':
+		return MCTSPlayer(time_limit, playouts, seed)
+	return PLAYERS[name](seed)
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Plays Othello games between computer players")
+	parser.add_argument('-n', '--games', type=int, default=100, help="number of games to play")
+	parser.add_argument('--first', choices=sorted(PLAYERS), default='random', help="player taking black in the first game")
+	parser.add_argument('--second', choices=sorted(PLAYERS), default='random', help="the other player")
+	parser.add_argument('--depth', type=int, default=60, help="maximum depth of search players")
+	parser.add_argument('--time', type=float, default=1.0, help="seconds per move of search and mcts players")
+	parser.add_argument('--playouts', type=int, default=None, help="playouts per move of mcts players")
+	parser.add_argument('--seed', type=int, default=None, help="seed of the random and greedy players")
+	parser.add_argument('--same-colours', action='store_true', help="do not swap colours between games")
+	parser.add_argument('--record', metavar='PATH', help="append every game to a game record file")
+	parser.add_argument('--stats', type=float, nargs='?', const=0, default=None, metavar='SECONDS',
+		help="count move generation, SEF calls, nodes and TT hits, optionally reporting every SECONDS")
+	args = parser.parse_args(argv)
+
+	seed = args.seed
+	first = makePlayer(args.first, seed, args.time, args.depth, args.playouts)
+	second = makePlayer(args.second, None if seed is None else seed + 1, args.time, args.depth, args.playouts)
+	if args.stats is not None:
+		OthelloStats.enable(args.stats or None, print)
+	writer = GameWriter(args.record) if args.record else None
+	start = time.time()
+	try:
+		results = simulate(args.games, first, second, not args.same_colours, writer=writer)
+	finally:
+		if writer is not None:
+			writer.close()
+	summary = summarize(results)
+	counters = OthelloStats.disable()
+	print("{0} vs {1}: {2} games in {3:.1f}s".format(args.first, args.second, summary['games'], time.time() - start))
+	print("wins {0} draws {1} losses {2}, mean disc differential {3:+.2f}, mean plies {4:.1f}, {5:.0f} games/s".format(
+		summary['wins'], summary['draws'], summary['losses'], summary['disc_diff'], summary['plies'],
+		summary['games_per_second']))
+	for name, player in ((args.first, first), (args.second, second)):
+		if isinstance(player, MCTSPlayer):
+			searcher = player.searcher
+			print("{0}: {1} playouts, {2:.0f} playouts/s".format(name, searcher.total_playouts,
+				searcher.total_playouts / searcher.total_time if searcher.total_time else 0.0))
+	if counters is not None:
+		print(counters.report())
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
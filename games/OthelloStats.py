@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+"""
+	This module contains opt-in instrumentation: call counters
+	and timers for move generation, flips, SEF calls, searched
+	nodes and transposition table hits.
+
+	File: OthelloStats.py
+"""
+
+import time
+import logging
+import functools
+import threading
+import OthelloUtils
+import OthelloSearch
+import OthelloMCTS
+from OthelloUtils import GameState, Board, BitBoard
+from OthelloSearch import Searcher, TranspositionTable
+from OthelloParallel import SharedTranspositionTable
+from OthelloPattern import PatternEvaluator
+
+
+class Stats:
+	""" Counters and timers filled in while instrumentation is enabled
+
+		counts maps a counter name to the number of calls (or nodes, or hits) and
+		seconds maps it to the time spent in the calls, for the timed counters.
+	"""
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		self.counts = {}
+		self.seconds = {}
+		self.start = time.time()
+
+	def count(self, name, number=1):
+		self.counts[name] = self.counts.get(name, 0) + number
+
+	def snapshot(self):
+		""" Returns a dict of counter name to (count, seconds, count per second of wall time) """
+		elapsed = max(time.time() - self.start, 1e-9)
+		# The report timer runs this while the search adds counters; copying a dict is
+		# a single step for the interpreter, so the copies are consistent
+		counts = dict(self.counts)
+		seconds = dict(self.seconds)
+		return {name: (number, seconds.get(name, 0.0), number / elapsed) for name, number in counts.items()}
+
+	def report(self):
+		""" Returns the counters as a text table """
+		lines = ["{0:.1f}s since reset".format(time.time() - self.start)]
+		for name, (number, seconds, rate) in sorted(self.snapshot().items()):
+			line = "{0:16} {1:12} {2:12.0f}/s".format(name, number, rate)
+			if name in self.seconds:
+				line += " {0:9.3f}s in calls".format(seconds)
+			lines.append(line)
+		return "\n".join(lines)
+
+
+# (class, method, counter) of every instrumented method; calls of the timed ones are also timed
+_METHODS = [
+	(Board, 'getLegalMoves', 'move_generation'),
+	(Board, 'h_flips', 'flips'),
+	(Board, 'makeMove', 'moves_played'),
+	(BitBoard, 'makeSquare', 'moves_played'),
+	(GameState, 'SEF', 'sef'),
+	(PatternEvaluator, 'SEF', 'sef'),
+]
+# (module, function, counter) of every instrumented function. The bitboard move generation
+# is counted here, since BitBoard, the searchers and the playouts all call these functions
+# through the names their modules imported
+_FUNCTIONS = [(module, function, name) for module in (OthelloUtils, OthelloSearch, OthelloMCTS)
+	for function, name in (('legalMask', 'move_generation'), ('flipMask', 'flips'))]
+_TIMED = ('move_generation', 'flips', 'sef')
+
+stats = None			# the Stats being filled in, None while disabled
+_originals = []			# (class, method name, function) replaced by enable
+_reporter = None
+
+
+def h_counted(function, name):
+	timed = name in _TIMED
+
+	@functools.wraps(function)
+	def wrapper(*args, **kwargs):
+		if not timed:
+			stats.count(name)
+			return function(*args, **kwargs)
+		start = time.perf_counter()
+		try:
+			return function(*args, **kwargs)
+		finally:
+			stats.seconds[name] = stats.seconds.get(name, 0.0) + time.perf_counter() - start
+			stats.count(name)
+	return wrapper
+
+def h_lookup(function):
+	@functools.wraps(function)
+	def wrapper(self, key):
+		entry = function(self, key)
+		stats.count('tt_probes')
+		if entry is not None:
+			stats.count('tt_hits')
+		return entry
+	return wrapper
+
+def h_search(function):
+	@functools.wraps(function)
+	def wrapper(self, state):
+		start = time.perf_counter()
+		try:
+			return function(self, state)
+		finally:
+			stats.seconds['searches'] = stats.seconds.get('searches', 0.0) + time.perf_counter() - start
+			stats.count('searches')
+			stats.count('nodes', self.nodes)
+	return wrapper
+
+def h_report(interval, output):
+	global _reporter
+	# disable() may clear stats from the main thread at any time
+	current = stats
+	if current is None:
+		return
+	output(current.report())
+	_reporter = threading.Timer(interval, h_report, (interval, output))
+	_reporter.daemon = True
+	_reporter.start()
+
+def enable(interval=None, output=logging.info):
+	""" Starts counting
+
+		The instrumented methods and functions are wrapped in place, so nothing
+		is counted, and nothing is paid, while instrumentation is disabled.
+
+		Args:
+			interval: Seconds between reports passed to output, or None for no reports
+			output: A function taking the report text
+		Return:
+			stats: The Stats that the counts go to
+	"""
+	global stats, _reporter
+	if stats is not None:
+		disable()
+	stats = Stats()
+	for cls, method, name in _METHODS:
+		_originals.append((cls, method, cls.__dict__[method]))
+		setattr(cls, method, h_counted(cls.__dict__[method], name))
+	for module, function, name in _FUNCTIONS:
+		_originals.append((module, function, getattr(module, function)))
+		setattr(module, function, h_counted(getattr(module, function), name))
+	for cls in (TranspositionTable, SharedTranspositionTable):
+		_originals.append((cls, 'lookup', cls.__dict__['lookup']))
+		cls.lookup = h_lookup(cls.__dict__['lookup'])
+	_originals.append((Searcher, 'search', Searcher.__dict__['search']))
+	Searcher.search = h_search(Searcher.__dict__['search'])
+	if interval:
+		_reporter = threading.Timer(interval, h_report, (interval, output))
+		_reporter.daemon = True
+		_reporter.start()
+	return stats
+
+def disable():
+	""" Stops counting and puts the original methods and functions back
+
+		Return:
+			stats: The Stats filled in since enable, or None if it was not enabled
+	"""
+	global stats, _reporter
+	if _reporter is not None:
+		_reporter.cancel()
+		_reporter = None
+	while _originals:
+		owner, name, function = _originals.pop()
+		setattr(owner, name, function)
+	finished = stats
+	stats = None
+	return finished
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+"""
+	This module runs round-robin matches between engine
+	configurations on a pool of worker processes.
+
+	File: OthelloTournament.py
+"""
+
+import sys
+import math
+import time
+import argparse
+import itertools
+import multiprocessing
+from OthelloSim import PLAYER_BLACK, PLAYER_WHITE, RandomPlayer, GreedyPlayer, SearchPlayer, MCTSPlayer, playGame, randomOpening
+from OthelloBook import OpeningBook
+from OthelloPattern import PatternEvaluator
+
+# Opening books and pattern evaluators of this process, by path. They are only read, so
+# every engine made here shares them instead of mapping and loading the files per game
+_books = {}
+_evaluators = {}
+
+
+def h_book(path):
+	if path not in _books:
+		_books[path] = OpeningBook(path)
+	return _books[path]
+
+def h_evaluator(path):
+	if path not in _evaluators:
+		_evaluators[path] = PatternEvaluator(path)
+	return _evaluators[path]
+
+def makeEngine(config, seed=None):
+	""" Creates a player from an engine configuration
+
+		Args:
+			config: A dict with 'player' ('random', 'greedy', 'search' or 'mcts') and optionally
+				'depth', 'time', 'tt_megabytes', 'weights' (a dict of GameState weights),
+				'book' (the path of an opening book), 'patterns' (the path of an OthelloPattern
+				table file) and 'playouts' (per move, for mcts). The book and tables are
+				opened once per process and shared by the engines made from them
+			seed: Seed of the random and greedy players
+		Return:
+			player: An object with a getMove(state) method
+	"""
+	player = config.get('player', 'search')
+	if player == 'random':
+		return RandomPlayer(seed)
+	if player == 'greedy':
+		return GreedyPlayer(seed, config.get('weights'))
+	if player == 'search':
+		book = h_book(config['book']) if config.get('book') else None
+		evaluator = h_evaluator(config['patterns']) if config.get('patterns') else None
+		return SearchPlayer(config.get('time', 1.0), config.get('depth', 60), config.get('weights'),
+			tt_megabytes=config.get('tt_megabytes', 4), book=book, evaluator=evaluator)
+	if player == 'mcts':
+		return MCTSPlayer(config.get('time', 1.0), config.get('playouts'), seed)
+	raise ValueError("Unknown player {0}".format(player))
+
+def h_playTask(task):
+	""" Plays one tournament game in a worker process
+
+		Args:
+			task: A tuple (first name, first config, second name, second config, first plays black,
+				opening plies, seed)
+		Return:
+			outcome: A tuple (first name, second name, first's score (1, 0.5 or 0), first's disc
+				differential, plies)
+	"""
+	first_name, first_config, second_name, second_config, first_is_black, opening_plies, seed = task
+	first = makeEngine(first_config, seed)
+	second = makeEngine(second_config, seed + 1)
+	opening = randomOpening(opening_plies, seed)
+	if first_is_black:
+		result = playGame(first, second, opening=opening)
+		first_colour, second_colour = PLAYER_BLACK, PLAYER_WHITE
+	else:
+		result = playGame(second, first, opening=opening)
+		first_colour, second_colour = PLAYER_WHITE, PLAYER_BLACK
+	if result['winner'] is None:
+		score = 0.5
+	elif result['winner'] == first_colour:
+		score = 1.0
+	else:
+		score = 0.0
+	return first_name, second_name, score, result[first_colour] - result[second_colour], result['plies']
+
+def h_elo(score):
+	""" Elo difference that corresponds to an expected score """
+	score = min(max(score, 1e-6), 1 - 1e-6)
+	return -400.0 * math.log10(1.0 / score - 1.0)
+
+def eloEstimate(wins, draws, losses, z=1.96):
+	""" Estimates an Elo difference from match results
+
+		The interval is the Wilson interval of the score, which stays wide when
+		one side scores 0% or 100% of a small match.
+
+		Args:
+			wins, draws, losses: Results of the player being rated
+			z: Normal quantile of the confidence interval; 1.96 gives 95%
+		Return:
+			(elo, low, high): The estimate and its confidence interval
+	"""
+	games = wins + draws + losses
+	if games == 0:
+		return 0.0, -float('inf'), float('inf')
+	score = (wins + 0.5 * draws) / games
+	spread = z * z / games
+	centre = (score + spread / 2) / (1 + spread)
+	margin = z * math.sqrt(score * (1 - score) / games + spread / (4 * games)) / (1 + spread)
+	return h_elo(score), h_elo(centre - margin), h_elo(centre + margin)
+
+def h_newRecord():
+	return {'games': 0, 'wins': 0, 'draws': 0, 'losses': 0, 'disc_diff': 0, 'plies': 0}
+
+def h_addOutcome(record, score, disc_diff, plies):
+	record['games'] += 1
+	if score == 1.0:
+		record['wins'] += 1
+	elif score == 0.5:
+		record['draws'] += 1
+	else:
+		record['losses'] += 1
+	record['disc_diff'] += disc_diff
+	record['plies'] += plies
+
+def runTournament(engines, games_per_pair=100, processes=None, opening_plies=4, seed=0):
+	""" Plays a round robin between engine configurations
+
+		Every pair of engines plays games_per_pair games. Games come in pairs that
+		start from the same random opening with the colours swapped.
+
+		Args:
+			engines: A dict of engine name to makeEngine configuration
+			games_per_pair: Number of games between every two engines
+			processes: Number of worker processes. Defaults to the number of cores
+			opening_plies: Random moves played before the engines take over
+			seed: Seed of the openings and of the random players
+		Return:
+			report: A dict with 'pairs', mapping (first, second) to the first engine's
+				results, and 'engines', mapping a name to its results against the field.
+				Results hold games, wins, draws, losses, mean disc_diff, mean plies and
+				elo with its 95% confidence interval elo_low and elo_high
+	"""
+	tasks = []
+	for first_name, second_name in itertools.combinations(sorted(engines), 2):
+		for n in range(games_per_pair):
+			game_seed = seed + (n // 2) * 2
+			tasks.append((first_name, engines[first_name], second_name, engines[second_name], n % 2 == 0,
+				opening_plies, game_seed))
+
+	pairs = {}
+	totals = {name: h_newRecord() for name in engines}
+	pool = multiprocessing.Pool(processes)
+	try:
+		chunksize = max(1, len(tasks) // (4 * (processes or multiprocessing.cpu_count())))
+		for first_name, second_name, score, disc_diff, plies in pool.imap_unordered(h_playTask, tasks, chunksize):
+			record = pairs.setdefault((first_name, second_name), h_newRecord())
+			h_addOutcome(record, score, disc_diff, plies)
+			h_addOutcome(totals[first_name], score, disc_diff, plies)
+			h_addOutcome(totals[second_name], 1.0 - score, -disc_diff, plies)
+	finally:
+		pool.close()
+		pool.join()
+
+	for record in itertools.chain(pairs.values(), totals.values()):
+		games = max(record['games'], 1)
+		record['disc_diff'] = record['disc_diff'] / games
+		record['plies'] = record['plies'] / games
+		record['elo'], record['elo_low'], record['elo_high'] = eloEstimate(record['wins'], record['draws'], record['losses'])
+	return {'pairs': pairs, 'engines': totals}
+
+def parseEngine(spec):
+	""" Parses an engine given as name:key=value,key=value
+
+		The keys player, depth, time, tt_megabytes, book, patterns and playouts set the configuration and
+		w_* keys set GameState weights, e.g. d4:player=search,depth=4,w_corner_num=800
+	"""
+	name, _, options = spec.partition(':')
+	config = {'player': 'search'}
+	weights = {}
+	for option in filter(None, options.split(',')):
+		key, _, value = option.partition('=')
+		if key.startswith('w_'):
+			weights[key] = float(value)
+		elif key in ('player', 'book', 'patterns'):
+			config[key] = value
+		elif key in ('depth', 'playouts'):
+			config[key] = int(value)
+		elif key in ('time', 'tt_megabytes'):
+			config[key] = float(value)
+		else:
+			raise ValueError("Unknown engine option {0}".format(key))
+	if weights:
+		config['weights'] = weights
+	return name, config
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Plays a round robin between Othello engines on all cores")
+	parser.add_argument('-e', '--engine', action='append', required=True,
+		help="engine as name:key=value,... (keys: player, depth, time, tt_megabytes, book, patterns, playouts, w_*)")
+	parser.add_argument('-n', '--games', type=int, default=100, help="games per pair of engines")
+	parser.add_argument('-j', '--processes', type=int, default=None, help="worker processes (default: all cores)")
+	parser.add_argument('--opening-plies', type=int, default=4, help="random moves at the start of every game")
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args(argv)
+
+	engines = dict(parseEngine(spec) for spec in args.engine)
+	if len(engines) < 2:
+		parser.error("at least two engines are needed")
+	start = time.time()
+	report = runTournament(engines, args.games, args.processes, args.opening_plies, args.seed)
+	print("{0} games in {1:.1f}s".format(sum(r['games'] for r in report['pairs'].values()), time.time() - start))
+	for (first_name, second_name), record in sorted(report['pairs'].items()):
+		print("{0} vs {1}: +{2} ={3} -{4}, discs {5:+.2f}, elo {6:+.0f} [{7:+.0f}, {8:+.0f}]".format(first_name,
+			second_name, record['wins'], record['draws'], record['losses'], record['disc_diff'], record['elo'],
+			record['elo_low'], record['elo_high']))
+	for name, record in sorted(report['engines'].items(), key=lambda item: -item[1]['elo']):
+		print("{0}: +{1} ={2} -{3}, discs {4:+.2f}, elo vs field {5:+.0f} [{6:+.0f}, {7:+.0f}]".format(name,
+			record['wins'], record['draws'], record['losses'], record['disc_diff'], record['elo'], record['elo_low'],
+			record['elo_high']))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+"""
+	This module tunes the SEF weights of GameState: positions
+	labelled with the final result are generated by self-play
+	on all cores, the weights are fitted to the whole dataset
+	at once with NumPy, and the tuned weights are checked in a
+	match against the current ones.
+
+	File: OthelloTune.py
+"""
+
+import sys
+import argparse
+import multiprocessing
+import numpy as np
+from OthelloUtils import GameState
+from OthelloBatch import BoardBatch
+from OthelloRecord import readGames, gamePositions
+from OthelloSim import PLAYER_BLACK, PLAYER_WHITE, playGame, randomOpening
+from OthelloTournament import makeEngine, parseEngine, runTournament
+
+DISC_SCORE = 100			# SEF units per disc of final differential, for least squares
+LOGIT_SCALE = 1000			# SEF units per unit of log-odds of winning, for logistic regression
+
+
+def h_positions(game, positions):
+	""" Appends (black, white, black to move, final black minus white discs) for every position of a game """
+	result = game[PLAYER_BLACK] - game[PLAYER_WHITE]
+	for own, opp, player, move in gamePositions(game):
+		if player == PLAYER_BLACK:
+			positions.append((own, opp, True, result))
+		else:
+			positions.append((opp, own, False, result))
+
+def h_selfPlayTask(task):
+	""" Plays self-play games in a worker process
+
+		Args:
+			task: A tuple (engine configuration, number of games, random opening plies, seed)
+		Return:
+			positions: A list of tuples as made by h_positions
+	"""
+	config, games, opening_plies, seed = task
+	positions = []
+	for n in range(games):
+		engine = makeEngine(config, seed + n)
+		result = playGame(engine, engine, opening=randomOpening(opening_plies, seed + n))
+		h_positions(result, positions)
+	return positions
+
+def h_arrays(positions):
+	black, white, black_to_move, result = zip(*positions) if positions else ((), (), (), ())
+	return (np.array(black, dtype=np.uint64), np.array(white, dtype=np.uint64), np.array(black_to_move, dtype=bool),
+		np.array(result, dtype=np.int64))
+
+def generatePositions(games, config=None, processes=None, opening_plies=8, seed=0, games_per_task=4):
+	""" Generates labelled positions from self-play games played in parallel
+
+		Args:
+			games: Number of games to play
+			config: makeEngine configuration of both players. Defaults to a depth 2 search
+			processes: Number of worker processes. Defaults to the number of cores
+			opening_plies: Random moves at the start of every game, for variety
+			seed: Seed of the openings
+			games_per_task: Games played by a worker per task
+		Return:
+			(black, white, black_to_move, result): NumPy arrays, one element per position,
+				result being the final black minus white disc count of its game
+	"""
+	config = config or {'player': 'search', 'depth': 2, 'time': float('inf')}
+	tasks = [(config, min(games_per_task, games - start), opening_plies, seed + start)
+		for start in range(0, games, games_per_task)]
+	positions = []
+	pool = multiprocessing.Pool(processes)
+	try:
+		for task_positions in pool.imap_unordered(h_selfPlayTask, tasks):
+			positions.extend(task_positions)
+	finally:
+		pool.close()
+		pool.join()
+	return h_arrays(positions)
+
+def recordPositions(paths):
+	""" Reads labelled positions from game record files, as returned by generatePositions """
+	positions = []
+	for path in paths:
+		for game in readGames(path):
+			h_positions(game, positions)
+	return h_arrays(positions)
+
+def featureMatrix(black, white, black_to_move):
+	""" Returns the SEF features of every position, side to move minus other side, shape (N, 4) """
+	return BoardBatch(black, white, black_to_move).featureDifferences().astype(np.float64)
+
+def fitLeastSquares(features, disc_diff):
+	""" Fits the weights that best predict the final disc differential
+
+		Args:
+			features: Array of shape (N, 4) from featureMatrix
+			disc_diff: Final disc differential of the side to move, shape (N,)
+		Return:
+			weights: A dict of GameState weights, in SEF units of DISC_SCORE per disc
+	"""
+	solution = np.linalg.lstsq(features, disc_diff.astype(np.float64) * DISC_SCORE, rcond=None)[0]
+	return dict(zip(GameState.WEIGHT_KEYS, solution.tolist()))
+
+def fitLogistic(features, outcome, iterations=25, l2=1e-3):
+	""" Fits the weights that best predict the result, by Newton's method on the log loss
+
+		Args:
+			features: Array of shape (N, 4) from featureMatrix
+			outcome: 1 for a win, 0.5 for a draw and 0 for a loss of the side to move, shape (N,)
+			iterations: Newton steps
+			l2: Ridge penalty, which keeps the fit finite when a feature separates the results
+		Return:
+			weights: A dict of GameState weights, in SEF units of LOGIT_SCALE per unit of log-odds
+	"""
+	count, size = features.shape
+	coefficients = np.zeros(size)
+	penalty = l2 * count * np.eye(size)
+	for n in range(iterations):
+		probability = 1.0 / (1.0 + np.exp(-(features @ coefficients)))
+		gradient = features.T @ (probability - outcome) + penalty @ coefficients
+		hessian = (features * (probability * (1.0 - probability))[:, None]).T @ features + penalty
+		step = np.linalg.solve(hessian, gradient)
+		coefficients -= step
+		if np.abs(step).max() < 1e-9:
+			break
+	return dict(zip(GameState.WEIGHT_KEYS, (coefficients * LOGIT_SCALE).tolist()))
+
+def tune(black, white, black_to_move, result, method='lstsq'):
+	""" Fits GameState weights to labelled positions
+
+		Args:
+			black, white, black_to_move, result: Arrays as returned by generatePositions
+			method: 'lstsq' to predict the disc differential, 'logistic' to predict the result
+		Return:
+			weights: A dict of GameState weights
+	"""
+	features = featureMatrix(black, white, black_to_move)
+	disc_diff = np.where(black_to_move, result, -result)
+	if method == 'lstsq':
+		return fitLeastSquares(features, disc_diff)
+	if method == 'logistic':
+		return fitLogistic(features, (np.sign(disc_diff) + 1) / 2.0)
+	raise ValueError("Unknown method {0}".format(method))
+
+def validate(weights, games=100, depth=3, processes=None, seed=0):
+	""" Plays the tuned weights against the current GameState weights on all cores
+
+		Return:
+			record: The results of the tuned weights, as in runTournament
+	"""
+	engines = {'current': {'player': 'search', 'depth': depth, 'time': float('inf')},
+		'tuned': {'player': 'search', 'depth': depth, 'time': float('inf'), 'weights': weights}}
+	return runTournament(engines, games, processes, seed=seed)['engines']['tuned']
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Tunes the Othello SEF weights")
+	parser.add_argument('-n', '--games', type=int, default=200, help="self-play games to generate positions from")
+	parser.add_argument('-j', '--processes', type=int, default=None, help="worker processes (default: all cores)")
+	parser.add_argument('-e', '--engine', default='selfplay:depth=2',
+		help="self-play engine as name:key=value,... as in OthelloTournament")
+	parser.add_argument('--records', nargs='+', metavar='PATH', help="fit to game record files instead of self-play")
+	parser.add_argument('--method', choices=['lstsq', 'logistic'], default='lstsq')
+	parser.add_argument('--validate', type=int, default=100, metavar='GAMES',
+		help="games of the tuned weights against the current ones (0 to skip)")
+	parser.add_argument('--depth', type=int, default=3, help="search depth of the validation games")
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args(argv)
+
+	if args.records:
+		data = recordPositions(args.records)
+	else:
+		data = generatePositions(args.games, parseEngine(args.engine)[1], args.processes, seed=args.seed)
+	weights = tune(*data, method=args.method)
+	print("Fitted to {0} positions".format(len(data[0])))
+	print(','.join("{0}={1:.0f}".format(key, value) for key, value in weights.items()))
+	if args.validate:
+		record = validate(weights, args.validate, args.depth, args.processes, args.seed)
+		print("tuned vs current: +{0} ={1} -{2}, discs {3:+.2f}, elo {4:+.0f} [{5:+.0f}, {6:+.0f}]".format(
+			record['wins'], record['draws'], record['losses'], record['disc_diff'], record['elo'],
+			record['elo_low'], record['elo_high']))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -10,106 +10,292 @@
 """
 
 import copy
+import random
+
+class SEFWeight:
+	""" A SEF weight of GameState
+
+		Read from the class it is the default weight; read from a state it is the
+		weight of that state, which changeWeights can set apart from the default.
+	"""
+
+	def __init__(self, index, default):
+		self.index = index			# position of the weight in GameState.sef_weights
+		self.default = default
+
+	def __set_name__(self, owner, name):
+		self.name = name
+
+	def __get__(self, state, owner=None):
+		if state is None:
+			return self.default
+		return state.sef_weights[self.index]
+
+	def __set__(self, state, value):
+		state.changeWeights({self.name: value})
+
+
+# Legal moves by (hash key of the position, player to move), shared by every GameState
+MOVE_CACHE_SIZE = 1 << 16
+_move_cache = {}
+
 
 class GameState:
-	""" State object """
+	""" State object
+
+		States are made at every node of a search, so they have no __dict__ and find
+		their legal moves only when next_moves is first read. The moves are those of
+		the board at that time.
+	"""
 
+	__slots__ = ('board', 'turn', '_next_moves', 'computer_move', 'player_selection', 'who_plays_now', 'minimax',
+		'minimax_move', 'sef_weights')
 
 	# Global weights for SEF
 	
-	w_flip_num = 2				# weight attached to the number of flipped pieces
-	w_corner_num = 1000 		# weight attached to the number of corner held by a player
-	w_edge_num = 30				# weight attached to the number of edges held by a player
-	w_corner_adj_num = -100		# weight attached to the corner adjacent positions held by the player
+	w_flip_num = SEFWeight(0, 2)				# weight attached to the number of flipped pieces
+	w_corner_num = SEFWeight(1, 1000)			# weight attached to the number of corner held by a player
+	w_edge_num = SEFWeight(2, 30)				# weight attached to the number of edges held by a player
+	w_corner_adj_num = SEFWeight(3, -100)		# weight attached to the corner adjacent positions held by the player
 	#w_empty_adj_num = 20		# weight attached to the empty spaces related to the number
+	WEIGHT_KEYS = ('w_flip_num', 'w_corner_num', 'w_edge_num', 'w_corner_adj_num')
+	DEFAULT_WEIGHTS = (w_flip_num.default, w_corner_num.default, w_edge_num.default, w_corner_adj_num.default)
 
 	def __init__(self, player, board, player_selection, minimax=False, weights=None):
 		self.board = board
 		self.turn = player
-		self.next_moves = self.board.getLegalMoves(self.turn)
+		self._next_moves = None
 		self.computer_move = None
 		self.player_selection = player_selection
 		self.who_plays_now = player_selection[self.turn]
-		if minimax:
-			self.setMinimaxMove('stuff')
+		self.minimax = minimax
+		self.minimax_move = None
+		self.sef_weights = self.DEFAULT_WEIGHTS
 		if weights:
 			self.changeWeights(weights)
-		
 
-	def SEF(self, board):
+	@property
+	def next_moves(self):
+		""" The legal moves of the player to move, looked up in the move cache first """
+		if self._next_moves is None:
+			key = (self.board.getHashKey(self.turn), self.turn)
+			moves = _move_cache.get(key)
+			if moves is None:
+				if len(_move_cache) >= MOVE_CACHE_SIZE:
+					_move_cache.clear()
+				moves = _move_cache[key] = tuple(self.board.getLegalMoves(self.turn))
+			self._next_moves = list(moves)
+		return self._next_moves
+
+	@next_moves.setter
+	def next_moves(self, moves):
+		self._next_moves = moves
+
+	def SEF(self, board=None, player=None):
 		""" This computes the SEF for a particular board from the following values
 
+		The features of the opposing player are subtracted from those of the player, so
+		the value is zero-sum and can be negated from one side to the other in a search.
+
 		Args:
-			board: A gameboard
+			board: A gameboard. Defaults to the board of this state
+			player: The player to evaluate for. Defaults to the player to move
 		Return:
 			utility: A value that indicates how good the position is
 		"""
-		flip_num = self.board.getNoOfFlippedPieces(self.turn)
-		corner_num = self.board.getNoOfCornerPieces(self.turn)
-		edge_num = self.board.getNoOfEdgePieces(self.turn)
-		corner_adj_num = self.board.getNoOfCornerAdjacentPieces(self.turn)
-		#empty_adj_num = self.board.getNoOfEmptyAdjNum(self.turn)
-
-		return (w_flip_num * flip_num) + (w_corner_num * corner_num) + (w_edge_num * edge_num) + (w_corner_adj_num * corner_adj_num) 
+		if board is None:
+			board = self.board
+		if player is None:
+			player = self.turn
+		opp_player = board.player_two if player == board.player_one else board.player_one
+		flip_num, corner_num, edge_num, corner_adj_num = board.getFeatureCounts(player)
+		opp_flip_num, opp_corner_num, opp_edge_num, opp_corner_adj_num = board.getFeatureCounts(opp_player)
+		#empty_adj_num = board.getNoOfEmptyAdjNum(player)
+		w_flip_num, w_corner_num, w_edge_num, w_corner_adj_num = self.sef_weights
+
+		return (w_flip_num * (flip_num - opp_flip_num) + w_corner_num * (corner_num - opp_corner_num)
+			+ w_edge_num * (edge_num - opp_edge_num) + w_corner_adj_num * (corner_adj_num - opp_corner_adj_num))
 
 	def setMinimaxMove(self, move):
-		self.minmax_move = move
+		self.minimax_move = move
 
 	def setPlayerSelection(self, p_player):
 		self.player_selection = {}
 
-	def changeWeights(weights):
-		for key, value in weights.items():
-			if key == 'w_corner_num':
-				w_corner_num = value
-			elif key == 'w_edge_num':
-				w_edge_num = value
-			elif key == 'w_flip_num':
-				w_flip_num = value
-			elif key == 'w_corner_adj_num':
-				w_corner_adj_num = value
+	def getWeights(self):
+		""" Returns the SEF weights of this state as a dict """
+		return dict(zip(self.WEIGHT_KEYS, self.sef_weights))
 
+	def changeWeights(self, weights):
+		""" Sets SEF weights for this state only; the class weights stay the defaults
 
-class Board:    
+			Weights are rounded to integers, so that SEF values fit the integer scores
+			of the transposition table.
 
-	# Gameboard: A board of 8 x 8 squares
-	# The board has two extra rows and columns to make checking for bounds
-	gameboard = [['-' for n in range(10)] for n in range(10)]
+			Args:
+				weights: A dict of weight name (one of WEIGHT_KEYS) to value
+			Raise:
+				ValueError if a weight name is unknown
+		"""
+		sef_weights = list(self.sef_weights)
+		for key, value in weights.items():
+			if key not in self.WEIGHT_KEYS:
+				raise ValueError("Unknown weight {0}".format(key))
+			sef_weights[self.WEIGHT_KEYS.index(key)] = int(round(value))
+		self.sef_weights = tuple(sef_weights)
+
+
+# The eight directions of a ray, as (row step, col step)
+RAY_DIRECTIONS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+def h_ray(position, direction):
+	row, col = position
+	drow, dcol = direction
+	return tuple((row + i * drow, col + i * dcol) for i in range(1, 8)
+		if 1 <= row + i * drow <= 8 and 1 <= col + i * dcol <= 8)
+
+# RAYS[(row, col)] holds the squares of the board along every direction from a square,
+# nearest first. Rays of less than two squares can hold neither a move nor a flip, so
+# they are left out
+RAYS = {(row, col): tuple(ray for ray in (h_ray((row, col), direction) for direction in RAY_DIRECTIONS)
+	if len(ray) > 1) for row in range(1, 9) for col in range(1, 9)}
+
+# NEIGHBOURS[(row, col)] holds the squares of the board next to a square
+NEIGHBOURS = {(row, col): tuple((row + drow, col + dcol) for drow, dcol in RAY_DIRECTIONS
+	if 1 <= row + drow <= 8 and 1 <= col + dcol <= 8) for row in range(1, 9) for col in range(1, 9)}
+
+
+# Mailbox layout of Board: (row, col) is byte row * 10 + col of a 10 x 10 board whose
+# outer ring is a border. The tables below are indexed by those bytes
+EMPTY, BORDER = 0, 3
+MAILBOX_EMPTY = bytes(BORDER if row in (0, 9) or col in (0, 9) else EMPTY for row in range(10) for col in range(10))
+MAILBOX_SQUARES = [(row - 1) * 8 + col - 1 if (row, col) in RAYS else -1 for row in range(10) for col in range(10)]
+MAILBOX_RAYS = [tuple(tuple(r * 10 + c for r, c in ray) for ray in RAYS.get((row, col), ()))
+	for row in range(10) for col in range(10)]
+MAILBOX_NEIGHBOURS = [tuple(r * 10 + c for r, c in NEIGHBOURS.get((row, col), ())) for row in range(10) for col in range(10)]
+
+
+class Board:
+	""" A Board backend that keeps the squares in a 100-byte mailbox
+
+		Every byte holds EMPTY, 1 for a piece of player_one, 2 for a piece of player_two
+		or BORDER, and each side is also kept as a 64-bit integer for the piece counts
+		and keys. The rest of the state is a few ints and the frontier, so a board is
+		small and copy() is a handful of buffer copies. gameboard, black_curr_pos and
+		white_curr_pos are built from the buffers when read.
+	"""
+
+	__slots__ = ('squares', 'black', 'white', 'hash_key', 'undo_stack', 'frontier', 'neighbour_counts', 'player_one',
+		'player_two')
+
+	validpositions = [(row,col) for row in range(1, 9) for col in range(1, 9)]
+	edges = [(3, 1), (4, 1), (5, 1), (6, 1) , (8, 1),
+		(1, 3),(1, 4), (1, 5), (1, 6), (3, 8), (4, 8), (5, 8), 
+		(6, 8), (8, 3), (8, 4), (8, 5), (8, 6)]
+	corners = [(1, 1),(8, 8), (8, 1), (1, 8)]
+	corner_adj_positions = [(1, 2), (2, 1), (2, 2), (1, 7), (2, 7), (2, 8), (7, 1),
+		(8, 2), (7, 2), (7, 8), (8, 7), (7, 7)]
+	edge_mask = sum(1 << (row - 1) * 8 + col - 1 for row, col in edges)
+	corner_mask = sum(1 << (row - 1) * 8 + col - 1 for row, col in corners)
+	corner_adj_mask = sum(1 << (row - 1) * 8 + col - 1 for row, col in corner_adj_positions)
 
 	def __init__(self, player_one, player_two):
 		self.setUp(player_one, player_two)
 
 	def setUp(self, player_one, player_two):
 		""" Initial setup script"""
-		for row, value in enumerate(self.gameboard):
-			value[0] = "*"
-			value[-1] = "*"
-		self.gameboard[0] = ["*" for n in range(len(self.gameboard[0]))]
-		self.gameboard[-1] = ["*" for n in range(len(self.gameboard[-1]))]
-		self.white_curr_pos = []
-		self.black_curr_pos = []
-		self.validpositions = [(row,col) for row in range(1, 9) for col in range(1, 9)]
-		self.edges = [(3, 1), (4, 1), (5, 1), (6, 1) , (8, 1),
-			(1, 3),(1, 4), (1, 5), (1, 6), (3, 8), (4, 8), (5, 8), 
-			(6, 8), (8, 3), (8, 4), (8, 5), (8, 6)]
-		self.corners = [(1, 1),(8, 8), (8, 1), (1, 8)]
-		self.corner_adj_positions = [(1, 2), (2, 1), (2, 2), (1, 7), (2, 7), (2, 8), (7, 1),
-			(8, 2), (7, 2), (7, 8), (8, 7), (7, 7)]
+		self.squares = bytearray(MAILBOX_EMPTY)
+		self.black = 0
+		self.white = 0
+		self.hash_key = 0			# Zobrist hash of the pieces, kept up to date by h_setPosition and removePiece
+		self.undo_stack = []		# (player, square, flipped squares, previous hash) of every move played with makeMove
+		# The frontier is the set of empty squares next to a piece, the only squares a move
+		# can be played on. It is kept up to date from the number of pieces next to every square
+		self.frontier = set()
+		self.neighbour_counts = bytearray(100)
 		self.player_one = player_one
 		self.player_two = player_two
 
+	def copy(self):
+		""" Returns an independent copy of the board, undo records included """
+		board = Board.__new__(Board)
+		board.squares = bytearray(self.squares)
+		board.black = self.black
+		board.white = self.white
+		board.hash_key = self.hash_key
+		board.undo_stack = list(self.undo_stack)
+		board.frontier = set(self.frontier)
+		board.neighbour_counts = bytearray(self.neighbour_counts)
+		board.player_one = self.player_one
+		board.player_two = self.player_two
+		return board
+
+	def __deepcopy__(self, memo):
+		return self.copy()
+
+	def h_code(self, player):
+		""" Returns the byte of a player's pieces, or EMPTY for an unknown player """
+		if player == self.player_one:
+			return 1
+		if player == self.player_two:
+			return 2
+		return EMPTY
+
 	def h_setPosition(self, player, position):
 		""" Helper function for to actually place the player on the board
 
+			A piece of the other player on the square is replaced.
+
 			Args:
 				player: A character indicating the colour of the player  
-			position: A tuple indicating the particular cell to place the player in
+				position: A tuple indicating the particular cell to place the player in
 		"""
-		self.gameboard[position[0]][position[1]] = player
-		if player == self.player_one:
-			self.black_curr_pos.append((position[0],position[1]))
-		elif player == self.player_two:
-			self.white_curr_pos.append((position[0],position[1]))
+		code = self.h_code(player)
+		index = position[0] * 10 + position[1]
+		previous = self.squares[index]
+		if not code or previous == code:
+			return
+		sq = MAILBOX_SQUARES[index]
+		bit = 1 << sq
+		if previous == EMPTY:
+			self.h_occupy(index)
+		else:
+			self.h_clearBit(previous, bit, sq)
+		self.squares[index] = code
+		if code == 1:
+			self.black |= bit
+			self.hash_key ^= ZOBRIST_KEYS[0][sq]
+		else:
+			self.white |= bit
+			self.hash_key ^= ZOBRIST_KEYS[1][sq]
+
+	def h_clearBit(self, code, bit, sq):
+		if code == 1:
+			self.black &= ~bit
+			self.hash_key ^= ZOBRIST_KEYS[0][sq]
+		else:
+			self.white &= ~bit
+			self.hash_key ^= ZOBRIST_KEYS[1][sq]
+
+	def h_occupy(self, index):
+		""" Updates the frontier for a piece placed on the empty square index """
+		squares = self.squares
+		counts = self.neighbour_counts
+		self.frontier.discard(index)
+		for square in MAILBOX_NEIGHBOURS[index]:
+			counts[square] += 1
+			if squares[square] == EMPTY:
+				self.frontier.add(square)
+
+	def h_vacate(self, index):
+		""" Updates the frontier for a piece taken off the square index """
+		counts = self.neighbour_counts
+		for square in MAILBOX_NEIGHBOURS[index]:
+			counts[square] -= 1
+			if not counts[square]:
+				self.frontier.discard(square)
+		if counts[index]:
+			self.frontier.add(index)
 
 	def removePiece(self, player, position):
 		""" Removes a piece from the board 
@@ -118,13 +304,137 @@ class Board:
 				player: A character indicating the colour of the player  
 				position: A tuple indicating the particular cell to place the player in 
 		"""
+		code = self.h_code(player)
+		index = position[0] * 10 + position[1]
+		if code and self.squares[index] == code:
+			sq = MAILBOX_SQUARES[index]
+			self.h_clearBit(code, 1 << sq, sq)
+			self.squares[index] = EMPTY
+			self.h_vacate(index)
+
+	def getMasks(self, player):
+		""" Returns the bitboards of a player and of its opponent
+
+			Args:
+				player: A character indicating the colour of the player
+			Return:
+				(own, opp): A tuple of bitboards
+		"""
 		if player == self.player_one:
-			if position in self.black_curr_pos:
-				self.black_curr_pos.remove(position)
-		elif player == self.player_two:
-			if position in self.white_curr_pos:
-				self.white_curr_pos.remove(position)
+			return self.black, self.white
+		return self.white, self.black
+
+	def getHashKey(self, player):
+		""" Returns the Zobrist hash of the position with player to move
+
+			Args:
+				player: A character indicating the player to move
+			Returns:
+				key: A 64-bit integer
+		"""
+		if player == self.player_two:
+			return self.hash_key ^ ZOBRIST_SIDE
+		return self.hash_key
+
+	def getCanonicalKey(self, player):
+		""" Returns the key of the position with player to move that is shared by its symmetries
+
+			Args:
+				player: A character indicating the player to move
+			Returns:
+				(key, transform): As in canonicalKey
+		"""
+		return canonicalKey(*self.getMasks(player))
+
+
+	def opponent(self, player):
+		""" Returns the character of the other player """
+		if player == self.player_one:
+			return self.player_two
+		return self.player_one
+
+	def makeMove(self, player, position):
+		""" Plays a move in place, flipping the captured pieces, and pushes an undo record
+
+			Args:
+				player: A character indicating the colour of the player
+				position: A tuple indicating the cell to play
+			Returns:
+				flips: A list of the positions that were flipped
+		"""
+		own = self.h_code(player)
+		index = position[0] * 10 + position[1]
+		flips = self.h_flips(own, 3 - own, index)
+		squares = self.squares
+		hash_key = self.hash_key
+		sq = MAILBOX_SQUARES[index]
+		new_key = hash_key ^ ZOBRIST_KEYS[own - 1][sq]
+		mask = 0
+		for square in flips:
+			squares[square] = own
+			flip_sq = MAILBOX_SQUARES[square]
+			mask |= 1 << flip_sq
+			new_key ^= ZOBRIST_FLIP[flip_sq]
+		squares[index] = own
+		self.h_occupy(index)
+		if own == 1:
+			self.black |= mask | 1 << sq
+			self.white ^= mask
+		else:
+			self.white |= mask | 1 << sq
+			self.black ^= mask
+		self.hash_key = new_key
+		self.undo_stack.append((own, index, flips, hash_key))
+		return [divmod(square, 10) for square in flips]
+
+	def unmakeMove(self):
+		""" Takes back the last move played with makeMove """
+		own, index, flips, self.hash_key = self.undo_stack.pop()
+		squares = self.squares
+		mask = 0
+		for square in flips:
+			squares[square] = 3 - own
+			mask |= 1 << MAILBOX_SQUARES[square]
+		squares[index] = EMPTY
+		self.h_vacate(index)
+		if own == 1:
+			self.black ^= mask | 1 << MAILBOX_SQUARES[index]
+			self.white |= mask
+		else:
+			self.white ^= mask | 1 << MAILBOX_SQUARES[index]
+			self.black |= mask
+
+	def getMoveHistory(self):
+		""" Returns the moves played with makeMove, oldest first, as (player, (row, col)) """
+		players = (None, self.player_one, self.player_two)
+		return [(players[own], divmod(index, 10)) for own, index, flips, hash_key in self.undo_stack]
+
+	@property
+	def gameboard(self):
+		""" The board as a 10 x 10 list of lists of characters: a player, '-' for empty or '*' for the border """
+		chars = ('-', self.player_one, self.player_two, '*')
+		squares = self.squares
+		return [[chars[value] for value in squares[row * 10:row * 10 + 10]] for row in range(10)]
+
+	@property
+	def black_curr_pos(self):
+		return maskToPositions(self.black)
+
+	@property
+	def white_curr_pos(self):
+		return maskToPositions(self.white)
 
+	def getFeatureCounts(self, player):
+		""" Gets the features of a player used by the SEF
+
+			Args:
+				player: A character indicating the colour of the player
+			Returns:
+				counts: A tuple (pieces, corner pieces, edge pieces, corner adjacent pieces)
+		"""
+		own = self.getMasks(player)[0]
+		return (own.bit_count(), (own & self.corner_mask).bit_count(), (own & self.edge_mask).bit_count(),
+			(own & self.corner_adj_mask).bit_count())
 
 	def getNoOfFlippedPieces(self, player):
 		""" Gets number of flipped pieces
@@ -134,10 +444,7 @@ class Board:
 			Returns:
 				value: An integer number
 		"""
-		if player == self.player_one:
-			return len(self.black_curr_pos)
-		elif player == self.player_two:
-			return len(self.white_curr_pos)
+		return self.getMasks(player)[0].bit_count()
 
 	def getNoOfCornerPieces(self, player):
 		""" Gets number of corner pieces
@@ -147,10 +454,7 @@ class Board:
 			Returns:
 				value: An integer number 
 		"""
-		if player == self.player_one:
-			return len([val for val in self.black_curr_pos if val in self.corners])
-		elif player == self.player_two:
-			return len([val for val in self.white_curr_pos if val in self.corners])
+		return (self.getMasks(player)[0] & self.corner_mask).bit_count()
 
 	def getNoOfEdgePieces(self,player):
 		""" Gets number of edges pieces
@@ -160,11 +464,7 @@ class Board:
 			Returns:
 				value: An integer number 
 		"""
-
-		if player == self.player_one:
-			return len([val for val in self.black_curr_pos if val in self.edges])
-		elif player == self.player_two:
-			return len([val for val in self.white_curr_pos if val in self.edges])
+		return (self.getMasks(player)[0] & self.edge_mask).bit_count()
 
 	def getNoOfCornerAdjacentPieces(self, player):
 		""" Gets number of corner adjacent pieces
@@ -174,11 +474,7 @@ class Board:
 			Returns:
 				value: An integer number 
 		"""
-
-		if player == self.player_one:
-			return len([val for val in self.black_curr_pos if val in self.corner_adj_positions])
-		elif player == self.player_two:
-			return len([val for val in self.white_curr_pos if val in self.corner_adj_positions])
+		return (self.getMasks(player)[0] & self.corner_adj_mask).bit_count()
 
 	def allPositions(self, player):
 		""" Returns a list of all places for a particular player 
@@ -186,30 +482,21 @@ class Board:
 			Args:
 				player: character representing player
 			Return:
-				list: a list of tuples representing player positions
+				list: a list of tuples representing player positions, in row order
 
 		"""
-		#results = []
 		if player == self.player_one:
-			return self.black_curr_pos
+			return maskToPositions(self.black)
 		elif player == self.player_two:
-			return self.white_curr_pos
+			return maskToPositions(self.white)
 
 	def get_no_of_spaces(self):
-		return(64 - (len(self.black_curr_pos) + len(self.white_curr_pos)))
+		return 64 - (self.black | self.white).bit_count()
 
 	def getMoves(self, position, player):
 		"""
-			This helper method returns a list of moves for a given position. The algorithm goes thus:
-
-			While the number of columns or rows have not been exceeded:
-				if position has execceded the bounds of the board
-					break
-				if there is a space adjacent to the position on the path of the search
-					break
-				if there is a space on the path of search and it is not preceeded by the same colour as the 
-				given position
-					add that to the moves list 
+			This helper method returns a list of moves for a given position. Along every ray
+			from the position, a move is the empty square ending a run of opposing pieces.
 
 			Args:
 				position: a tuple indicating the row and column to start the search
@@ -220,120 +507,43 @@ class Board:
 		"""
 
 		moves = []
-		row, col = position
-
-
-		# row-i, col + i
-		for i in range(1, 9):
-			if col + i > 8 and row - i < 0:
-				break
-			if i == 1 and (self.gameboard[row-i][col+i] == '-' or self.gameboard[row-i][col+i] == "*"):
-				break
-			if self.gameboard[row-i][col+i] == '*':
-				break
-			if self.gameboard[row-i][col+i] == '-' and (self.gameboard[(row-i)+1][col+(i-1)] != player and self.gameboard[(row-i)+1][col+(i-1)] != '-'):
-				moves.append((row-i, col+i))
-				#print(player, " You have appended me ", (row-i, col+i))
-				break
-
-		# row, col + i
-		for i in range(1, 9):
-			if col + i > 8:
-				break
-			if i == 1 and (self.gameboard[row][col+i] == '-' or self.gameboard[row][col+i] == "*"):
-				break
-			if self.gameboard[row][col+i] == '*':
-				break 
-			if self.gameboard[row][col+i] == '-' and (self.gameboard[row][col+(i-1)] != player and self.gameboard[row][col+(i-1)] != '-'): 
-				moves.append((row, col+i))
-				#print(player, " You have appended me ", (row, col+i))
-				break
-
-		# row-i, col - i
-		for i in range(1, 9):
-			if col - i < 0 or row - i < 0:
-				break
-			if i == 1 and (self.gameboard[row-i][col-i] == '-' or self.gameboard[row-i][col-i] == "*"):
-				break 
-			if self.gameboard[row-i][col-i] == '*':
-				break
-			if self.gameboard[row-i][col-i] == '-' and (self.gameboard[(row-i)+1][(col-i)+1] != player and self.gameboard[(row-i)+1][(col-i)+1] != '-') : 
-				moves.append((row-i, col-i))
-				#print(player, " You have appended me ", (row-i, col-i))
-				break
-
-		# row+i, col + i
-		for i in range(1, 9):
-			if col + i > 8 or  row + i > 8:
-				break
-			if i == 1 and (self.gameboard[row+i][col+i] == '-' or self.gameboard[row+i][col+i] == "*"):
-				break 
-			if self.gameboard[row+i][col+i] == '*':
-				break
-			if self.gameboard[row+i][col+i] == '-' and (self.gameboard[row+(i-1)][col+(i-1)] != player and self.gameboard[row+(i-1)][col+(i-1)] != '-'):
-				moves.append((row+i, col+i))
-				#print(player, " You have appended me ", (row+i, col+i))
-				break
-
-		# row-i, col
-		for i in range(1, 9):
-			if row - i < 0:
-				break
-			if i == 1 and (self.gameboard[row-i][col] == '-' or self.gameboard[row-i][col] == "*"):
-				break 
-			if self.gameboard[row-i][col] == '*':
-				break
-			if self.gameboard[row-i][col] == '-' and (self.gameboard[(row-i)+1][col] != player and self.gameboard[(row-i)+1][col] != '-'):
-				moves.append((row-i, col))
-				#print(player, " You have appended me ", (row-i, col))
-				break
-
-		# row, col - i
-		for i in range(1, 9):
-			if col - i < 0:
-				break
-			if i == 1 and (self.gameboard[row][col-i] == '-' or self.gameboard[row][col-i] == "*"):
-				break 
-			if self.gameboard[row][col-i] == '*':
-				break
-			if self.gameboard[row][col-i] == '-' and (self.gameboard[row][(col-i)+1] != player and self.gameboard[row][(col-i)+1] != '-'):
-				moves.append((row, col-i))
-				#print(player, " You have appended me ", (row, col-i))
-				break
-
-		# row + i, col  
-		for i in range(1, 9):
-			if row + i > 8:
-				break
-			if i == 1 and (self.gameboard[row+i][col] == '-' or self.gameboard[row+i][col] == "*"):
-				break 
-			if self.gameboard[row+i][col] == '*':
-				break
-			if self.gameboard[row+i][col] == '-' and (self.gameboard[row+(i-1)][col] != player and self.gameboard[row+(i-1)][col] != '-'):
-				moves.append((row+i, col))
-				#print(player, " You have appended me ", (row+i, col))
-				break
-
-		# row + i, col - i  
-		for i in range(1, 9):
-			if col - i < 0 or row + i > 8:
-				break
-			if i == 1 and (self.gameboard[row+i][col-i] == '-' or self.gameboard[row+i][col-i] == "*"):
-				break 
-			if self.gameboard[row+i][col-i] == '*':
-				break
-			if self.gameboard[row+i][col-i] == '-' and (self.gameboard[row+(i-1)][(col-i)+1] != player and self.gameboard[row+(i-1)][(col - i)+1] != '-'): 
-				moves.append((row+i, col-i))
-				#print(player, " You have appended me ", (row+i, col-i))
-				break
-
+		own = self.h_code(player)
+		squares = self.squares
+		for ray in MAILBOX_RAYS[position[0] * 10 + position[1]]:
+			run = False
+			for square in ray:
+				value = squares[square]
+				if value == EMPTY:
+					if run:
+						moves.append(divmod(square, 10))
+					break
+				if value == own:
+					break
+				run = True
 		return moves
 
+	def h_flips(self, own, opp, index):
+		""" Returns the squares flipped by a move on index, as mailbox indices """
+		flips = []
+		squares = self.squares
+		for ray in MAILBOX_RAYS[index]:
+			run = []
+			for square in ray:
+				value = squares[square]
+				if value != opp:
+					if value == own:
+						flips.extend(run)
+					break
+				run.append(square)
+		return flips
 
 	def getFlips(self, player, opp_player, position_to_move):
 
 		""" Return the opposing player positions to flip
 
+			Along every ray from the position, a run of opp_player pieces is flipped if
+			a player piece ends it.
+
 			Args:
 				player: character representing player
 				opp_player: character representing the opposing player
@@ -342,172 +552,47 @@ class Board:
 				flips: A list of opp_player positions to flip
 
 		"""
-
-		flips = []
-		row, col = position_to_move[0], position_to_move[1]
-		flag = False    # Flag indicates that we can stop
-		count = 0
-
-		# row - i, col - i
-		for i in range(1, 9):
-			if row - i < 0 or col - i < 0:
-				break
-			if i == 1 and (self.gameboard[row-i][col-i]== player or self.gameboard[row-i][col-i] == '-'):
-				break
-			if self.gameboard[row-i][col-i] == player and self.gameboard[row-(i-1)][col-(i-1)] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row-i, col-i))
-			flag = False
-
-		# row - i , col
-		for i in range(1, 9):
-			if row - i < 0:
-				break
-			if i == 1 and (self.gameboard[row-i][col]== player or self.gameboard[row-i][col] == '-'):
-				break
-			if self.gameboard[row-i][col] == player and self.gameboard[row-(i-1)][col] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row-i, col))
-			flag = False
-
-		# row - i , col + i
-		for i in range(1, 9):
-			if row - i < 0 or col + i > 8:
-				break
-			if i == 1 and (self.gameboard[row-i][col + i]== player or self.gameboard[row-i][col+i] == '-'):
-				break
-			if self.gameboard[row-i][col+i] == player and self.gameboard[row-(i-1)][col+(i-1)] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row-i, col+i))
-			flag = False
-
-		# row , col + i
-		for i in range(1, 9):
-			if col + i > 8:
-				break
-			if i == 1 and (self.gameboard[row][col + i]== player or self.gameboard[row][col+i] == '-'):
-				break
-			if self.gameboard[row][col+i] == player and self.gameboard[row][col+(i-1)] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row, col+i))
-			flag = False
-
-		# row + i , col + i
-		for i in range(1, 9):
-			if row + i > 8  or col + i > 8:
-				break
-			if i == 1 and (self.gameboard[row+i][col + i]== player or self.gameboard[row+i][col+i] == '-'):
-				break
-			if self.gameboard[row+i][col+i] == player and self.gameboard[row+(i-1)][col+(i-1)] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row+i, col+i))
-			flag = False
-
-		# row+i , col
-		for i in range(1, 9):
-			if row + i > 8:
-				break
-			if i == 1 and (self.gameboard[row+i][col]== player or self.gameboard[row+i][col] == '-'):
-				break
-			if self.gameboard[row+i][col] == player and self.gameboard[row+(i-1)][col] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row+i, col))
-			flag = False
-
-		# row+i , col - i
-		for i in range(1, 9):
-			if row + i > 8 or col - i < 0:
-				break
-			if i == 1 and (self.gameboard[row+i][col - i]== player or self.gameboard[row+i][col-i] == '-'):
-				break
-			if self.gameboard[row+i][col-i] == player and self.gameboard[row+(i-1)][col-(i-1)] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row+i, col-i))
-			flag = False
-
-		# row , col - i
-		for i in range(1, 9):
-			if col - i < 0:
-				break
-			if i == 1 and (self.gameboard[row][col - i]== player or self.gameboard[row][col-i] == '-'):
-				break
-			if self.gameboard[row][col-i] == player and self.gameboard[row][col-(i-1)] == opp_player:
-				flag = True
-				count = i
-				break
-
-		if flag:
-			for i in range(1, count):
-				flips.append((row, col-i))
-			flag = False
-
-		return flips
+		flips = self.h_flips(self.h_code(player), self.h_code(opp_player), position_to_move[0] * 10 + position_to_move[1])
+		return [divmod(square, 10) for square in flips]
 
 
 	def getLegalMoves(self, player):
 		""" Get the legal moves for a player
 
+			Only the squares of the frontier are tried, so the moves come out without duplicates.
+
 			Args:
 				player: A character representing a player
 			Return:
-				results_list: A list of legal positions that the player can be placed at. Else a query_list is returned
-			            if there are no legal moves
+				moves: A list of legal positions that the player can be placed at, in row order
 		"""
-
-		query_list = self.allPositions(player)
-		print(player, "('s) currently occupied positions = ", query_list)
-		if len(query_list) != 0:
-			results_list = []
-			for position in query_list:
-				results_list.append(self.getMoves(position, player))
-			results_list = [value[n] for idx, value in enumerate(results_list) for n in range(len(value))]
-			#print("Nice job = ", results_list)
-			results_list[:] = [results_list[i] for i in range(len(results_list)) if i == results_list.index(results_list[i])] 
-			return results_list
-		return query_list  
+		own = self.h_code(player)
+		opp = 3 - own
+		squares = self.squares
+		moves = []
+		for index in self.frontier:
+			for ray in MAILBOX_RAYS[index]:
+				if squares[ray[0]] != opp:
+					continue
+				for square in ray:
+					value = squares[square]
+					if value != opp:
+						break
+				if value == own:
+					moves.append(index)
+					break
+		moves.sort()
+		return [divmod(index, 10) for index in moves]
 
 	def win_or_lose(self):
 		""" Determines who wins the game"""
 
-		if len(self.white_curr_pos) > len(self.black_curr_pos):
-			return "{0} wins.He/she has {1} pieces - {2} pieces".format(self.player_two, len(self.white_curr_pos), len(self.black_curr_pos))
-		elif len(self.white_curr_pos) < len(self.black_curr_pos):
-			return "{0} wins.He/she has {1} pieces - {2} pieces".format(self.player_one, len(self.black_curr_pos), len(self.white_curr_pos))
+		black_num = self.black.bit_count()
+		white_num = self.white.bit_count()
+		if white_num > black_num:
+			return "{0} wins.He/she has {1} pieces - {2} pieces".format(self.player_two, white_num, black_num)
+		elif white_num < black_num:
+			return "{0} wins.He/she has {1} pieces - {2} pieces".format(self.player_one, black_num, white_num)
 		else:
 			return "Draw. Neither {0} nor {1} wins!!".format(self.player_one, self.player_two)
 
@@ -522,4 +607,505 @@ class Board:
 			print_l = [["|", value[j]] for j in range(1, len(value) - 1)]
 			print_l[:] = [val[n] for val in print_l for n in range(len(val))]
 			string += "".join([str(i), " ", "".join(str(e) for e in print_l), "|", "\n"])
-		return string
\ No newline at end of file
+		return string
+
+# Bitboard helpers. Square (row, col) with row, col in 1..8 maps to bit (row - 1) * 8 + (col - 1)
+
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+NOT_A_FILE = 0xFEFEFEFEFEFEFEFE		# every square except column 1
+NOT_H_FILE = 0x7F7F7F7F7F7F7F7F		# every square except column 8
+
+
+def squareToPosition(sq):
+	""" Converts a bit index into a (row, col) tuple """
+	return (sq // 8 + 1, sq % 8 + 1)
+
+def positionToSquare(position):
+	""" Converts a (row, col) tuple into a bit index """
+	return (position[0] - 1) * 8 + (position[1] - 1)
+
+def maskToPositions(mask):
+	""" Returns the (row, col) tuples of all set bits in a mask, in square order """
+	positions = []
+	while mask:
+		low = mask & -mask
+		positions.append(squareToPosition(low.bit_length() - 1))
+		mask ^= low
+	return positions
+
+def positionsToMask(positions):
+	""" Returns a mask with a bit set for every (row, col) tuple in positions """
+	mask = 0
+	for position in positions:
+		mask |= 1 << positionToSquare(position)
+	return mask
+
+def legalMask(own, opp):
+	""" Computes the legal moves for the side owning the discs in own
+
+		Each of the eight directions is flood-filled through opposing discs with
+		shift-and-mask operations; an empty square at the end of a run is a move.
+
+		Args:
+			own: bitboard of the side to move
+			opp: bitboard of the opposing side
+		Return:
+			moves: bitboard of legal moves
+	"""
+	empty = ~(own | opp) & FULL_MASK
+	h_opp = opp & 0x7E7E7E7E7E7E7E7E	# opposing discs that can be crossed horizontally or diagonally
+	moves = 0
+
+	# east (col + 1)
+	t = (own << 1) & h_opp
+	t |= (t << 1) & h_opp; t |= (t << 1) & h_opp; t |= (t << 1) & h_opp; t |= (t << 1) & h_opp; t |= (t << 1) & h_opp
+	moves |= (t << 1) & empty
+	# west (col - 1)
+	t = (own >> 1) & h_opp
+	t |= (t >> 1) & h_opp; t |= (t >> 1) & h_opp; t |= (t >> 1) & h_opp; t |= (t >> 1) & h_opp; t |= (t >> 1) & h_opp
+	moves |= (t >> 1) & empty
+	# south (row + 1)
+	t = (own << 8) & opp
+	t |= (t << 8) & opp; t |= (t << 8) & opp; t |= (t << 8) & opp; t |= (t << 8) & opp; t |= (t << 8) & opp
+	moves |= (t << 8) & empty
+	# north (row - 1)
+	t = (own >> 8) & opp
+	t |= (t >> 8) & opp; t |= (t >> 8) & opp; t |= (t >> 8) & opp; t |= (t >> 8) & opp; t |= (t >> 8) & opp
+	moves |= (t >> 8) & empty
+	# south-east (row + 1, col + 1)
+	t = (own << 9) & h_opp
+	t |= (t << 9) & h_opp; t |= (t << 9) & h_opp; t |= (t << 9) & h_opp; t |= (t << 9) & h_opp; t |= (t << 9) & h_opp
+	moves |= (t << 9) & empty
+	# south-west (row + 1, col - 1)
+	t = (own << 7) & h_opp
+	t |= (t << 7) & h_opp; t |= (t << 7) & h_opp; t |= (t << 7) & h_opp; t |= (t << 7) & h_opp; t |= (t << 7) & h_opp
+	moves |= (t << 7) & empty
+	# north-east (row - 1, col + 1)
+	t = (own >> 7) & h_opp
+	t |= (t >> 7) & h_opp; t |= (t >> 7) & h_opp; t |= (t >> 7) & h_opp; t |= (t >> 7) & h_opp; t |= (t >> 7) & h_opp
+	moves |= (t >> 7) & empty
+	# north-west (row - 1, col - 1)
+	t = (own >> 9) & h_opp
+	t |= (t >> 9) & h_opp; t |= (t >> 9) & h_opp; t |= (t >> 9) & h_opp; t |= (t >> 9) & h_opp; t |= (t >> 9) & h_opp
+	moves |= (t >> 9) & empty
+
+	return moves
+
+# (shift, wrap mask) for the eight directions; a positive shift moves towards higher squares
+_DIRECTIONS = ((1, NOT_A_FILE), (-1, NOT_H_FILE), (8, FULL_MASK), (-8, FULL_MASK),
+	(9, NOT_A_FILE), (7, NOT_H_FILE), (-7, NOT_A_FILE), (-9, NOT_H_FILE))
+
+def flipMask(own, opp, sq):
+	""" Computes the opposing discs flipped by the side owning own playing at sq
+
+		Args:
+			own: bitboard of the side to move
+			opp: bitboard of the opposing side
+			sq: bit index of the move
+		Return:
+			flips: bitboard of the discs to flip
+	"""
+	flips = 0
+	move = 1 << sq
+	for shift, wrap in _DIRECTIONS:
+		run = 0
+		if shift > 0:
+			x = (move << shift) & wrap & FULL_MASK
+			while x & opp:
+				run |= x
+				x = (x << shift) & wrap & FULL_MASK
+		else:
+			x = (move >> -shift) & wrap
+			while x & opp:
+				run |= x
+				x = (x >> -shift) & wrap
+		if x & own:
+			flips |= run
+	return flips
+
+
+# Zobrist keys: one random 64-bit key per (player, square), XORed together into a position hash
+
+_zobrist_random = random.Random(20161010)
+ZOBRIST_KEYS = ([_zobrist_random.getrandbits(64) for sq in range(64)],		# player_one
+	[_zobrist_random.getrandbits(64) for sq in range(64)])					# player_two
+ZOBRIST_FLIP = [ZOBRIST_KEYS[0][sq] ^ ZOBRIST_KEYS[1][sq] for sq in range(64)]	# toggles a disc's colour
+ZOBRIST_SIDE = _zobrist_random.getrandbits(64)		# XORed in when player_two is to move
+
+def zobristHash(black, white):
+	""" Computes the Zobrist hash of a position from scratch
+
+		Args:
+			black: bitboard of player_one
+			white: bitboard of player_two
+		Return:
+			key: A 64-bit integer
+	"""
+	key = 0
+	for sq in range(64):
+		bit = 1 << sq
+		if black & bit:
+			key ^= ZOBRIST_KEYS[0][sq]
+		elif white & bit:
+			key ^= ZOBRIST_KEYS[1][sq]
+	return key
+
+
+# Symmetries. Transform t mirrors the columns if t & 1, then mirrors the rows if t & 2,
+# then swaps rows and columns if t & 4; the eight values cover every rotation and reflection
+
+def mirrorColumns(x):
+	""" Mirrors a bitboard left to right (column c goes to column 9 - c) """
+	x = ((x >> 1) & 0x5555555555555555) | ((x & 0x5555555555555555) << 1)
+	x = ((x >> 2) & 0x3333333333333333) | ((x & 0x3333333333333333) << 2)
+	return ((x >> 4) & 0x0F0F0F0F0F0F0F0F) | ((x & 0x0F0F0F0F0F0F0F0F) << 4)
+
+def mirrorRows(x):
+	""" Mirrors a bitboard top to bottom (row r goes to row 9 - r) """
+	return int.from_bytes(x.to_bytes(8, 'little'), 'big')
+
+def transposeMask(x):
+	""" Swaps the rows and columns of a bitboard """
+	t = 0x0F0F0F0F00000000 & (x ^ (x << 28))
+	x ^= t ^ (t >> 28)
+	t = 0x3333000033330000 & (x ^ (x << 14))
+	x ^= t ^ (t >> 14)
+	t = 0x5500550055005500 & (x ^ (x << 7))
+	x ^= t ^ (t >> 7)
+	return x & FULL_MASK
+
+def transformMask(x, transform):
+	""" Applies one of the eight symmetries to a bitboard """
+	if transform & 1:
+		x = mirrorColumns(x)
+	if transform & 2:
+		x = mirrorRows(x)
+	if transform & 4:
+		x = transposeMask(x)
+	return x
+
+# SQUARE_TRANSFORMS[t][sq] is the square that sq goes to under transform t
+SQUARE_TRANSFORMS = [[transformMask(1 << sq, t).bit_length() - 1 for sq in range(64)] for t in range(8)]
+INVERSE_TRANSFORMS = [[u for u in range(8) if all(SQUARE_TRANSFORMS[u][SQUARE_TRANSFORMS[t][sq]] == sq
+	for sq in range(64))][0] for t in range(8)]
+
+def canonicalize(own, opp):
+	""" Finds the canonical form of a position among its eight symmetries
+
+		The canonical form is the symmetry with the smallest (own, opp) pair.
+
+		Args:
+			own: bitboard of the side to move
+			opp: bitboard of the other side
+		Return:
+			(own, opp, transform): The canonical bitboards and the transform that
+				maps the position onto them
+	"""
+	mirrored = (mirrorColumns(own), mirrorColumns(opp))
+	flipped = (mirrorRows(own), mirrorRows(opp))
+	rotated = (mirrorRows(mirrored[0]), mirrorRows(mirrored[1]))
+	best = (own, opp)
+	transform = 0
+	for t, (x, y) in enumerate(((own, opp), mirrored, flipped, rotated)):
+		if t and (x, y) < best:
+			best = (x, y)
+			transform = t
+		candidate = (transposeMask(x), transposeMask(y))
+		if candidate < best:
+			best = candidate
+			transform = t | 4
+	return best[0], best[1], transform
+
+def canonicalKey(own, opp):
+	""" Hash of a position that is the same for all eight of its symmetries
+
+		Args:
+			own: bitboard of the side to move
+			opp: bitboard of the other side
+		Return:
+			(key, transform): A 64-bit key and the transform onto the canonical form,
+				to map moves in and out of the canonical frame with SQUARE_TRANSFORMS
+	"""
+	own, opp, transform = canonicalize(own, opp)
+	# Multiplying by odd constants and keeping the middle bits mixes every input bit
+	return ((own * 0x9E3779B97F4A7C15) ^ (opp * 0xC2B2AE3D27D4EB4F)) >> 32 & FULL_MASK, transform
+
+
+class BitBoard:
+	""" A Board backend that keeps each side as a 64-bit integer
+
+		It offers the same surface as Board (h_setPosition, removePiece, getLegalMoves,
+		getFlips and the piece counters), so GameState and the game classes can use
+		either one. Moves and flips are computed with shift-and-mask operations instead
+		of walking the squares one by one.
+	"""
+
+	def __init__(self, player_one, player_two):
+		self.setUp(player_one, player_two)
+
+	@classmethod
+	def fromBoard(cls, board):
+		""" Builds a BitBoard holding the same pieces as another board
+
+			Args:
+				board: A Board or BitBoard
+			Return:
+				bitboard: A new BitBoard
+		"""
+		bitboard = cls(board.player_one, board.player_two)
+		bitboard.black = positionsToMask(board.allPositions(board.player_one))
+		bitboard.white = positionsToMask(board.allPositions(board.player_two))
+		bitboard.hash_key = zobristHash(bitboard.black, bitboard.white)
+		return bitboard
+
+	def setUp(self, player_one, player_two):
+		""" Initial setup script"""
+		self.black = 0
+		self.white = 0
+		self.hash_key = 0			# Zobrist hash of the pieces, kept up to date by h_setPosition and removePiece
+		self.undo_stack = []		# (player, square, flip mask, previous hash) of every move played
+		self.validpositions = [(row,col) for row in range(1, 9) for col in range(1, 9)]
+		self.edges = [(3, 1), (4, 1), (5, 1), (6, 1) , (8, 1),
+			(1, 3),(1, 4), (1, 5), (1, 6), (3, 8), (4, 8), (5, 8), 
+			(6, 8), (8, 3), (8, 4), (8, 5), (8, 6)]
+		self.corners = [(1, 1),(8, 8), (8, 1), (1, 8)]
+		self.corner_adj_positions = [(1, 2), (2, 1), (2, 2), (1, 7), (2, 7), (2, 8), (7, 1),
+			(8, 2), (7, 2), (7, 8), (8, 7), (7, 7)]
+		self.edge_mask = positionsToMask(self.edges)
+		self.corner_mask = positionsToMask(self.corners)
+		self.corner_adj_mask = positionsToMask(self.corner_adj_positions)
+		self.player_one = player_one
+		self.player_two = player_two
+
+	def getMasks(self, player):
+		""" Returns the bitboards of a player and of its opponent
+
+			Args:
+				player: A character indicating the colour of the player
+			Return:
+				(own, opp): A tuple of bitboards
+		"""
+		if player == self.player_one:
+			return self.black, self.white
+		return self.white, self.black
+
+	def h_setPosition(self, player, position):
+		""" Helper function for to actually place the player on the board
+
+			Args:
+				player: A character indicating the colour of the player  
+				position: A tuple indicating the particular cell to place the player in
+		"""
+		sq = positionToSquare(position)
+		bit = 1 << sq
+		if player == self.player_one:
+			if not self.black & bit:
+				self.hash_key ^= ZOBRIST_KEYS[0][sq]
+			if self.white & bit:
+				self.hash_key ^= ZOBRIST_KEYS[1][sq]
+			self.black |= bit
+			self.white &= ~bit
+		elif player == self.player_two:
+			if not self.white & bit:
+				self.hash_key ^= ZOBRIST_KEYS[1][sq]
+			if self.black & bit:
+				self.hash_key ^= ZOBRIST_KEYS[0][sq]
+			self.white |= bit
+			self.black &= ~bit
+
+	def removePiece(self, player, position):
+		""" Removes a piece from the board 
+
+			Args:
+				player: A character indicating the colour of the player  
+				position: A tuple indicating the particular cell to place the player in 
+		"""
+		sq = positionToSquare(position)
+		bit = 1 << sq
+		if player == self.player_one:
+			if self.black & bit:
+				self.hash_key ^= ZOBRIST_KEYS[0][sq]
+			self.black &= ~bit
+		elif player == self.player_two:
+			if self.white & bit:
+				self.hash_key ^= ZOBRIST_KEYS[1][sq]
+			self.white &= ~bit
+
+	def getHashKey(self, player):
+		""" Returns the Zobrist hash of the position with player to move """
+		if player == self.player_two:
+			return self.hash_key ^ ZOBRIST_SIDE
+		return self.hash_key
+
+	def getCanonicalKey(self, player):
+		""" Returns the key of the position with player to move that is shared by its symmetries """
+		return canonicalKey(*self.getMasks(player))
+
+	def opponent(self, player):
+		""" Returns the character of the other player """
+		if player == self.player_one:
+			return self.player_two
+		return self.player_one
+
+	def makeMove(self, player, position):
+		""" Plays a move in place, flipping the captured pieces, and pushes an undo record
+
+			Args:
+				player: A character indicating the colour of the player
+				position: A tuple indicating the cell to play
+			Returns:
+				flips: A list of the positions that were flipped
+		"""
+		return maskToPositions(self.makeSquare(player, positionToSquare(position)))
+
+	def makeSquare(self, player, sq):
+		""" Same as makeMove, for a bit index. Returns the flipped discs as a bitboard """
+		bit = 1 << sq
+		hash_key = self.hash_key
+		if player == self.player_one:
+			flips = flipMask(self.black, self.white, sq)
+			self.black |= bit | flips
+			self.white ^= flips
+			new_key = hash_key ^ ZOBRIST_KEYS[0][sq]
+		else:
+			flips = flipMask(self.white, self.black, sq)
+			self.white |= bit | flips
+			self.black ^= flips
+			new_key = hash_key ^ ZOBRIST_KEYS[1][sq]
+		mask = flips
+		while mask:
+			low = mask & -mask
+			new_key ^= ZOBRIST_FLIP[low.bit_length() - 1]
+			mask ^= low
+		self.hash_key = new_key
+		self.undo_stack.append((player, sq, flips, hash_key))
+		return flips
+
+	def unmakeMove(self):
+		""" Takes back the last move played with makeMove or makeSquare """
+		player, sq, flips, self.hash_key = self.undo_stack.pop()
+		if player == self.player_one:
+			self.black ^= (1 << sq) | flips
+			self.white |= flips
+		else:
+			self.white ^= (1 << sq) | flips
+			self.black |= flips
+
+	def getMoveHistory(self):
+		""" Returns the moves played with makeMove or makeSquare, oldest first, as (player, (row, col)) """
+		return [(player, squareToPosition(sq)) for player, sq, flips, hash_key in self.undo_stack]
+
+	@property
+	def black_curr_pos(self):
+		return maskToPositions(self.black)
+
+	@property
+	def white_curr_pos(self):
+		return maskToPositions(self.white)
+
+	@property
+	def gameboard(self):
+		""" The board as a 10 x 10 list of lists, laid out like Board.gameboard """
+		board = [['*' for n in range(10)]]
+		for row in range(1, 9):
+			line = ['*']
+			for col in range(1, 9):
+				bit = 1 << positionToSquare((row, col))
+				if self.black & bit:
+					line.append(self.player_one)
+				elif self.white & bit:
+					line.append(self.player_two)
+				else:
+					line.append('-')
+			line.append('*')
+			board.append(line)
+		board.append(['*' for n in range(10)])
+		return board
+
+	def getFeatureCounts(self, player):
+		""" Gets (pieces, corner pieces, edge pieces, corner adjacent pieces) of a player """
+		own = self.black if player == self.player_one else self.white
+		return (own.bit_count(), (own & self.corner_mask).bit_count(), (own & self.edge_mask).bit_count(),
+			(own & self.corner_adj_mask).bit_count())
+
+	def getNoOfFlippedPieces(self, player):
+		""" Gets number of pieces held by a player """
+		return self.getMasks(player)[0].bit_count()
+
+	def getNoOfCornerPieces(self, player):
+		""" Gets number of corner pieces """
+		return (self.getMasks(player)[0] & self.corner_mask).bit_count()
+
+	def getNoOfEdgePieces(self, player):
+		""" Gets number of edges pieces """
+		return (self.getMasks(player)[0] & self.edge_mask).bit_count()
+
+	def getNoOfCornerAdjacentPieces(self, player):
+		""" Gets number of corner adjacent pieces """
+		return (self.getMasks(player)[0] & self.corner_adj_mask).bit_count()
+
+	def allPositions(self, player):
+		""" Returns a list of all places for a particular player """
+		return maskToPositions(self.getMasks(player)[0])
+
+	def get_no_of_spaces(self):
+		return 64 - (self.black | self.white).bit_count()
+
+	def getMoves(self, position, player):
+		""" Returns the moves that the piece at position takes part in
+
+			Args:
+				position: a tuple indicating the row and column to start the search
+				player: character representing player
+			Returns:
+				moves: a list of legal positions or moves
+		"""
+		own, opp = self.getMasks(player)
+		bit = 1 << positionToSquare(position)
+		if not own & bit:
+			return []
+		# Only the given piece can anchor a move, but the rest of the side still blocks
+		return maskToPositions(legalMask(bit, opp) & ~own)
+
+	def getFlips(self, player, opp_player, position_to_move):
+		""" Return the opposing player positions to flip
+
+			Args:
+				player: character representing player
+				opp_player: character representing the opposing player
+				position_to_move: A tuple indicating the particular cell to flip
+			Return:
+				flips: A list of opp_player positions to flip
+		"""
+		own, opp = self.getMasks(player)
+		return maskToPositions(flipMask(own, opp, positionToSquare(position_to_move)))
+
+	def getLegalMask(self, player):
+		""" Returns the legal moves for a player as a bitboard """
+		own, opp = self.getMasks(player)
+		return legalMask(own, opp)
+
+	def getLegalMoves(self, player):
+		""" Get the legal moves for a player
+
+			Args:
+				player: A character representing a player
+			Return:
+				results_list: A list of legal positions that the player can be placed at
+		"""
+		own, opp = self.getMasks(player)
+		return maskToPositions(legalMask(own, opp))
+
+	def win_or_lose(self):
+		""" Determines who wins the game"""
+		black_num = self.black.bit_count()
+		white_num = self.white.bit_count()
+		if white_num > black_num:
+			return "{0} wins.He/she has {1} pieces - {2} pieces".format(self.player_two, white_num, black_num)
+		elif white_num < black_num:
+			return "{0} wins.He/she has {1} pieces - {2} pieces".format(self.player_one, black_num, white_num)
+		else:
+			return "Draw. Neither {0} nor {1} wins!!".format(self.player_one, self.player_two)
+
+	def __str__(self):
+		return Board.__str__(self)
@@ -12,10 +12,13 @@ import sys
 import re
 import os
 import random
-import copy
 import logging
 import time
-from OthelloUtils import GameState, Board
+from OthelloUtils import GameState, Board, BitBoard
+from OthelloSearch import Searcher
+from OthelloMCTS import MonteCarloSearcher
+from OthelloParallel import ParallelSearcher, LazySearcher
+from OthelloRecord import GameWriter
 
 
 logging.basicConfig(filename="game.log", filemode='a', level=logging.INFO)
@@ -32,13 +35,26 @@ class Othello:
 	__SUCCESS = "valid move"
 	__GAME_END = "Game end"
 
-	def __init__(self, player_selection):
-		self.board = Board(self.__PLAYER_BLACK, self.__PLAYER_WHITE)
+	def __init__(self, player_selection, board_type=Board, minimax=False, time_limit=1.0, book=None, mcts=False,
+		processes=1, record=None, lazy_smp=False):
+		self.board = board_type(self.__PLAYER_BLACK, self.__PLAYER_WHITE)
 		self.board.h_setPosition(self.__PLAYER_WHITE, (4, 4))
 		self.board.h_setPosition(self.__PLAYER_WHITE, (5, 5))
 		self.board.h_setPosition(self.__PLAYER_BLACK, (4, 5))
 		self.board.h_setPosition(self.__PLAYER_BLACK, (5, 4))
-		self.state = GameState(self.__PLAYER_BLACK, self.board, player_selection)
+		self.state = GameState(self.__PLAYER_BLACK, self.board, player_selection, minimax)
+		if mcts:
+			self.searcher = MonteCarloSearcher(time_limit)
+		elif minimax and processes != 1 and lazy_smp:
+			# The calling process searches too, next to processes - 1 helpers
+			self.searcher = LazySearcher(processes - 1 if processes else None, time_limit, book=book)
+		elif minimax and processes != 1:
+			self.searcher = ParallelSearcher(processes, time_limit, book=book)
+		elif minimax:
+			self.searcher = Searcher(time_limit, book=book)
+		else:
+			self.searcher = None
+		self.record = record		# game record file that the finished game is appended to
 
 
 	# Making the class variables immutable
@@ -87,7 +103,7 @@ class Othello:
 			if position_to_move not in self.state.next_moves:
 				return "\nPlayer {0}'s move:{1} Return_code:{2}\n".format(player, position_to_move, self.ERROR)
 			self.flip_opp_player_positions(player, opp_player, position_to_move)
-			self.state = GameState(opp_player, self.state.board, player_selection)
+			self.state = GameState(opp_player, self.state.board, player_selection, self.state.minimax)
 		return "\nPlayer {0}'s move:{1} Return_code:{2}\n".format(player, position_to_move, self.__SUCCESS)
 
 		# If player does not have legal moves
@@ -118,12 +134,19 @@ class Othello:
 		return opp_player
 
 	def minimax(self):
-		movesList = self.state.next_moves
-		for move in movesList:
-			state = copy.deepcopy(self.state)
-			player = state.turn
-			opp_player = ''
-		pass
+		""" Searches for the best move of the player to move
+
+		Return:
+			move: A tuple (row, col), the best move found within the time limit
+		"""
+		move = self.searcher.search(self.state)
+		if isinstance(self.searcher, MonteCarloSearcher):
+			logging.info("%s playouts (%.0f/s), win rate = %.3f", self.searcher.playouts,
+				self.searcher.playouts_per_second, self.searcher.score)
+			return move
+		logging.info("Searched to depth %s (%s nodes), score = %s", self.searcher.depth_reached,
+			self.searcher.nodes, self.searcher.score)
+		return move
 
 
 
@@ -135,13 +158,7 @@ class Othello:
 			player: character representing player
 		"""
 
-		l = self.state.board.getFlips(player, opp_player, position_to_move)
-		#print(opp_player, "'s positions to flip = " , l)
-		logging.info("%s 's positions to flip = %s", opp_player, l)
-		self.state.board.h_setPosition(player, position_to_move)
-		for value in l:
-			self.state.board.h_setPosition(player, value)
-			self.state.board.removePiece(opp_player, value)  
+		self.state.board.makeMove(player, position_to_move)
 
 	def toString(self):
 		""" Print the representation of the board to console"""
@@ -183,8 +200,11 @@ class Othello:
 				self.__validate_position(input_position)
 			elif self.state.who_plays_now == 'computer':
 				print("Do not rush me!!")
-				time.sleep(random.randint(4, 8)) #simulate busy wait
-				input_position = random.choice(self.state.next_moves)
+				if self.searcher:
+					input_position = self.minimax()
+				else:
+					time.sleep(random.randint(4, 8)) #simulate busy wait
+					input_position = random.choice(self.state.next_moves)
 		except ValueError as e:
 			print(e)
 		except KeyboardInterrupt:
@@ -203,7 +223,6 @@ class Othello:
 
 		while True:
 			print(self.state.board.__str__())
-			logging.info("%s", self.state.board.__str__())
 
 			# First input
 			position = self.get_input()									
@@ -236,6 +255,7 @@ class Othello:
 					logging.info("%s", self.state.board.win_or_lose())
 					print(self.__GAME_END)
 					logging.info("%s", self.__GAME_END)
+					self.recordGame()
 					return
 
 			# If the game is finished
@@ -244,8 +264,38 @@ class Othello:
 				logging.info("%s", self.state.board.win_or_lose())
 				print(self.__GAME_END)
 				logging.info("%s", self.__GAME_END)
+				self.recordGame()
 				return
 
+	def recordGame(self):
+		""" Appends the game played so far to the record file, if there is one """
+		if not self.record:
+			return
+		board = self.state.board
+		moves = []
+		turn = self.__PLAYER_BLACK
+		for player, position in board.getMoveHistory():
+			# A player moving twice in a row means the other one passed
+			if player != turn:
+				moves.append(None)
+			moves.append(position)
+			turn = board.opponent(player)
+		names = {}
+		weights = {}
+		for player in (self.__PLAYER_BLACK, self.__PLAYER_WHITE):
+			if self.state.player_selection[player] == 'computer':
+				if isinstance(self.searcher, MonteCarloSearcher):
+					names[player] = 'mcts'
+				else:
+					names[player] = 'search' if self.searcher else 'random'
+					weights[player] = self.state.getWeights()
+			else:
+				names[player] = 'human'
+		with GameWriter(self.record) as writer:
+			writer.write({'black': names[self.__PLAYER_BLACK], 'white': names[self.__PLAYER_WHITE], 'weights': weights,
+				'b': board.getNoOfFlippedPieces(self.__PLAYER_BLACK), 'w': board.getNoOfFlippedPieces(self.__PLAYER_WHITE),
+				'moves': moves})
+
 def main_loop():
 	human_or_computer = input("Do you want to play with a human or with computer)?(human / computer): ")
 	if human_or_computer == 'computer':
@@ -257,12 +307,12 @@ def main_loop():
 		elif choice == 'w':
 			d = {'w':'human', 'b':'computer'}
 			logging.info("You are second player")
-		o = Othello(d)
+		o = Othello(d, BitBoard, minimax=True, record="games.rec")
 		o.prompt()
 		o.play()
 	else:
 		d = {'b':None, 'w':None}
-		o = Othello(d)
+		o = Othello(d, record="games.rec")
 		o.prompt()
 		o.play()
 
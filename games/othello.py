@@ -7,6 +7,8 @@ Author: Okusanya David
 Brief: An Othello game-playing AI with the minimax algorithm
 """
 
+from OthelloUtils import RAYS
+
 #from collections import OrderedDict
 #keeping insertion order, generate a unique list
 #self.white_currPos = list(OrderedDict.fromkeys(self.white_currPos))
@@ -17,9 +19,6 @@ class Othello:
 	_PLAYER_BLACK = 1
 	_PLAYER_WHITE = 2
 
-	""" A board is an 8 x 8 matrix of squares """
-	_gameboard = [[0 for n in range(10)] for n in range(10)]
-
 	# These are hardcorded values
 	_validpositions = [(row, col) for row in range(1, 9) for col in range(1, 9)]
 
@@ -45,6 +44,8 @@ class Othello:
 		self._gameboard[5][5] = self._PLAYER_WHITE
 
 	def setUp(self):
+		""" A board is an 8 x 8 matrix of squares, owned by this game """
+		self._gameboard = [[0 for n in range(10)] for n in range(10)]
 		for row, value in enumerate(self._gameboard):
 			value[0] = "*"
 			value[-1] = "*"
@@ -103,133 +104,32 @@ class Othello:
 	
 	def getMoves(self, position, player):
 		"""
-		The operator not yields True if its argument is false, False otherwise.
-
-		The expression x and y first evaluates x; if x is false, its value is returned; otherwise, y is evaluated and the resulting value is returned.
-
-		The expression x or y first evaluates x; if x is true, its value is returned; otherwise, y is evaluated and the resulting value is returned.
+		Returns the moves that a piece of player at position makes possible: along every
+		ray from the position, the empty square ending a run of opposing pieces.
 		"""
 		moves = []
-		row, col = position
-		#s = [self._PLAYER_WHITE, self._PLAYER_BLACK]
-		#opp_player = list(set(s).difference([player]))
-		
-		# row-i, col + i
-		for i in range(1, 9):
-			if col + i > 8 and row - i < 0:
-				#print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row-i][col+i] == 0 or self._gameboard[row-i][col+i] == "*"):
-				#print("I broke her", row, col)
-				break 
-			if self._gameboard[row-i][col+i] == 0 and self._gameboard[row-i+1][col+i-1] != player:
-				#print("Move appended: row-i, col+i, ",row-i, col+i) 
-				moves.append((row-i, col+i))
-				break
-
-		# row, col + i
-		for i in range(1, 9):
-			if col + i > 8:
-				#print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row][col+i] == 0 or self._gameboard[row][col+i] == "*"):
-				#print("I broke her", row, col)
-				break 
-			if self._gameboard[row][col+i] == 0 and self._gameboard[row][col+i-1] != player:
-				#print("Move appended: row, col+i ", row, col+i) 
-				moves.append((row, col+i))
-				break
-
-		# row-i, col - i
-		for i in range(1, 9):
-			if col - i < 0 or row - i < 0:
-				#print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row-i][col-i] == 0 or self._gameboard[row-i][col-i] == "*"):
-				#print("I broke her", row, col)
-				break 
-			if self._gameboard[row-i][col-i] == 0 and self._gameboard[row-i+1][col-i+1] != player: 
-				#print("Move appended: row-i, col-i ", row-i, col-i)
-				moves.append((row-i, col-i))
-				break
-
-		# row+i, col + i
-		for i in range(1, 9):
-			if col + i > 8 or  row + i > 8:
-				#print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row+i][col+i] == 0 or self._gameboard[row+i][col+i] == "*"):
-				#print("I broke her", row, col)
-				break 
-			if self._gameboard[row+i][col+i] == 0 and self._gameboard[row+i-1][col+i-1] != player:
-				#print("Move appended: row+i, col+i ", row+i, col+i) 
-				moves.append((row+i, col+i))
-				break
-
-		# row-i, col
-		for i in range(1, 9):
-			if row - i < 0:
-				#print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row-i][col] == 0 or self._gameboard[row-i][col] == "*"):
-				#print("I broke her", row, col)
-				break 
-			if self._gameboard[row-i][col] == 0 and self._gameboard[row-i+1][col] != player:
-				#print("Move appended: row-i, col ", row-i, col) 
-				moves.append((row-i, col))
-				break
-
-		# row, col - i
-		for i in range(1, 9):
-			if col - i < 0:
-				#print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row][col-i] == 0 or self._gameboard[row][col-i] == "*"):
-				#print("I broke her", row, col)
-				break 
-			if self._gameboard[row][col-i] == 0 and self._gameboard[row][col-i+1] != player:
-				#print("Move appended: row, col-i ", row, col-i) 
-				moves.append((row, col-i))
-				break
-
-		# row + i, col	
-		for i in range(1, 9):
-			if row + i > 8:
-				#print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row+i][col] == 0 or self._gameboard[row+i][col] == "*"):
-				#print("I broke her", row, col)
-				break 
-			if self._gameboard[row+i][col] == 0 and self._gameboard[row+i-1][col] != player:
-				#print("Move appended: row+i, col ", row+i, col) 
-				moves.append((row+i, col))
-				break
-
-		# row + i, col - i	
-		for i in range(1, 9):
-			if col - i < 0 or row + i > 8:
-				print("I broke here", row, col)
-				break
-			if i == 1 and (self._gameboard[row+i][col-i] == 0 or self._gameboard[row+i][col-i] == "*"):
-				print("I broke her", row, col)
-				break 
-			if self._gameboard[row+i][col-i] == 0 and self._gameboard[row+i-1][col-i+1] != player:
-				print("Move appended: row+i, col-i ", row+i, col-i ) 
-				moves.append((row+i, col-i))
-				break
-
+		gameboard = self._gameboard
+		for ray in RAYS[position]:
+			run = False
+			for row, col in ray:
+				value = gameboard[row][col]
+				if value == 0:
+					if run:
+						moves.append((row, col))
+					break
+				if value == player:
+					break
+				run = True
 		return moves
 	
 	def getLegalMoves(self, player):
 		self._validate_player(player)
 		query_list = self.allPositions(player)
-		print(query_list)
 		results_list = []
 		for position in query_list:
 			results_list.append(self.getMoves(position, player))
 		results_list = [value[n] for idx, value in enumerate(results_list) for n in range(len(value))]
 		results_list[:] = [results_list[i] for i in range(len(results_list)) if i == results_list.index(results_list[i])] 
-		print(results_list)
 		return results_list
 	
 	def place(self, player, position_to_move):
@@ -241,7 +141,6 @@ class Othello:
 		return "\nPlayer {0}'s move:{1} Return_code:{2}\n".format(player, position_to_move, self.SUCCESS)
 	
 	def _resetBoard(self):
-		self._gameboard = [[0 for n in range(10)] for n in range(10)]
 		self.setUp()
 
 	def generateBoards(self, black_list, white_list):
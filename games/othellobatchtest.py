@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+"""
+File: othellobatchtest.py
+"""
+import unittest
+from OthelloUtils import GameState, BitBoard
+from OthelloSim import newBoard
+
+try:
+	import numpy
+	from OthelloBatch import BoardBatch
+except ImportError:
+	numpy = None
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class BoardBatchTest(unittest.TestCase):
+
+	def setUp(self):
+		self.states = []
+		board = newBoard()
+		turn = 'b'
+		for move in [(3, 4), (3, 3), (3, 2), (2, 4), (1, 5), (4, 3)]:
+			self.states.append((BitBoard.fromBoard(board), turn))
+			board.makeMove(turn, move)
+			turn = board.opponent(turn)
+		self.batch = BoardBatch.fromStates(self.states)
+
+	def test_legalMoves(self):
+		moves = self.batch.legalMoves()
+		for index, (board, turn) in enumerate(self.states):
+			self.assertEqual(int(moves[index]), board.getLegalMask(turn))
+			self.assertEqual(self.batch.legalMoveLists(index), board.getLegalMoves(turn))
+
+	def test_play(self):
+		squares = []
+		for board, turn in self.states:
+			moves = board.getLegalMask(turn)
+			squares.append((moves & -moves).bit_length() - 1)
+		self.batch.play(numpy.array(squares))
+		for index, (board, turn) in enumerate(self.states):
+			board.makeSquare(turn, squares[index])
+			played, next_turn = self.batch.toBitBoard(index)
+			self.assertEqual((played.black, played.white), (board.black, board.white))
+			self.assertEqual(next_turn, board.opponent(turn))
+
+	def test_SEF(self):
+		scores = self.batch.SEF()
+		for index, (board, turn) in enumerate(self.states):
+			self.assertEqual(scores[index], GameState(turn, board, {'b': None, 'w': None}).SEF())
+
+	def test_randomPlayouts(self):
+		batch = BoardBatch.starting(20)
+		disc_diff = batch.randomPlayouts(numpy.random.default_rng(0))
+		self.assertEqual(len(disc_diff), 20)
+		self.assertFalse(batch.legalMoves().any())
+		self.assertFalse(BoardBatch(batch.white, batch.black, batch.black_to_move).legalMoves().any())
+
+if __name__ == '__main__':
+	unittest.main()
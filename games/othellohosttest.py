@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+"""
+File: othellohosttest.py
+"""
+import json
+import random
+import asyncio
+import unittest
+from OthelloHost import GameHost
+
+class GameHostTest(unittest.IsolatedAsyncioTestCase):
+
+	async def asyncSetUp(self):
+		self.host = GameHost({'player': 'greedy'}, processes=1)
+		server = await self.host.start()
+		self.port = server.sockets[0].getsockname()[1]
+
+	async def asyncTearDown(self):
+		await self.host.close()
+
+	async def h_client(self, colour, seed):
+		rng = random.Random(seed)
+		reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+
+		async def send(command):
+			writer.write(json.dumps(command).encode('utf-8') + b'\n')
+			await writer.drain()
+			return json.loads(await reader.readline())
+
+		reply = await send({'cmd': 'new', 'colour': colour})
+		while not reply['over']:
+			self.assertEqual(reply['turn'], colour)
+			reply = await send({'cmd': 'move', 'move': rng.choice(reply['moves'])})
+		error = await send({'cmd': 'move', 'move': [1, 1]})
+		writer.write(b'{"cmd": "quit"}\n')
+		self.assertEqual(await reader.read(), b'')
+		writer.close()
+		return reply, error
+
+	async def test_concurrentGames(self):
+		results = await asyncio.gather(*[self.h_client('bw'[n % 2], n) for n in range(4)])
+		for reply, error in results:
+			self.assertTrue(reply['over'])
+			self.assertEqual(reply['b'] + reply['w'], 64 - reply['board'].count('-'))
+			self.assertIn('error', error)
+		self.assertEqual(self.host.sessions, 4)
+
+	async def test_badCommands(self):
+		reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+		for line in (b'{"cmd": "move", "move": [3, 4]}\n', b'not json\n', b'{"cmd": "new", "colour": "x"}\n'):
+			writer.write(line)
+			self.assertIn('error', json.loads(await reader.readline()))
+		writer.write(b'{"cmd": "new"}\n')
+		self.assertNotIn('error', json.loads(await reader.readline()))
+		for line in (b'{"cmd": "move", "move": 5}\n', b'{"cmd": "move", "move": ["a", 1]}\n', b'{"cmd": "move"}\n'):
+			writer.write(line)
+			self.assertIn('error', json.loads(await reader.readline()))
+		writer.close()
+
+if __name__ == '__main__':
+	unittest.main()
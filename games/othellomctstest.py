@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+"""
+File: othellomctstest.py
+"""
+import random
+import unittest
+from OthelloUtils import GameState
+from OthelloMCTS import MonteCarloSearcher, Node, playout
+from OthelloSim import SELECTION, MCTSPlayer, RandomPlayer, newBoard, playGame
+
+class MonteCarloTest(unittest.TestCase):
+
+	def test_playout(self):
+		own, opp = newBoard().getMasks('b')
+		disc_diff = playout(own, opp, random.Random(3))
+		self.assertEqual(disc_diff, playout(own, opp, random.Random(3)))
+		self.assertLessEqual(abs(disc_diff), 64)
+
+	def test_searchCountsPlayouts(self):
+		board = newBoard()
+		state = GameState('b', board, SELECTION)
+		searcher = MonteCarloSearcher(time_limit=float('inf'), playouts=200, seed=1)
+		move = searcher.search(state)
+		self.assertIn(move, state.next_moves)
+		self.assertEqual(searcher.playouts, 200)
+		self.assertEqual(move, (searcher.root.move // 8 + 1, searcher.root.move % 8 + 1))
+		self.assertLess(0, searcher.root.visits)
+		self.assertLessEqual(searcher.root.visits, 200)
+		self.assertGreater(searcher.playouts_per_second, 0)
+
+	def test_treeReuse(self):
+		board = newBoard()
+		searcher = MonteCarloSearcher(time_limit=float('inf'), playouts=300, seed=2)
+		move = searcher.search(GameState('b', board, SELECTION))
+		board.makeMove('b', move)
+		reply = max(searcher.root.children, key=lambda node: node.visits)
+		visits = reply.visits
+		board.makeSquare('w', reply.move)
+		searcher.search(GameState('b', board, SELECTION))
+		self.assertEqual(searcher.reused, visits)
+		self.assertGreater(visits, 0)
+
+	def test_terminalNode(self):
+		node = Node(0xFFFFFFFF, 0xFFFFFFFF00000000)
+		self.assertEqual(node.untried, [])
+
+	def test_playGame(self):
+		result = playGame(MCTSPlayer(float('inf'), 20, seed=4), RandomPlayer(5))
+		self.assertEqual(result['plies'] - result['passes'], result['b'] + result['w'] - 4)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+"""
+File: othellopatterntest.py
+"""
+import os
+import random
+import tempfile
+import unittest
+from OthelloUtils import GameState, BitBoard, positionToSquare, SQUARE_TRANSFORMS
+from OthelloSearch import Searcher
+from OthelloSim import RandomPlayer, playGame
+from OthelloPattern import (HEADER, INSTANCES, PatternEvaluator, patternIndices, seedTables, fitTables, writeTables,
+	readTables)
+from OthelloRecord import gamePositions
+
+class PatternTest(unittest.TestCase):
+
+	def test_indices(self):
+		rng = random.Random(6)
+		for trial in range(20):
+			own = rng.getrandbits(64)
+			opp = rng.getrandbits(64) & ~own
+			for (pattern, squares), index in zip(INSTANCES, patternIndices(own, opp)):
+				digits = [1 if own >> positionToSquare(position) & 1 else 2 if opp >> positionToSquare(position) & 1
+					else 0 for position in squares]
+				self.assertEqual(index, sum(digit * 3 ** n for n, digit in enumerate(digits)))
+
+	def test_instancesAreSymmetric(self):
+		for pattern, squares in INSTANCES:
+			first = [positionToSquare(position) for position in [s for p, s in INSTANCES if p == pattern][0]]
+			image = [positionToSquare(position) for position in squares]
+			self.assertTrue(any([SQUARE_TRANSFORMS[t][sq] for sq in first] == image for t in range(8)))
+
+	def test_seededTablesMatchSEF(self):
+		board = BitBoard('b', 'w')
+		for player, position in [('b', (1, 3)), ('w', (1, 4)), ('b', (3, 8)), ('w', (2, 2)), ('b', (7, 2)), ('b', (4, 4))]:
+			board.h_setPosition(player, position)
+		state = GameState('b', board, {'b': None, 'w': None})
+		evaluator = PatternEvaluator()
+		self.assertAlmostEqual(evaluator.SEF(board, 'b'), state.SEF(board, 'b'), delta=5)
+		self.assertEqual(evaluator.SEF(board, 'w'), -evaluator.SEF(board, 'b'))
+
+	def test_fileRoundTrip(self):
+		handle, path = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			tables = seedTables(stages=2)
+			writeTables(path, tables)
+			self.assertEqual(readTables(path), tables)
+			self.assertEqual(os.path.getsize(path), HEADER.size + 2 * 2 * (3 * 3 ** 8 + 3 ** 9))
+		finally:
+			os.remove(path)
+
+	def test_fitAndSearch(self):
+		positions = []
+		for seed in range(4):
+			result = playGame(RandomPlayer(seed), RandomPlayer(seed + 10))
+			for own, opp, player, move in gamePositions(result):
+				positions.append((own, opp, result[player] - result['w' if player == 'b' else 'b']))
+		before = sum(target ** 2 for own, opp, target in positions)
+		evaluator = PatternEvaluator(tables=fitTables(positions, epochs=5, rate=0.01))
+		after = sum((evaluator.evaluate(own, opp) / 100 - target) ** 2 for own, opp, target in positions)
+		self.assertLess(after, before)
+		board = BitBoard('b', 'w')
+		for player, position in [('w', (4, 4)), ('w', (5, 5)), ('b', (4, 5)), ('b', (5, 4))]:
+			board.h_setPosition(player, position)
+		state = GameState('b', board, {'b': 'computer', 'w': 'computer'})
+		self.assertIn(Searcher(time_limit=float('inf'), max_depth=3, evaluator=evaluator).search(state),
+			state.next_moves)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+
+"""
+File: othelloperfttest.py
+"""
+import unittest
+from OthelloPerft import START, START_COUNTS, POSITIONS, runPerft
+
+class PerftTest(unittest.TestCase):
+
+	def test_startCounts(self):
+		for engine in ('bitboard', 'masks'):
+			for depth in range(1, 7):
+				self.assertEqual(runPerft(START, 'b', depth, engine)[0], START_COUNTS[depth], (engine, depth))
+
+	def test_storedPositions(self):
+		for name, squares, player, counts in POSITIONS:
+			for engine in ('board', 'bitboard', 'masks'):
+				self.assertEqual(runPerft(squares, player, 3, engine)[0], counts[2], (engine, name))
+
+	def test_boardShallow(self):
+		for depth in range(1, 6):
+			self.assertEqual(runPerft(START, 'b', depth, 'board')[0], START_COUNTS[depth])
+
+	def test_boardDepth6(self):
+		self.assertEqual(runPerft(START, 'b', 6, 'board')[0], START_COUNTS[6])
+
+if __name__ == '__main__':
+	unittest.main()
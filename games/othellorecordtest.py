@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""
+File: othellorecordtest.py
+"""
+import os
+import tempfile
+import unittest
+from OthelloRecord import GameWriter, readGames, encodeGame, gamePositions
+from OthelloSim import RandomPlayer, GreedyPlayer, simulate, playGame, newBoard
+from OthelloUtils import Board, BitBoard
+from RandomAIOthello import Othello
+
+class GameRecordTest(unittest.TestCase):
+
+	def setUp(self):
+		handle, self.path = tempfile.mkstemp()
+		os.close(handle)
+		os.remove(self.path)
+
+	def tearDown(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+
+	def test_roundTrip(self):
+		game = {'black': 'greedy', 'white': 'human', 'weights': {'b': {'w_flip_num': 2, 'w_corner_num': 1000,
+			'w_edge_num': 30, 'w_corner_adj_num': -100}}, 'b': 40, 'w': 24, 'moves': [(5, 6), (6, 4), None, (3, 3)]}
+		with GameWriter(self.path) as writer:
+			writer.write(game)
+		with GameWriter(self.path) as writer:
+			writer.write(dict(game, black='random', weights=None))
+		games = list(readGames(self.path))
+		self.assertEqual(len(games), 2)
+		self.assertEqual(games[0]['moves'], game['moves'])
+		self.assertEqual(games[0]['weights'], game['weights'])
+		self.assertEqual((games[0]['winner'], games[0]['b'], games[0]['w']), ('b', 40, 24))
+		self.assertEqual(games[1]['black'], 'random')
+		self.assertIsNone(games[1]['weights'])
+		# One byte per move after the fixed part of the record
+		self.assertEqual(len(encodeGame(dict(game, weights=None, black='', white=''))), 6 + 4)
+
+	def test_simulatorRecords(self):
+		with GameWriter(self.path) as writer:
+			results = simulate(3, GreedyPlayer(1), RandomPlayer(2), writer=writer)
+		games = readGames(self.path)
+		for result, game in zip(results, games):
+			self.assertEqual(game['moves'], result['moves'])
+			self.assertEqual((game['b'], game['w'], game['winner']), (result['b'], result['w'], result['winner']))
+		self.assertEqual(next(readGames(self.path))['black'], 'greedy')
+
+	def test_gamePositions(self):
+		result = playGame(RandomPlayer(4), RandomPlayer(5))
+		board = newBoard()
+		positions = list(gamePositions(result))
+		self.assertEqual(len(positions), result['plies'] - result['passes'])
+		for own, opp, player, move in positions:
+			self.assertEqual((own, opp), board.getMasks(player))
+			board.makeMove(player, move)
+		with self.assertRaises(ValueError):
+			list(gamePositions({'moves': [(1, 1)]}))
+
+	def test_recordGame(self):
+		selection = {'b': 'human', 'w': 'human'}
+		moves = [(3, 4), (3, 3), (3, 2)]
+		for board_type in (Board, BitBoard):
+			game = Othello(selection, board_type, record=self.path)
+			for move in moves:
+				self.assertIn(game.ERROR, game.place((1, 1), selection))
+				self.assertNotIn(game.ERROR, game.place(move, selection))
+			game.recordGame()
+		records = list(readGames(self.path))
+		self.assertEqual([record['moves'] for record in records], [moves, moves])
+		for record in records:
+			self.assertEqual(len(list(gamePositions(record))), len(moves))
+
+	def test_notARecordFile(self):
+		with open(self.path, 'wb') as record_file:
+			record_file.write(b'nonsense')
+		with self.assertRaises(ValueError):
+			list(readGames(self.path))
+
+if __name__ == '__main__':
+	unittest.main()
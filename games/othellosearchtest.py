@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+
+"""
+File: othellosearchtest.py
+"""
+import os
+import tempfile
+import unittest
+import random
+from OthelloUtils import GameState, BitBoard, positionToSquare, squareToPosition, legalMask, flipMask, \
+	SQUARE_TRANSFORMS
+from OthelloSearch import Searcher, TranspositionTable, EndgameSolver, MoveOrdering, EXACT, LOWER, UPPER
+import pickle
+import multiprocessing
+import OthelloParallel
+from OthelloParallel import ParallelSearcher, LazySearcher, SharedTranspositionTable
+from OthelloBook import OpeningBook, writeBook, buildBook
+from OthelloSim import newBoard, randomOpening
+
+class SearcherTest(unittest.TestCase):
+
+	def setUp(self):
+		self.board = BitBoard('b', 'w')
+		self.board.h_setPosition('w', (4, 4))
+		self.board.h_setPosition('w', (5, 5))
+		self.board.h_setPosition('b', (4, 5))
+		self.board.h_setPosition('b', (5, 4))
+		self.selection = {'b': 'computer', 'w': 'computer'}
+
+	def test_returnsLegalMove(self):
+		state = GameState('b', self.board, self.selection)
+		searcher = Searcher(time_limit=0.2)
+		move = searcher.search(state)
+		self.assertIn(move, state.next_moves)
+		self.assertEqual(state.minimax_move, move)
+		self.assertGreaterEqual(searcher.depth_reached, 1)
+		self.assertEqual(self.board.allPositions('b'), [(4, 5), (5, 4)])
+
+	def test_takesCorner(self):
+		board = BitBoard('b', 'w')
+		board.h_setPosition('b', (3, 3))
+		board.h_setPosition('w', (2, 2))
+		board.h_setPosition('w', (4, 4))
+		board.h_setPosition('b', (5, 5))
+		state = GameState('b', board, self.selection)
+		self.assertEqual(Searcher(time_limit=0.2, max_depth=2).search(state), (1, 1))
+
+	def test_noMoves(self):
+		board = BitBoard('b', 'w')
+		board.h_setPosition('b', (1, 1))
+		state = GameState('b', board, self.selection)
+		self.assertIsNone(Searcher(time_limit=0.1).search(state))
+
+	def test_orderingDoesNotChangeScore(self):
+		board = newBoard()
+		turn = 'b'
+		for move in randomOpening(8, 5):
+			board.makeMove(turn, move)
+			turn = board.opponent(turn)
+		unordered = Searcher(time_limit=float('inf'), max_depth=4,
+			ordering=MoveOrdering(killers=False, history=False, static=False))
+		unordered.search(GameState(turn, board, self.selection))
+		ordered = Searcher(time_limit=float('inf'), max_depth=4)
+		ordered.search(GameState(turn, board, self.selection))
+		self.assertEqual(ordered.score, unordered.score)
+		self.assertLess(ordered.nodes, unordered.nodes)
+
+class MoveOrderingTest(unittest.TestCase):
+
+	def test_order(self):
+		ordering = MoveOrdering()
+		corner, edge, inner, corner_adj = [positionToSquare(position) for position in [(8, 8), (1, 4), (3, 3), (2, 2)]]
+		moves = (1 << corner) | (1 << edge) | (1 << inner) | (1 << corner_adj)
+		self.assertEqual(ordering.order(moves, 10), [corner, edge, inner, corner_adj])
+		self.assertEqual(ordering.order(moves, 10, corner_adj)[0], corner_adj)
+		other_inner = positionToSquare((3, 6))
+		moves |= 1 << other_inner
+		ordering.cutoff(other_inner, 10, 3)
+		self.assertEqual(ordering.order(moves, 10)[2:4], [other_inner, inner])
+		self.assertEqual(ordering.history[other_inner], 9)
+		ordering.newSearch()
+		self.assertEqual(ordering.killers[10], [-1, -1])
+		self.assertEqual(ordering.history[other_inner], 4)
+
+class ParallelSearcherTest(unittest.TestCase):
+
+	def test_matchesSearcher(self):
+		board = newBoard()
+		turn = 'b'
+		for move in randomOpening(10, 3):
+			board.makeMove(turn, move)
+			turn = board.opponent(turn)
+		selection = {'b': 'computer', 'w': 'computer'}
+		searcher = Searcher(time_limit=float('inf'), max_depth=4)
+		searcher.search(GameState(turn, board, selection))
+		parallel = ParallelSearcher(2, time_limit=float('inf'), max_depth=4)
+		try:
+			state = GameState(turn, board, selection)
+			move = parallel.search(state)
+		finally:
+			parallel.close()
+		self.assertIn(move, state.next_moves)
+		self.assertEqual(parallel.depth_reached, 4)
+		self.assertEqual(parallel.score, searcher.score)
+		self.assertEqual(parallel.table.size, 2)
+		self.assertEqual(len(board.undo_stack), 10)
+
+	def test_workerNoticesRaisedAlpha(self):
+		OthelloParallel.h_initWorker(multiprocessing.Value('q', 10), 1)
+		searcher = OthelloParallel._worker_searcher
+		searcher.deadline = float('inf')
+		searcher.root_alpha = 10
+		self.assertFalse(searcher.h_timeUp())
+		OthelloParallel._shared_alpha.value = 20
+		with self.assertRaises(OthelloParallel.AlphaRaised):
+			searcher.h_timeUp()
+
+	def test_lazySearcher(self):
+		board = newBoard()
+		turn = 'b'
+		for move in randomOpening(10, 4):
+			board.makeMove(turn, move)
+			turn = board.opponent(turn)
+		lazy = LazySearcher(1, time_limit=float('inf'), max_depth=4, tt_megabytes=1)
+		try:
+			state = GameState(turn, board, {'b': 'computer', 'w': 'computer'})
+			move = lazy.search(state)
+		finally:
+			lazy.close()
+		self.assertIn(move, state.next_moves)
+		self.assertEqual(lazy.depth_reached, 4)
+		self.assertEqual(len(board.undo_stack), 10)
+
+class SharedTranspositionTableTest(unittest.TestCase):
+
+	def test_sharedBetweenViews(self):
+		table = SharedTranspositionTable(megabytes=0.01)
+		try:
+			self.assertIsNone(table.lookup(0))
+			table.store(12345, 4, LOWER, -250, 17)
+			table.store(0, 2, EXACT, 7, -1)
+			attached = pickle.loads(pickle.dumps(table))
+			self.assertEqual(attached.lookup(12345), (4, LOWER, -250, 17))
+			self.assertEqual(attached.lookup(0), (2, EXACT, 7, -1))
+			attached.store(12345 + table.mask + 1, 2, UPPER, 3, 0)
+			attached.close()
+			self.assertEqual(table.lookup(12345 + table.mask + 1), (2, UPPER, 3, 0))
+			self.assertEqual(table.lookup(12345), (4, LOWER, -250, 17))
+			# A torn slot no longer matches its key
+			idx = (12345 & table.mask) << 2
+			table.words[idx + 1] ^= 1 << 33
+			self.assertNotEqual(table.lookup(12345), (4, LOWER, -250, 17))
+		finally:
+			table.close()
+
+class TranspositionTableTest(unittest.TestCase):
+
+	def test_storeAndLookup(self):
+		table = TranspositionTable(megabytes=0.01)
+		self.assertIsNone(table.lookup(12345))
+		table.store(12345, 4, LOWER, -250, 17)
+		self.assertEqual(table.lookup(12345), (4, LOWER, -250, 17))
+
+	def test_replacement(self):
+		table = TranspositionTable(megabytes=0.01)
+		key = 7
+		other = key + (table.mask + 1)		# same bucket
+		table.store(key, 6, EXACT, 10, 1)
+		table.store(other, 2, UPPER, 20, 2)
+		# The shallower entry goes to the always-replace slot
+		self.assertEqual(table.lookup(key), (6, EXACT, 10, 1))
+		self.assertEqual(table.lookup(other), (2, UPPER, 20, 2))
+		# Entries from an earlier search give way to new ones
+		table.newSearch()
+		table.store(other, 1, EXACT, 30, 3)
+		self.assertIsNone(table.lookup(key))
+		self.assertEqual(table.lookup(other), (1, EXACT, 30, 3))
+
+class EndgameSolverTest(unittest.TestCase):
+
+	def h_minimax(self, own, opp, passed=False):
+		""" Plain negamax over every move, for comparison """
+		moves = legalMask(own, opp)
+		if not moves:
+			if passed:
+				return own.bit_count() - opp.bit_count()
+			return -self.h_minimax(opp, own, True)
+		best = -65
+		for sq in range(64):
+			if moves >> sq & 1:
+				flips = flipMask(own, opp, sq)
+				best = max(best, -self.h_minimax(opp ^ flips, own | flips | (1 << sq)))
+		return best
+
+	def h_position(self, empties, seed):
+		rng = random.Random(seed)
+		board = BitBoard('b', 'w')
+		for player, position in [('w', (4, 4)), ('w', (5, 5)), ('b', (4, 5)), ('b', (5, 4))]:
+			board.h_setPosition(player, position)
+		turn = 'b'
+		while board.get_no_of_spaces() > empties:
+			moves = board.getLegalMoves(turn) or board.getLegalMoves(board.opponent(turn))
+			if not moves:
+				break
+			if not board.getLegalMoves(turn):
+				turn = board.opponent(turn)
+			board.makeMove(turn, rng.choice(moves))
+			turn = board.opponent(turn)
+		return board, turn
+
+	def test_matchesMinimax(self):
+		solver = EndgameSolver()
+		for seed in range(4):
+			board, turn = self.h_position(7, seed)
+			own, opp = board.getMasks(turn)
+			move, disc_diff = solver.solveRoot(own, opp)
+			self.assertEqual(disc_diff, self.h_minimax(own, opp))
+			if move is not None:
+				flips = flipMask(own, opp, move)
+				self.assertEqual(-self.h_minimax(opp ^ flips, own | flips | (1 << move)), disc_diff)
+
+	def test_searcherSolves(self):
+		board, turn = self.h_position(8, 11)
+		state = GameState(turn, board, {'b': 'computer', 'w': 'computer'})
+		searcher = Searcher(time_limit=5.0)
+		move = searcher.search(state)
+		if len(state.next_moves) > 1:
+			self.assertTrue(searcher.solved)
+			own, opp = board.getMasks(turn)
+			self.assertEqual(squareToPosition(EndgameSolver().solveRoot(own, opp)[0]), move)
+
+
+	def test_solverTimeoutFallsBackToDeepening(self):
+		board, turn = self.h_position(16, 2)
+		state = GameState(turn, board, {'b': 'computer', 'w': 'computer'})
+		self.assertGreater(len(state.next_moves), 1)
+		searcher = Searcher(time_limit=0.4, endgame_empties=16)
+		self.assertIn(searcher.search(state), state.next_moves)
+		# The deepening gets the time the solver left, not what remains of half the budget
+		self.assertFalse(searcher.solved)
+		self.assertGreater(searcher.depth_reached, 1)
+
+class OpeningBookTest(unittest.TestCase):
+
+	def setUp(self):
+		handle, self.path = tempfile.mkstemp()
+		os.close(handle)
+		self.board = BitBoard('b', 'w')
+		for player, position in [('w', (4, 4)), ('w', (5, 5)), ('b', (4, 5)), ('b', (5, 4))]:
+			self.board.h_setPosition(player, position)
+
+	def tearDown(self):
+		os.remove(self.path)
+
+	def test_lookup(self):
+		self.board.makeMove('b', (3, 4))
+		entries = {key: (key % 64, -3) for key in range(1000, 50000, 7)}
+		key, transform = self.board.getCanonicalKey('w')
+		entries[key] = (SQUARE_TRANSFORMS[transform][positionToSquare((3, 5))], 12)
+		writeBook(self.path, entries)
+		book = OpeningBook(self.path)
+		self.assertEqual(len(book), len(entries))
+		self.assertEqual(book.lookupKey(1007), (1007 % 64, -3))
+		self.assertIsNone(book.lookupKey(1008))
+		self.assertEqual(book.lookup(self.board, 'w'), (3, 5))
+		self.assertIsNone(book.lookup(self.board, 'b'))
+		# The reflection of the position finds the reflected move
+		reflected = BitBoard('b', 'w')
+		for player, position in [('w', (4, 5)), ('b', (4, 4)), ('b', (5, 4)), ('b', (5, 5)), ('b', (6, 4))]:
+			reflected.h_setPosition(player, position)
+		self.assertEqual(book.lookup(reflected, 'w'), (6, 5))
+		book.close()
+
+	def test_searcherUsesBook(self):
+		writeBook(self.path, buildBook(games=2, plies=4, depth=2))
+		book = OpeningBook(self.path)
+		searcher = Searcher(time_limit=0.1, book=book)
+		move = searcher.search(GameState('b', self.board, {'b': 'computer', 'w': 'computer'}))
+		self.assertTrue(searcher.book_hit)
+		self.assertEqual(searcher.nodes, 0)
+		self.assertEqual(move, book.lookup(self.board, 'b'))
+		book.close()
+
+if __name__ == '__main__':
+	unittest.main()
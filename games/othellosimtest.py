@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+"""
+File: othellosimtest.py
+"""
+import os
+import tempfile
+import unittest
+from OthelloSim import RandomPlayer, GreedyPlayer, playGame, simulate, summarize
+from OthelloTournament import runTournament, eloEstimate, parseEngine, makeEngine
+from OthelloPattern import writeTables, seedTables
+
+class SimulatorTest(unittest.TestCase):
+
+	def test_playGame(self):
+		result = playGame(RandomPlayer(1), RandomPlayer(2))
+		self.assertEqual(result['plies'], len(result['moves']))
+		self.assertLessEqual(result['b'] + result['w'], 64)
+		self.assertEqual(result['plies'] - result['passes'], result['b'] + result['w'] - 4)
+		if result['b'] != result['w']:
+			self.assertEqual(result['winner'], 'b' if result['b'] > result['w'] else 'w')
+
+	def test_sameSeedSameGame(self):
+		self.assertEqual(playGame(RandomPlayer(5), GreedyPlayer(6))['moves'],
+			playGame(RandomPlayer(5), GreedyPlayer(6))['moves'])
+
+	def test_simulateAlternatesColours(self):
+		results = simulate(4, GreedyPlayer(1), RandomPlayer(2))
+		self.assertEqual([result['first'] for result in results], ['b', 'w', 'b', 'w'])
+		summary = summarize(results)
+		self.assertEqual(summary['wins'] + summary['draws'] + summary['losses'], 4)
+
+class TournamentTest(unittest.TestCase):
+
+	def test_eloEstimate(self):
+		elo, low, high = eloEstimate(50, 0, 50)
+		self.assertAlmostEqual(elo, 0.0)
+		self.assertLess(low, 0.0)
+		self.assertGreater(high, 0.0)
+		self.assertGreater(eloEstimate(75, 0, 25)[0], 150)
+		# A clean sweep of a short match is far from certain
+		elo, low, high = eloEstimate(0, 0, 4)
+		self.assertGreater(high - low, 1000)
+		self.assertGreater(high, -400)
+
+	def test_parseEngine(self):
+		self.assertEqual(parseEngine('d4:depth=4,w_corner_num=800'),
+			('d4', {'player': 'search', 'depth': 4, 'weights': {'w_corner_num': 800.0}}))
+
+	def test_makeEngineSharesFiles(self):
+		handle, path = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			writeTables(path, seedTables())
+			config = {'player': 'search', 'depth': 1, 'patterns': path}
+			first, second = makeEngine(config), makeEngine(config)
+		finally:
+			os.remove(path)
+		self.assertIsNot(first.searcher, second.searcher)
+		self.assertIs(first.searcher.evaluator, second.searcher.evaluator)
+
+	def test_runTournament(self):
+		engines = {'random': {'player': 'random'}, 'greedy': {'player': 'greedy'}}
+		report = runTournament(engines, games_per_pair=4, processes=1)
+		record = report['pairs'][('greedy', 'random')]
+		self.assertEqual(record['wins'] + record['draws'] + record['losses'], 4)
+		self.assertEqual(report['engines']['greedy']['wins'], report['engines']['random']['losses'])
+
+if __name__ == '__main__':
+	unittest.main()
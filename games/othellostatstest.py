@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""
+File: othellostatstest.py
+"""
+import io
+import unittest
+import contextlib
+import OthelloStats
+import OthelloSearch
+from OthelloUtils import Board
+from OthelloParallel import SharedTranspositionTable
+from OthelloPattern import PatternEvaluator
+from OthelloSim import SearchPlayer, RandomPlayer, newBoard, playGame
+
+class StatsTest(unittest.TestCase):
+
+	def tearDown(self):
+		OthelloStats.disable()
+
+	def test_countsWhileEnabled(self):
+		stats = OthelloStats.enable()
+		playGame(SearchPlayer(float('inf'), 2), RandomPlayer(1))
+		counts = stats.counts
+		# The search generates moves at every interior node, through legalMask
+		self.assertGreater(counts['move_generation'], counts['searches'])
+		self.assertGreater(counts['flips'], 0)
+		self.assertGreater(counts['sef'], 0)
+		self.assertGreater(counts['nodes'], 0)
+		self.assertLessEqual(counts.get('tt_hits', 0), counts['tt_probes'])
+		self.assertIn('sef', stats.report())
+
+	def test_sharedTableAndPatterns(self):
+		stats = OthelloStats.enable()
+		table = SharedTranspositionTable(1)
+		try:
+			table.store(5, 3, 0, 10, -1)
+			table.lookup(5)
+			table.lookup(6)
+		finally:
+			table.close()
+		board = newBoard()
+		PatternEvaluator().SEF(board, 'b')
+		self.assertEqual((stats.counts['tt_probes'], stats.counts['tt_hits']), (2, 1))
+		self.assertEqual(stats.counts['sef'], 1)
+
+	def test_disableRestoresMethods(self):
+		original = Board.getLegalMoves
+		original_mask = OthelloSearch.legalMask
+		OthelloStats.enable()
+		self.assertIsNot(Board.getLegalMoves, original)
+		self.assertIsNot(OthelloSearch.legalMask, original_mask)
+		stats = OthelloStats.disable()
+		self.assertIs(Board.getLegalMoves, original)
+		self.assertIs(OthelloSearch.legalMask, original_mask)
+		newBoard().getLegalMoves('b')
+		self.assertNotIn('move_generation', stats.counts)
+		self.assertIsNone(OthelloStats.disable())
+
+	def test_noOutput(self):
+		output = io.StringIO()
+		with contextlib.redirect_stdout(output):
+			newBoard(Board).getLegalMoves('b')
+		self.assertEqual(output.getvalue(), '')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+"""
+File: othellotunetest.py
+"""
+import unittest
+import numpy as np
+from OthelloUtils import GameState
+from OthelloTune import generatePositions, featureMatrix, fitLeastSquares, fitLogistic, tune, DISC_SCORE
+
+class TuneTest(unittest.TestCase):
+
+	def test_fitLeastSquares(self):
+		rng = np.random.default_rng(1)
+		features = rng.integers(-10, 10, size=(500, 4)).astype(np.float64)
+		disc_diff = features @ np.array([0.5, 8.0, 1.0, -2.0])
+		weights = fitLeastSquares(features, disc_diff)
+		self.assertEqual(list(weights), list(GameState.WEIGHT_KEYS))
+		self.assertAlmostEqual(weights['w_corner_num'], 8.0 * DISC_SCORE, places=6)
+		self.assertAlmostEqual(weights['w_corner_adj_num'], -2.0 * DISC_SCORE, places=6)
+
+	def test_fitLogistic(self):
+		rng = np.random.default_rng(2)
+		features = rng.normal(size=(2000, 4))
+		probability = 1.0 / (1.0 + np.exp(-(features @ np.array([0.0, 2.0, 0.5, -1.0]))))
+		outcome = (rng.random(2000) < probability).astype(np.float64)
+		weights = fitLogistic(features, outcome)
+		self.assertGreater(weights['w_corner_num'], weights['w_edge_num'])
+		self.assertGreater(weights['w_edge_num'], 0)
+		self.assertLess(weights['w_corner_adj_num'], 0)
+
+	def test_selfPlay(self):
+		black, white, black_to_move, result = generatePositions(2, {'player': 'greedy'}, processes=1)
+		self.assertEqual(len(black), len(white))
+		self.assertFalse((black & white).any())
+		self.assertTrue(black_to_move[0])
+		# Every position of a game carries the final result of that game
+		self.assertLessEqual(len(set(result.tolist())), 2)
+		self.assertEqual(featureMatrix(black, white, black_to_move).shape, (len(black), 4))
+		weights = tune(black, white, black_to_move, result, method='logistic')
+		self.assertEqual(set(weights), set(GameState.WEIGHT_KEYS))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+"""
+File: othelloutilstest.py
+"""
+import random
+import unittest
+from OthelloUtils import GameState, Board, BitBoard, zobristHash, positionsToMask, transposeMask, \
+	transformMask, canonicalize, canonicalKey, SQUARE_TRANSFORMS, INVERSE_TRANSFORMS
+
+class BitBoardTest(unittest.TestCase):
+
+	def setUp(self):
+		self.board = BitBoard('b', 'w')
+		self.board.h_setPosition('w', (4, 4))
+		self.board.h_setPosition('w', (5, 5))
+		self.board.h_setPosition('b', (4, 5))
+		self.board.h_setPosition('b', (5, 4))
+
+	def test_startLegalMoves(self):
+		self.assertEqual(self.board.getLegalMoves('b'), [(3, 4), (4, 3), (5, 6), (6, 5)])
+		self.assertEqual(self.board.getLegalMoves('w'), [(3, 5), (4, 6), (5, 3), (6, 4)])
+
+	def test_getFlips(self):
+		self.assertEqual(self.board.getFlips('b', 'w', (3, 4)), [(4, 4)])
+		self.board.h_setPosition('b', (3, 4))
+		self.board.h_setPosition('b', (4, 4))
+		self.board.removePiece('w', (4, 4))
+		self.assertEqual(self.board.allPositions('b'), [(3, 4), (4, 4), (4, 5), (5, 4)])
+		self.assertEqual(self.board.getLegalMoves('w'), [(3, 3), (3, 5), (5, 3)])
+
+	def test_noWrapAroundEdges(self):
+		board = BitBoard('b', 'w')
+		board.h_setPosition('b', (3, 8))
+		board.h_setPosition('w', (4, 1))
+		self.assertEqual(board.getLegalMoves('b'), [])
+		self.assertEqual(board.getFlips('b', 'w', (4, 2)), [])
+
+	def test_counters(self):
+		self.board.h_setPosition('b', (1, 1))
+		self.board.h_setPosition('b', (1, 2))
+		self.board.h_setPosition('b', (1, 4))
+		self.assertEqual(self.board.getNoOfFlippedPieces('b'), 5)
+		self.assertEqual(self.board.getNoOfCornerPieces('b'), 1)
+		self.assertEqual(self.board.getNoOfEdgePieces('b'), 1)
+		self.assertEqual(self.board.getNoOfCornerAdjacentPieces('b'), 1)
+		self.assertEqual(self.board.get_no_of_spaces(), 57)
+
+	def test_hashKey(self):
+		start = self.board.hash_key
+		self.assertEqual(start, zobristHash(self.board.black, self.board.white))
+		self.board.h_setPosition('b', (3, 4))
+		self.board.h_setPosition('b', (4, 4))
+		self.board.removePiece('w', (4, 4))
+		self.assertEqual(self.board.hash_key, zobristHash(self.board.black, self.board.white))
+		self.assertNotEqual(self.board.getHashKey('b'), self.board.getHashKey('w'))
+		self.board.h_setPosition('w', (4, 4))
+		self.board.removePiece('b', (3, 4))
+		self.assertEqual(self.board.hash_key, start)
+
+	def test_hashKeyMatchesBoard(self):
+		board = Board('b', 'w')
+		for player, position in [('w', (4, 4)), ('w', (5, 5)), ('b', (4, 5)), ('b', (5, 4))]:
+			board.h_setPosition(player, position)
+		self.assertEqual(board.hash_key, self.board.hash_key)
+		self.assertEqual(BitBoard.fromBoard(board).hash_key, self.board.hash_key)
+
+	def test_makeUnmakeMove(self):
+		key = self.board.hash_key
+		flips = self.board.makeMove('b', (3, 4))
+		self.assertEqual(flips, [(4, 4)])
+		self.assertEqual(self.board.allPositions('w'), [(5, 5)])
+		self.assertEqual(self.board.hash_key, zobristHash(self.board.black, self.board.white))
+		self.board.makeMove('w', (3, 3))
+		self.board.unmakeMove()
+		self.board.unmakeMove()
+		self.assertEqual(self.board.allPositions('b'), [(4, 5), (5, 4)])
+		self.assertEqual(self.board.allPositions('w'), [(4, 4), (5, 5)])
+		self.assertEqual(self.board.hash_key, key)
+		self.assertEqual(self.board.undo_stack, [])
+
+
+class SymmetryTest(unittest.TestCase):
+
+	def test_transforms(self):
+		self.assertEqual(transposeMask(positionsToMask([(1, 2), (3, 7)])), positionsToMask([(2, 1), (7, 3)]))
+		self.assertEqual(transformMask(positionsToMask([(1, 2)]), 1), positionsToMask([(1, 7)]))
+		self.assertEqual(transformMask(positionsToMask([(1, 2)]), 2), positionsToMask([(8, 2)]))
+		self.assertEqual(len(set(SQUARE_TRANSFORMS[t][1] for t in range(8))), 8)
+		for t in range(8):
+			for sq in (0, 9, 30, 63):
+				self.assertEqual(SQUARE_TRANSFORMS[INVERSE_TRANSFORMS[t]][SQUARE_TRANSFORMS[t][sq]], sq)
+
+	def test_canonicalKey(self):
+		rng = random.Random(3)
+		for trial in range(20):
+			own = rng.getrandbits(64)
+			opp = rng.getrandbits(64) & ~own
+			key = canonicalKey(own, opp)[0]
+			for t in range(8):
+				x, y = transformMask(own, t), transformMask(opp, t)
+				canonical_own, canonical_opp, transform = canonicalize(x, y)
+				self.assertEqual(canonicalKey(x, y)[0], key)
+				self.assertEqual((transformMask(x, transform), transformMask(y, transform)),
+					(canonical_own, canonical_opp))
+
+	def test_boardsAgree(self):
+		board = Board('b', 'w')
+		for player, position in [('w', (4, 4)), ('w', (5, 5)), ('b', (4, 5)), ('b', (5, 4)), ('b', (3, 4))]:
+			board.h_setPosition(player, position)
+		bitboard = BitBoard.fromBoard(board)
+		self.assertEqual(board.getCanonicalKey('w'), bitboard.getCanonicalKey('w'))
+		self.assertNotEqual(board.getCanonicalKey('w')[0], board.getCanonicalKey('b')[0])
+
+
+class BoardTest(unittest.TestCase):
+
+	def setUp(self):
+		self.board = Board('b', 'w')
+		for player, position in [('w', (4, 4)), ('w', (5, 5)), ('b', (4, 5)), ('b', (5, 4))]:
+			self.board.h_setPosition(player, position)
+
+	def test_boardsAreIndependent(self):
+		other = Board('b', 'w')
+		self.assertEqual(other.gameboard[4][4], '-')
+		other.h_setPosition('b', (1, 1))
+		self.assertEqual(self.board.gameboard[1][1], '-')
+
+	def test_makeUnmakeMove(self):
+		before = str(self.board)
+		key = self.board.hash_key
+		self.assertEqual(self.board.makeMove('b', (3, 4)), [(4, 4)])
+		self.assertEqual(self.board.gameboard[4][4], 'b')
+		self.assertNotIn((4, 4), self.board.white_curr_pos)
+		self.board.unmakeMove()
+		self.assertEqual(str(self.board), before)
+		self.assertEqual(sorted(self.board.black_curr_pos), [(4, 5), (5, 4)])
+		self.assertEqual(sorted(self.board.white_curr_pos), [(4, 4), (5, 5)])
+		self.assertEqual(self.board.hash_key, key)
+
+	def test_frontier(self):
+		self.assertEqual(len(self.board.frontier), 12)
+		rng = random.Random(3)
+		bitboard = BitBoard.fromBoard(self.board)
+		player = 'b'
+		for ply in range(30):
+			moves = self.board.getLegalMoves(player)
+			self.assertEqual(moves, bitboard.getLegalMoves(player))
+			if moves:
+				move = rng.choice(moves)
+				self.board.makeMove(player, move)
+				bitboard.makeMove(player, move)
+			player = self.board.opponent(player)
+		for ply in range(len(self.board.undo_stack)):
+			self.board.unmakeMove()
+		centre = {(4, 4), (4, 5), (5, 4), (5, 5)}
+		self.assertEqual({divmod(index, 10) for index in self.board.frontier},
+			{(row, col) for row in range(3, 7) for col in range(3, 7)} - centre)
+
+	def test_copy(self):
+		self.board.makeMove('b', (3, 4))
+		other = self.board.copy()
+		self.assertEqual(str(other), str(self.board))
+		self.assertEqual(other.getLegalMoves('w'), self.board.getLegalMoves('w'))
+		other.unmakeMove()
+		other.makeMove('b', (6, 5))
+		self.assertEqual(self.board.gameboard[6][5], '-')
+		self.assertEqual(self.board.allPositions('b'), [(3, 4), (4, 4), (4, 5), (5, 4)])
+		self.assertEqual(len(self.board.squares), 100)
+		self.assertFalse(hasattr(self.board, '__dict__'))
+
+	def test_featureCounts(self):
+		bitboard = BitBoard.fromBoard(self.board)
+		for player, position in [('b', (1, 1)), ('b', (1, 2)), ('w', (1, 4)), ('w', (8, 1)), ('b', (6, 6))]:
+			self.board.h_setPosition(player, position)
+			bitboard.h_setPosition(player, position)
+		self.board.removePiece('b', (1, 2))
+		bitboard.removePiece('b', (1, 2))
+		self.board.makeMove('w', (3, 4))
+		bitboard.makeMove('w', (3, 4))
+		for player in ('b', 'w'):
+			self.assertEqual(self.board.getFeatureCounts(player), bitboard.getFeatureCounts(player))
+		self.assertEqual(self.board.getFeatureCounts('w'), (5, 1, 2, 0))
+		self.assertEqual(self.board.getNoOfCornerPieces('b'), 1)
+
+	def test_SEF(self):
+		state = GameState('b', self.board, {'b': None, 'w': None})
+		self.assertEqual(state.SEF(), 0)
+		self.board.h_setPosition('b', (1, 1))
+		self.assertEqual(state.SEF(), GameState.w_flip_num + GameState.w_corner_num)
+		self.assertEqual(state.SEF(player='w'), -state.SEF())
+
+	def test_changeWeights(self):
+		state = GameState('b', self.board, {'b': None, 'w': None}, weights={'w_corner_num': 500.4})
+		self.assertEqual(state.getWeights()['w_corner_num'], 500)
+		self.assertEqual(GameState.w_corner_num, 1000)
+		self.assertEqual(GameState('b', self.board, {'b': None, 'w': None}).w_corner_num, 1000)
+		with self.assertRaises(ValueError):
+			state.changeWeights({'w_unknown': 1})
+		state.w_edge_num = 12
+		self.assertEqual(state.getWeights(), {'w_flip_num': 2, 'w_corner_num': 500, 'w_edge_num': 12,
+			'w_corner_adj_num': -100})
+
+	def test_lazyNextMoves(self):
+		state = GameState('b', self.board, {'b': None, 'w': None})
+		self.assertFalse(hasattr(state, '__dict__'))
+		self.assertIsNone(state._next_moves)
+		self.assertEqual(state.next_moves, [(3, 4), (4, 3), (5, 6), (6, 5)])
+		# The moves of a position seen before come from the cache, not the board
+		board = BitBoard.fromBoard(self.board)
+		board.getLegalMoves = None
+		self.assertEqual(GameState('b', board, {'b': None, 'w': None}).next_moves, state.next_moves)
+
+if __name__ == '__main__':
+	unittest.main()